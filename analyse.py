@@ -0,0 +1,261 @@
+"""
+Kolonnevis kopi av transaksjoner i numpy-arrayer, for analyse over hele historikken uten en Python-løkke per rad.
+Beløp er heltall i øre, datoer er dager siden 1970-01-01, og type, kategorier og personer er tallkoder.
+numpy er bare nødvendig hvis modulen faktisk brukes, den importeres ikke før et Øyeblikksbilde lages.
+"""
+from database import Database
+
+TYPER = ("innskudd", "uttak", "utlegg", "tilbakebetaling")    # type_kode er indeksen her, -1 for ukjent type
+FORTEGN = {"innskudd": 1, "tilbakebetaling": 1, "uttak": -1, "utlegg": -1}
+TID = {"dag": "datetime64[D]", "måned": "datetime64[M]", "år": "datetime64[Y]"}
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as feil:
+        raise ImportError("analyse trenger numpy, installer det med pip install numpy") from feil
+    return numpy
+
+
+def _epoke_dag(dato: str) -> int:
+    np = _numpy()
+    return int(np.datetime64(dato[:10], "D").astype(np.int64))
+
+
+class Øyeblikksbilde:
+    """
+    Hver transaksjon er en rad i arrayene id, øre, dag og type_kode, sortert på id.
+    Tags er par av arrayer: kategori_rad[i] er raden som har kategorien med id kategori_kode[i] (og tilsvarende for personer),
+    og kategorier[id]/personer[id] er navnet.
+    """
+    def __init__(self, database: Database, start_dato: str = None, slutt_dato: str = None, handling: str = None):
+        """
+        Filtrene gjelder også for transaksjonene oppdater() henter senere
+        :param start_dato: ta bare med transaksjoner fra og med denne datoen
+        :param slutt_dato: ta bare med transaksjoner til og med denne datoen
+        :param handling: ta bare med transaksjoner av denne typen
+        """
+        self.database = database
+        self._filtere = []
+        self._filter_verdier = []
+
+        for dato, tegn in ((start_dato, ">="), (slutt_dato, "<=")):
+            if dato is not None:
+                self._filtere.append(f"dato {tegn} ?")
+                self._filter_verdier.append(dato)
+
+        if handling is not None:
+            self._filtere.append("type = ?")
+            self._filter_verdier.append(handling)
+
+        self._tøm()
+        self.oppdater()
+
+    def _tøm(self) -> None:
+        np = _numpy()
+        self.id = np.empty(0, np.int64)
+        self.øre = np.empty(0, np.int64)
+        self.dag = np.empty(0, np.int32)
+        self.type_kode = np.empty(0, np.int8)
+        self.kategori_rad = np.empty(0, np.int64)
+        self.kategori_kode = np.empty(0, np.int32)
+        self.person_rad = np.empty(0, np.int64)
+        self.person_kode = np.empty(0, np.int32)
+        self.kategorier = []
+        self.personer = []
+        self.siste_id = 0
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def _filter_tekst(self) -> str:
+        return "".join(f" AND {filter}" for filter in self._filtere)
+
+    def oppdater(self, sjekk_slettede: bool = True) -> int:
+        """
+        Henter bare transaksjonene med høyere id enn siste_id, og legger dem til.
+        Endringer i transaksjoner som allerede er med blir ikke sett, bruk bygg_på_nytt() etter slike.
+        :param sjekk_slettede: tell radene i databasen opp til siste_id, og bygg på nytt hvis noen er slettet
+        :return: antall nye transaksjoner
+        """
+        np = _numpy()
+
+        if sjekk_slettede and len(self):
+            antall = self.database.execute(f"SELECT count(*) AS antall FROM transaksjoner WHERE id <= ?{self._filter_tekst()}",
+                                           (self.siste_id, *self._filter_verdier), fetchone=True).get("antall")
+            if antall != len(self):
+                return self.bygg_på_nytt()
+
+        type_koder = " ".join(f"WHEN '{navn}' THEN {kode}" for kode, navn in enumerate(TYPER))
+        rader = self.database.execute(f"""
+            SELECT id, CAST(round(pris * 100) AS INTEGER), CAST(julianday(substr(dato, 1, 10)) - 2440587.5 AS INTEGER),
+                CASE lower(type) {type_koder} ELSE -1 END
+            FROM transaksjoner WHERE id > ?{self._filter_tekst()} ORDER BY id""",
+            (self.siste_id, *self._filter_verdier), fetchall=True, radformat="tuppel")
+
+        self.kategorier = self._navn("kategorier")
+        self.personer = self._navn("personer")
+        if not rader:
+            return 0
+
+        kolonner = np.array(rader, dtype=np.int64)
+        nye_id = kolonner[:, 0]
+        forrige_antall = len(self)
+
+        # tags bare opp til den største id-en vi fikk, så en transaksjon som kommer til underveis ikke får tags uten å være med
+        for tag_tabel, kolonne, rad_felt, kode_felt in (("kategori_tag", "kategori_id", "kategori_rad", "kategori_kode"),
+                                                          ("person_tag", "person_id", "person_rad", "person_kode")):
+            tags = self.database.execute(
+                f"SELECT transaksjon_id, {kolonne} FROM {tag_tabel} WHERE transaksjon_id > ? AND transaksjon_id <= ?",
+                (self.siste_id, int(nye_id[-1])), fetchall=True, radformat="tuppel")
+            if not tags:
+                continue
+
+            tags = np.array(tags, dtype=np.int64)
+            posisjon = np.searchsorted(nye_id, tags[:, 0])
+            med = nye_id[np.minimum(posisjon, len(nye_id) - 1)] == tags[:, 0]   # transaksjoner som er filtrert bort har ingen rad
+
+            setattr(self, rad_felt, np.concatenate([getattr(self, rad_felt), posisjon[med] + forrige_antall]))
+            setattr(self, kode_felt, np.concatenate([getattr(self, kode_felt), tags[med, 1].astype(np.int32)]))
+
+        self.id = np.concatenate([self.id, nye_id])
+        self.øre = np.concatenate([self.øre, kolonner[:, 1]])
+        self.dag = np.concatenate([self.dag, kolonner[:, 2].astype(np.int32)])
+        self.type_kode = np.concatenate([self.type_kode, kolonner[:, 3].astype(np.int8)])
+        self.siste_id = int(nye_id[-1])
+
+        return len(nye_id)
+
+    def bygg_på_nytt(self) -> int:
+        """:return: antall transaksjoner"""
+        self._tøm()
+        return self.oppdater()
+
+    def _navn(self, tabelnavn: str) -> list:
+        """[navn], der indeksen er id-en. Hull etter slettede rader er None"""
+        rader = self.database.execute(f"SELECT id, navn FROM {tabelnavn}", fetchall=True, radformat="tuppel")
+        navn = [None] * (max((ide for ide, _ in rader), default=0) + 1)
+        for ide, verdi in rader:
+            navn[ide] = verdi
+        return navn
+
+    def filtrer(self, start_dato: str = None, slutt_dato: str = None, handling: str = None, min_øre: int = None,
+                maks_øre: int = None, kategori: str = None, person: str = None, maske=None):
+        """
+        :param maske: bygg videre på en maske fra et tidligere kall
+        :return: numpy bool-array med én verdi per rad, True for radene som passer med alle filtrene
+        """
+        np = _numpy()
+        maske = np.ones(len(self), dtype=bool) if maske is None else maske.copy()
+
+        if start_dato is not None:
+            maske &= self.dag >= _epoke_dag(start_dato)
+        if slutt_dato is not None:
+            maske &= self.dag <= _epoke_dag(slutt_dato)
+        if handling is not None:
+            maske &= self.type_kode == (TYPER.index(handling.lower()) if handling.lower() in TYPER else -1)
+        if min_øre is not None:
+            maske &= self.øre >= min_øre
+        if maks_øre is not None:
+            maske &= self.øre <= maks_øre
+
+        for navn, navneliste, rad, kode in ((kategori, self.kategorier, self.kategori_rad, self.kategori_kode),
+                                            (person, self.personer, self.person_rad, self.person_kode)):
+            if navn is not None:
+                har = np.zeros(len(self), dtype=bool)
+                if navn in navneliste:
+                    har[rad[kode == navneliste.index(navn)]] = True
+                maske &= har
+
+        return maske
+
+    def _koder(self, gruppe: str, rader, tag_koder) -> tuple:
+        """:return: (kode per rad i rader, navn per kode)"""
+        np = _numpy()
+
+        if gruppe == "type":
+            koder = self.type_kode[rader].astype(np.int64)
+            return np.where(koder < 0, len(TYPER), koder), list(TYPER) + [None]
+
+        if gruppe in TID:
+            tider, koder = np.unique(self.dag[rader].astype("datetime64[D]").astype(TID[gruppe]), return_inverse=True)
+            return koder, [str(tid) for tid in np.datetime_as_string(tider)]
+
+        return tag_koder.astype(np.int64), self.kategorier if gruppe == "kategori" else self.personer
+
+    def summer_per(self, grupper: list[str], maske=None) -> list[dict]:
+        """
+        Som Rapporter.oppsummer, men regnet ut med numpy fra øyeblikksbildet
+        :param grupper: noen av "dag", "måned", "år", "type", "kategori" og "person". Ikke både "kategori" og "person"
+        :param maske: fra filtrer, ta bare med disse radene
+        :return: [{<hver gruppe>, antall, sum_øre}], sortert på gruppene
+        """
+        np = _numpy()
+        if isinstance(grupper, str):
+            grupper = [grupper]
+
+        for gruppe in grupper:
+            if gruppe not in ("type", "kategori", "person", *TID):
+                raise ValueError(f"Kan ikke gruppere på {gruppe}")
+
+        tags = [gruppe for gruppe in grupper if gruppe in ("kategori", "person")]
+        if len(tags) > 1:
+            raise ValueError("Kan ikke gruppere på både kategori og person")
+
+        # en rad per transaksjon, eller en rad per tag når det grupperes på kategori eller person
+        tag_koder = None
+        if tags:
+            rader, tag_koder = (self.kategori_rad, self.kategori_kode) if tags[0] == "kategori" else (self.person_rad, self.person_kode)
+        else:
+            rader = np.arange(len(self))
+
+        if maske is not None:
+            med = maske[rader]
+            rader = rader[med]
+            tag_koder = tag_koder[med] if tag_koder is not None else None
+
+        if not grupper:
+            return [{"antall": len(rader), "sum_øre": int(self.øre[rader].sum())}] if len(rader) else []
+
+        koder, navn = zip(*(self._koder(gruppe, rader, tag_koder) for gruppe in grupper))
+        størrelser = [len(navneliste) for navneliste in navn]
+        flat = np.ravel_multi_index(koder, størrelser) if len(rader) else np.empty(0, np.int64)
+
+        antall = np.bincount(flat, minlength=int(np.prod(størrelser)))
+        # vektene blir float64, som er eksakt for heltall opp til 2**53 øre
+        summer = np.rint(np.bincount(flat, weights=self.øre[rader], minlength=len(antall))).astype(np.int64)
+
+        resultat = []
+        for indeks in np.flatnonzero(antall):
+            gruppe_koder = np.unravel_index(indeks, størrelser)
+            rad = {gruppe: navn[i][int(gruppe_koder[i])] for i, gruppe in enumerate(grupper)}
+            rad["antall"] = int(antall[indeks])
+            rad["sum_øre"] = int(summer[indeks])
+            resultat.append(rad)
+
+        return resultat
+
+    def saldo(self, maske=None, fortegn: dict = None) -> tuple:
+        """
+        Løpende saldo, sortert på dato og id
+        :param maske: fra filtrer, ta bare med disse radene
+        :param fortegn: {type: 1 eller -1}, standard er FORTEGN (innskudd og tilbakebetaling inn, uttak og utlegg ut)
+        :return: (datoer som numpy datetime64[D], saldo i øre ved slutten av hver dato)
+        """
+        np = _numpy()
+        fortegn = fortegn or FORTEGN
+        rader = np.arange(len(self)) if maske is None else np.flatnonzero(maske)
+
+        # siste plass er 0 for ukjente typer, som har type_kode -1
+        tegn = np.array([fortegn.get(navn, 0) for navn in TYPER] + [0], dtype=np.int64)
+        beløp = self.øre[rader] * tegn[self.type_kode[rader]]
+
+        rekkefølge = np.lexsort((self.id[rader], self.dag[rader]))
+        dager = self.dag[rader][rekkefølge]
+        løpende = np.cumsum(beløp[rekkefølge])
+        if not len(dager):
+            return dager.astype("datetime64[D]"), løpende
+
+        siste_i_dagen = np.flatnonzero(np.diff(dager, append=dager[-1] + 1))
+        return dager[siste_i_dagen].astype("datetime64[D]"), løpende[siste_i_dagen]
@@ -0,0 +1,227 @@
+"""
+Asyncio-fasade over Database, Transaksjoner, Personer og Kategorier.
+Alt sqlite-arbeid kjøres i egne tråder, så event-loopen aldri blokkeres:
+lesinger går i en pool med flere tråder som kan lese samtidig (WAL), og skrivinger går i én egen tråd, så de aldri venter på hverandre
+om skrivelåsen. Svarene er de samme _formater_svar-dictene som fra de vanlige klassene.
+
+    db = AsyncDatabase("økonomi.db")
+    transaksjoner = AsyncTransaksjoner(db)
+    svar = await transaksjoner.hent_transaksjoner_på_type("uttak", tidsavbrudd=2)
+    await db.close()
+
+iterer_-metodene gir innholdet som en AsyncRader, som leser radene i biter i lese-poolen:
+
+    svar = await transaksjoner.iterer_transaksjoner_mellom_datoer("2015-01-01", "2024-12-31")
+    async with svar["innhold"] as rader:
+        async for transaksjon in rader:
+            ...
+"""
+import asyncio
+import collections
+import functools
+import itertools
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from database import Database
+from kategorier import Kategorier
+from personer import Personer
+from transaksjoner import Transaksjoner
+
+# metoder som starter med disse bare leser, og kan kjøres i lese-poolen. Alt annet regnes som skriving
+LESE_PREFIKS = ("hent", "finn", "søk", "eksporter", "iterer", "øyeblikksbilde")
+
+
+class _AvbrytbarDatabase(Database):
+    """Database der en spørring som kjører kan avbrytes fra en annen tråd, med en progress handler på hver tilkobling"""
+    def __init__(self, *args, **kwargs):
+        self._avbryt = threading.local()    # Event for jobben tråden kjører nå
+        super().__init__(*args, **kwargs)
+
+    def _koble_til(self):
+        conn = super()._koble_til()
+        conn.set_progress_handler(self._er_avbrutt, 1000)  # sjekkes hver 1000. instruksjon, ikke-null avbryter spørringen
+        return conn
+
+    def _er_avbrutt(self) -> int:
+        hendelse = getattr(self._avbryt, "hendelse", None)
+        return hendelse is not None and hendelse.is_set()
+
+
+class AsyncDatabase:
+    def __init__(self, database, lesere: int = 4, pragmas: dict = None, migrer: bool = True, tidsavbrudd: float = None,
+                 radformat: str = "dict"):
+        """
+        :param database: filsti til sqlite-databasen
+        :param lesere: hvor mange lesinger som kan kjøre samtidig
+        :param pragmas: som i Database
+        :param migrer: som i Database. Kjøres med en gang, før konstruktøren returnerer
+        :param tidsavbrudd: standard tidsavbrudd i sekunder for alle kall, None er ingen grense
+        :param radformat: som i Database
+        """
+        if database == ":memory:":
+            lesere = 1      # Database har bare én tilkobling til :memory:
+
+        # en tilkobling til hver lesetråd og én til skrivetråden, så ingen tråd venter på poolen
+        self.database = _AvbrytbarDatabase(database, størrelse=lesere + 1, pragmas=pragmas, migrer=migrer,
+                                            radformat=radformat)
+        self.tidsavbrudd = tidsavbrudd
+
+        self._lesere = ThreadPoolExecutor(max_workers=lesere, thread_name_prefix="sqlite-leser")
+        self._skriver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-skriver")
+
+    def _kjør_i_tråd(self, avbryt: threading.Event, funksjon, args, kwargs):
+        if avbryt.is_set():
+            raise asyncio.CancelledError()
+
+        self.database._avbryt.hendelse = avbryt
+        try:
+            return funksjon(*args, **kwargs)
+        finally:
+            self.database._avbryt.hendelse = None
+
+    async def kjør(self, funksjon, *args, skriv: bool = True, tidsavbrudd: float = None, **kwargs):
+        """
+        Kjører funksjon(*args, **kwargs) i lese-poolen eller skrivetråden og venter på svaret uten å blokkere event-loopen.
+        Blir kallet kansellert eller går over tidsavbruddet, avbrytes spørringen som kjører (og transaksjonen rulles tilbake),
+        og en jobb som ikke har startet blir aldri kjørt.
+        :param skriv: kjør i skrivetråden. Sett til False bare hvis funksjon ikke skriver noe
+        :param tidsavbrudd: sekunder før asyncio.TimeoutError, overstyrer standarden fra konstruktøren
+        """
+        avbryt = threading.Event()
+        jobb = functools.partial(self._kjør_i_tråd, avbryt, funksjon, args, kwargs)
+        fremtid = asyncio.get_running_loop().run_in_executor(self._skriver if skriv else self._lesere, jobb)
+
+        try:
+            return await asyncio.wait_for(fremtid, tidsavbrudd if tidsavbrudd is not None else self.tidsavbrudd)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            avbryt.set()
+            raise
+
+    async def execute(self, query, params=(), fetchone=False, fetchall=False, commit=False, radformat: str = "dict",
+                      tidsavbrudd: float = None):
+        """Som Database.execute. Med commit=True kjøres den i skrivetråden"""
+        return await self.kjør(self.database.execute, query, params, fetchone, fetchall, commit, radformat, skriv=commit,
+                               tidsavbrudd=tidsavbrudd)
+
+    async def transaksjon(self, funksjon, *args, tidsavbrudd: float = None, **kwargs):
+        """Kjører funksjon(*args, **kwargs) inne i én Database.transaksjon i skrivetråden, og gir tilbake det den returnerer"""
+        def i_transaksjon():
+            with self.database.transaksjon():
+                return funksjon(*args, **kwargs)
+
+        return await self.kjør(i_transaksjon, tidsavbrudd=tidsavbrudd)
+
+    async def close(self):
+        """Venter til jobbene som er sendt inn er ferdige, og lukker trådene og tilkoblingene"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self._lesere.shutdown, wait=True))
+        await loop.run_in_executor(None, functools.partial(self._skriver.shutdown, wait=True))
+        self.database.close()
+
+
+class AsyncRader:
+    """
+    Async-iterator over generatoren fra en iterer_-metode. Radene hentes i biter på størrelse rader i lese-poolen,
+    så event-loopen aldri kjører sqlite selv. Generatoren holder en tilkobling fra poolen til den er tømt eller lukket,
+    så bruk async with, eller aclose() hvis den ikke leses til slutten
+    """
+    def __init__(self, asynk_database: "AsyncDatabase", rader: Iterator, størrelse: int = 1000, tidsavbrudd: float = None):
+        """:param tidsavbrudd: for hver bit, ikke for hele lesingen"""
+        self.asynk_database = asynk_database
+        self.størrelse = størrelse
+        self.tidsavbrudd = tidsavbrudd
+        self._rader = rader
+        self._buffer = collections.deque()
+        self._tom = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._buffer:
+            if self._tom:
+                raise StopAsyncIteration
+
+            bit = await self.asynk_database.kjør(lambda: list(itertools.islice(self._rader, self.størrelse)), skriv=False,
+                                                 tidsavbrudd=self.tidsavbrudd)
+            if len(bit) < self.størrelse:
+                self._tom = True    # generatoren er ferdig, og har levert tilkoblingen tilbake
+            if not bit:
+                raise StopAsyncIteration
+            self._buffer.extend(bit)
+
+        return self._buffer.popleft()
+
+    async def aclose(self) -> None:
+        self._buffer.clear()
+        if not self._tom:
+            self._tom = True
+            await self.asynk_database.kjør(self._rader.close, skriv=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *feil):
+        await self.aclose()
+
+
+class _AsyncFasade:
+    """
+    Gir async-versjoner av alle offentlige metoder på en vanlig domeneklasse.
+    Metoder som starter med LESE_PREFIKS kjøres i lese-poolen, resten i skrivetråden.
+    iterer_-metodene gir innholdet som AsyncRader i stedet for en generator.
+    Alle metodene tar i tillegg tidsavbrudd=sekunder.
+    """
+    def __init__(self, asynk_database: AsyncDatabase, synkron):
+        self.asynk_database = asynk_database
+        self.synkron = synkron
+
+    def __getattr__(self, navn):
+        if navn.startswith("_"):
+            raise AttributeError(navn)
+
+        metode = getattr(self.synkron, navn)
+        if not callable(metode):
+            return metode
+
+        skriv = not navn.startswith(LESE_PREFIKS)
+
+        if navn.startswith("iterer"):
+            @functools.wraps(metode)
+            async def asynk_iterer(*args, tidsavbrudd: float = None, **kwargs):
+                svar = await self.asynk_database.kjør(metode, *args, skriv=False, tidsavbrudd=tidsavbrudd, **kwargs)
+                if isinstance(svar.get("innhold"), Iterator):    # aldri en synkron generator ut på event-loopen
+                    svar["innhold"] = AsyncRader(self.asynk_database, svar["innhold"], kwargs.get("størrelse", 1000), tidsavbrudd)
+                return svar
+
+            return asynk_iterer
+
+        @functools.wraps(metode)
+        async def asynk_metode(*args, tidsavbrudd: float = None, **kwargs):
+            return await self.asynk_database.kjør(metode, *args, skriv=skriv, tidsavbrudd=tidsavbrudd, **kwargs)
+
+        return asynk_metode
+
+
+class AsyncPersoner(_AsyncFasade):
+    def __init__(self, asynk_database: AsyncDatabase, **kwargs):
+        """:param kwargs: sendes videre til Personer, f.eks. cache_størrelse og varm_opp"""
+        super().__init__(asynk_database, Personer(asynk_database.database, **kwargs))
+
+
+class AsyncKategorier(_AsyncFasade):
+    def __init__(self, asynk_database: AsyncDatabase, **kwargs):
+        """:param kwargs: sendes videre til Kategorier, f.eks. cache_størrelse og varm_opp"""
+        super().__init__(asynk_database, Kategorier(asynk_database.database, **kwargs))
+
+
+class AsyncTransaksjoner(_AsyncFasade):
+    def __init__(self, asynk_database: AsyncDatabase, personer: AsyncPersoner = None, kategorier: AsyncKategorier = None):
+        """Uten personer og kategorier lages nye, men da deler de ikke navne-cache med andre AsyncPersoner/AsyncKategorier"""
+        personer = personer or AsyncPersoner(asynk_database)
+        kategorier = kategorier or AsyncKategorier(asynk_database)
+        self.personer = personer
+        self.kategorier = kategorier
+        super().__init__(asynk_database, Transaksjoner(asynk_database.database, personer.synkron, kategorier.synkron))
@@ -0,0 +1,126 @@
+"""
+Lager databaser og csv-filer med syntetiske, men realistiske transaksjoner. Samme frø gir alltid de samme dataene.
+Kategorier og personer brukes med en skjev (Zipf-aktig) fordeling, som i ekte data der noen få kategorier er på de fleste transaksjonene.
+
+Bruk: python -m benchmark.generator <databasefil> <antall, f.eks. 10k, 1M eller 10M> [frø]
+"""
+import csv
+import datetime
+import itertools
+import json
+import math
+import random
+import sys
+import time
+
+from database import Database
+from fingeravtrykk import lag_fingeravtrykk
+
+KATEGORIER = ["mat", "bolig", "strøm", "transport", "reise", "restaurant", "klær", "helse", "forsikring", "abonnement",
+              "barn", "gaver", "hobby", "sport", "husdyr", "bil", "parkering", "bøker", "elektronikk", "møbler",
+              "hage", "frisør", "apotek", "lån", "sparing", "kino", "konsert", "spill", "kaffe", "take-away"]
+PERSONER = ["Ola", "Kari", "Per", "Lise", "Nils", "Anne", "Jonas", "Ingrid", "Emil", "Sofie", "Henrik", "Nora"]
+BUTIKKER = ["REMA 1000", "KIWI", "MENY", "Coop Extra", "Coop Obs", "Joker", "Bunnpris", "Vinmonopolet", "Narvesen", "7-Eleven",
+            "Vy", "Ruter", "SAS", "Norwegian", "Circle K", "Uno-X", "Apotek 1", "Vitusapotek", "Elkjøp", "Power",
+            "IKEA", "Jysk", "XXL", "Sport 1", "Clas Ohlson", "Jernia", "Cubus", "H&M", "Dressmann", "Netflix",
+            "Spotify", "Telenor", "Telia", "Fjordkraft", "Tibber", "Husleie", "Foodora", "Wolt", "Espresso House", "Kaffebrenneriet"]
+STEDER = ["Oslo", "Bergen", "Trondheim", "Stavanger", "Tromsø", "Drammen", "Kristiansand", "Fredrikstad", "Bodø", "Ålesund"]
+TYPER = ["uttak", "innskudd", "utlegg", "tilbakebetaling"]
+TYPE_VEKTER = [70, 10, 15, 5]
+
+
+def tolk_antall(tekst: str) -> int:
+    """"10k" -> 10000, "1M" -> 1000000, "250" -> 250"""
+    faktorer = {"k": 1_000, "m": 1_000_000}
+    tekst = str(tekst).strip().lower()
+    if tekst and tekst[-1] in faktorer:
+        return int(float(tekst[:-1]) * faktorer[tekst[-1]])
+    return int(tekst)
+
+
+def _zipf_vekter(antall: int) -> list[float]:
+    return [1 / rang for rang in range(1, antall + 1)]
+
+
+def lag_transaksjoner(antall: int, frø: int = 1, start_år: int = 2015, år: int = 10, start_nummer: int = 0):
+    """
+    Gir antall transaksjoner som dict {pris, type, dato, beskrivelse, kategorier, personer}, som importer_csv_fil leser.
+    Beskrivelsen har et referansenummer, så transaksjonene ikke blir like hverandre (og får forskjellige fingeravtrykk).
+    :param start_nummer: første referansenummer, for å lage nye transaksjoner som ikke finnes i en database fra før
+    """
+    tilfeldig = random.Random(frø)
+    kategori_vekter = _zipf_vekter(len(KATEGORIER))
+    person_vekter = _zipf_vekter(len(PERSONER))
+    butikk_vekter = _zipf_vekter(len(BUTIKKER))
+    start_dag = datetime.date(start_år, 1, 1).toordinal()
+
+    for nummer in range(start_nummer, start_nummer + antall):
+        antall_kategorier = tilfeldig.choices((0, 1, 2, 3), (10, 60, 25, 5))[0]
+        antall_personer = tilfeldig.choices((0, 1, 2), (30, 55, 15))[0]
+        dato = datetime.date.fromordinal(start_dag + tilfeldig.randrange(år * 365))
+
+        yield {
+            "pris": max(1, int(math.exp(tilfeldig.gauss(5.5, 1.3)))),  # lognormal, de fleste mellom 50 og 1000 kroner
+            "type": tilfeldig.choices(TYPER, TYPE_VEKTER)[0],
+            "dato": dato.isoformat(),
+            "beskrivelse": f"{tilfeldig.choices(BUTIKKER, butikk_vekter)[0]} {tilfeldig.choice(STEDER)} ref {nummer:08}",
+            "kategorier": sorted(set(tilfeldig.choices(KATEGORIER, kategori_vekter, k=antall_kategorier))),
+            "personer": sorted(set(tilfeldig.choices(PERSONER, person_vekter, k=antall_personer))),
+        }
+
+
+def lag_database(filnavn: str, antall: int, frø: int = 1, batch_størrelse: int = 50_000) -> Database:
+    """
+    Lager en ny database med antall transaksjoner. Skriver rett til tabellene med executemany i store transaksjoner,
+    siden det å gå gjennom Transaksjoner ville målt det samme som benchmarkene skal måle
+    """
+    database = Database(filnavn)
+    kategori_id = {navn: i for i, navn in enumerate(KATEGORIER, start=1)}
+    person_id = {navn: i for i, navn in enumerate(PERSONER, start=1)}
+
+    with database.transaksjon():
+        database.executemany("INSERT INTO kategorier (id, navn) VALUES (?, ?)", [(i, navn) for navn, i in kategori_id.items()])
+        database.executemany("INSERT INTO personer (id, navn) VALUES (?, ?)", [(i, navn) for navn, i in person_id.items()])
+
+    transaksjoner = enumerate(lag_transaksjoner(antall, frø), start=1)
+    while True:
+        bit = list(itertools.islice(transaksjoner, batch_størrelse))
+        if not bit:
+            break
+
+        with database.transaksjon():
+            database.executemany(
+                "INSERT INTO transaksjoner (id, pris, type, dato, beskrivelse, fingeravtrykk) VALUES (?, ?, ?, ?, ?, ?)",
+                [(ide, t["pris"], t["type"], t["dato"], t["beskrivelse"], lag_fingeravtrykk(t)) for ide, t in bit])
+            database.executemany("INSERT INTO kategori_tag (transaksjon_id, kategori_id) VALUES (?, ?)",
+                                 [(ide, kategori_id[navn]) for ide, t in bit for navn in t["kategorier"]])
+            database.executemany("INSERT INTO person_tag (transaksjon_id, person_id) VALUES (?, ?)",
+                                 [(ide, person_id[navn]) for ide, t in bit for navn in t["personer"]])
+
+    database.execute("ANALYZE")
+    return database
+
+
+def skriv_csv(filnavn: str, transaksjoner) -> int:
+    """Skriver transaksjonene fra lag_transaksjoner til en csv-fil som importer_csv_fil kan lese. Returnerer antall rader"""
+    antall = 0
+    with open(filnavn, "w", newline="") as csvfil:
+        skriver = csv.DictWriter(csvfil, fieldnames=["pris", "type", "dato", "beskrivelse", "kategorier", "personer"], delimiter=";")
+        skriver.writeheader()
+        for transaksjon in transaksjoner:
+            skriver.writerow({**transaksjon, "kategorier": json.dumps(transaksjon["kategorier"], ensure_ascii=False),
+                              "personer": json.dumps(transaksjon["personer"], ensure_ascii=False)})
+            antall += 1
+
+    return antall
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print("Bruk: python -m benchmark.generator <databasefil> <antall, f.eks. 10k, 1M eller 10M> [frø]")
+        sys.exit(1)
+
+    antall = tolk_antall(sys.argv[2])
+    start = time.perf_counter()
+    lag_database(sys.argv[1], antall, int(sys.argv[3]) if len(sys.argv) == 4 else 1).close()
+    print(f"Laget {antall} transaksjoner i {sys.argv[1]} på {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,246 @@
+"""
+Tar tiden på de offentlige metodene i Transaksjoner, Personer, Kategorier og Rapporter på en database fra benchmark.generator,
+og skriver gjennomstrømning, p50/p99 og største minnebruk per metode til json, så resultater fra forskjellige commits kan sammenlignes
+med benchmark.sammenlign.
+
+Bruk: python -m benchmark.kjør [--antall 10k] [--frø 1] [--gjentakelser 200] [--import-rader 10k] [--database mal.db]
+                               [--grupper oppslag,område,csv,duplikater,skriving] [--ut resultat.json]
+"""
+import argparse
+import calendar
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmark.generator import BUTIKKER, KATEGORIER, PERSONER, TYPER, lag_database, lag_transaksjoner, skriv_csv, tolk_antall
+from database import Database
+from kategorier import Kategorier
+from personer import Personer
+from rapporter import Rapporter
+from transaksjoner import Transaksjoner
+
+GRUPPER = ("oppslag", "område", "csv", "duplikater", "skriving")   # i den rekkefølgen de kjøres, skriving sist siden den endrer dataene
+
+
+class Kontekst:
+    def __init__(self, database: Database, mappe: str, antall: int, import_rader: int, frø: int):
+        self.database = database
+        self.personer = Personer(database)
+        self.kategorier = Kategorier(database)
+        self.transaksjoner = Transaksjoner(database, self.personer, self.kategorier)
+        self.rapporter = Rapporter(database)
+        self.mappe = mappe
+        self.antall = antall
+        self.import_rader = import_rader
+        self.tilfeldig = random.Random(frø)
+        self.neste_nummer = antall      # referansenumre over det generatoren brukte, så nye transaksjoner ikke er duplikater
+        self.import_fil = None
+
+    def tilfeldig_id(self) -> int:
+        return self.tilfeldig.randint(1, self.antall)
+
+    def tilfeldig_dato(self) -> str:
+        return (datetime.date(2015, 1, 1) + datetime.timedelta(days=self.tilfeldig.randrange(3650))).isoformat()
+
+    def tilfeldig_måned(self) -> tuple:
+        """(første, siste) dato i en tilfeldig måned"""
+        år, måned = self.tilfeldig.randint(2015, 2024), self.tilfeldig.randint(1, 12)
+        return f"{år}-{måned:02}-01", f"{år}-{måned:02}-{calendar.monthrange(år, måned)[1]:02}"
+
+    def nye_transaksjoner(self, antall: int) -> list[dict]:
+        transaksjoner = list(lag_transaksjoner(antall, self.tilfeldig.random(), start_nummer=self.neste_nummer))
+        self.neste_nummer += antall
+        return transaksjoner
+
+    def ny_import_fil(self) -> str:
+        self.import_fil = os.path.join(self.mappe, f"import_{self.neste_nummer}.csv")
+        skriv_csv(self.import_fil, self.nye_transaksjoner(self.import_rader))
+        return self.import_fil
+
+    def importert_fil(self) -> str:
+        """Den siste filen som er importert, så den kan importeres på nytt som bare duplikater"""
+        if self.import_fil is None:
+            self.transaksjoner.importer_csv_fil_bulk(self.ny_import_fil())
+        return self.import_fil
+
+
+# navn -> (gruppe, andel av gjentakelser, lag_kall). lag_kall(kontekst) gir en funksjon uten argumenter som gjør ett kall
+BENCHMARKER = {
+    "Transaksjoner.hent_på_id": ("oppslag", 1, lambda k: (lambda ide=k.tilfeldig_id(): k.transaksjoner.hent_på_id(ide))),
+    "Transaksjoner.hent_transaksjon_med_alt": ("oppslag", 1, lambda k: (
+        lambda ide=k.tilfeldig_id(): k.transaksjoner.hent_transaksjon_med_alt(ide))),
+    "Transaksjoner.hent_mange_med_alt (100)": ("oppslag", 1, lambda k: (
+        lambda ider=[k.tilfeldig_id() for _ in range(100)]: k.transaksjoner.hent_mange_med_alt(ider))),
+    "Personer.hent_på_navn": ("oppslag", 1, lambda k: (lambda navn=k.tilfeldig.choice(PERSONER): k.personer.hent_på_navn(navn))),
+    "Kategorier.hent_på_navn": ("oppslag", 1, lambda k: (lambda navn=k.tilfeldig.choice(KATEGORIER): k.kategorier.hent_på_navn(navn))),
+    "Kategorier.hent_på_id": ("oppslag", 1, lambda k: (lambda ide=k.tilfeldig.randint(1, len(KATEGORIER)): k.kategorier.hent_på_id(ide))),
+
+    "Transaksjoner.hent_transaksjoner_mellom_datoer (7 dager)": ("område", 1, lambda k: (
+        lambda start=k.tilfeldig_dato(): k.transaksjoner.hent_transaksjoner_mellom_datoer(
+            start, (datetime.date.fromisoformat(start) + datetime.timedelta(days=6)).isoformat()))),
+    "Transaksjoner.hent_transaksjoner_på_type (side på 100)": ("område", 1, lambda k: (
+        lambda handling=k.tilfeldig.choice(TYPER): k.transaksjoner.hent_transaksjoner_på_type(handling, grense=100))),
+    "Transaksjoner.hent_transaksjoner_på_pris (side på 100)": ("område", 1, lambda k: (
+        lambda beløp=k.tilfeldig.randint(1, 2000): k.transaksjoner.hent_transaksjoner_på_pris(beløp, ">", grense=100))),
+    "Transaksjoner.søk_på_beskrivelse": ("område", 1, lambda k: (
+        lambda tekst=k.tilfeldig.choice(BUTIKKER)[:4]: k.transaksjoner.søk_på_beskrivelse(tekst, grense=50))),
+    "Rapporter.per_kategori (ett år)": ("område", 0.2, lambda k: (
+        lambda år=k.tilfeldig.randint(2015, 2024): k.rapporter.per_kategori(f"{år}-01", f"{år}-12"))),
+
+    "Transaksjoner.eksporter_csv_strøm (én måned)": ("csv", 0.05, lambda k: (
+        lambda måned=k.tilfeldig_måned(), fil=os.path.join(k.mappe, "eksport.csv"): k.transaksjoner.eksporter_csv_strøm(fil, *måned))),
+    "Transaksjoner.importer_csv_fil_bulk (nye)": ("csv", 0.01, lambda k: (
+        lambda fil=k.ny_import_fil(): k.transaksjoner.importer_csv_fil_bulk(fil))),
+
+    # samme fil som forrige import, så alle radene er duplikater
+    "Transaksjoner.importer_csv_fil_bulk (duplikater)": ("duplikater", 0.01, lambda k: (
+        lambda fil=k.importert_fil(): k.transaksjoner.importer_csv_fil_bulk(fil))),
+
+    "Transaksjoner.skriv": ("skriving", 1, lambda k: (
+        lambda t=k.nye_transaksjoner(1)[0]: k.transaksjoner.skriv(t["pris"], t["type"], t["dato"], t["beskrivelse"]))),
+    "Transaksjoner.skriv_transaksjon_med_alt": ("skriving", 1, lambda k: (
+        lambda t=k.nye_transaksjoner(1)[0]: k.transaksjoner.skriv_transaksjon_med_alt(
+            t["pris"], t["type"], t["dato"], t["beskrivelse"], t["kategorier"], t["personer"]))),
+    "Transaksjoner.oppdater_transaksjon": ("skriving", 1, lambda k: (
+        lambda ide=k.tilfeldig_id(), t=k.nye_transaksjoner(1)[0]: k.transaksjoner.oppdater_transaksjon(
+            ide, t["pris"], t["type"], t["dato"], t["beskrivelse"]))),
+    "Transaksjoner.fjern_transaksjon": ("skriving", 1, lambda k: (
+        lambda ide=k.tilfeldig_id(): k.transaksjoner.fjern_transaksjon(ide))),
+}
+
+
+def _persentil(sorterte: list[float], andel: float) -> float:
+    return sorterte[min(len(sorterte) - 1, round(andel * (len(sorterte) - 1)))]
+
+
+def mål(kontekst: Kontekst, lag_kall, gjentakelser: int, minne_kall: int = 3) -> dict:
+    """
+    Kjører gjentakelser kall og tar tiden på hvert. Minnet måles i egne kall etterpå,
+    siden tracemalloc gjør hver allokering mye tregere og ville ødelagt tidene
+    """
+    kall = [lag_kall(kontekst) for _ in range(gjentakelser)]   # argumentene lages før tiden startes
+
+    tider = []
+    for funksjon in kall:
+        start = time.perf_counter()
+        svar = funksjon()
+        tider.append(time.perf_counter() - start)
+
+        if svar.get("status") >= 400:   # ellers måles feilhåndteringen i stedet for metoden
+            raise RuntimeError(f"Kallet feilet med {svar.get('status')}: {svar.get('melding')}")
+
+    tracemalloc.start()
+    topp = 0
+    for _ in range(min(minne_kall, gjentakelser)):
+        funksjon = lag_kall(kontekst)
+        tracemalloc.reset_peak()
+        funksjon()
+        topp = max(topp, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    sorterte = sorted(tider)
+    return {
+        "kall": len(tider),
+        "total_s": sum(tider),
+        "per_sekund": len(tider) / sum(tider) if sum(tider) else None,
+        "p50_ms": _persentil(sorterte, 0.50) * 1000,
+        "p99_ms": _persentil(sorterte, 0.99) * 1000,
+        "maks_ms": sorterte[-1] * 1000,
+        "topp_minne_mb": topp / 1024 / 1024,
+    }
+
+
+def _git_commit() -> str or None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def kjør(antall: int, frø: int = 1, gjentakelser: int = 200, import_rader: int = 10_000, mal: str = None,
+         grupper: tuple = GRUPPER, skriv_ut=print) -> dict:
+    """
+    :param mal: database fra benchmark.generator som kopieres i stedet for å lage en ny. antall blir da største id i den
+    :return: {"meta": {...}, "resultater": {navn: {gruppe, kall, total_s, per_sekund, p50_ms, p99_ms, maks_ms, topp_minne_mb}}}
+    """
+    resultater = {}
+    with tempfile.TemporaryDirectory() as mappe:
+        filnavn = os.path.join(mappe, "benchmark.db")
+
+        start = time.perf_counter()
+        if mal:
+            with sqlite3.connect(mal) as kilde, sqlite3.connect(filnavn) as mål_db:
+                kilde.backup(mål_db)
+            database = Database(filnavn)
+            antall = database.execute("SELECT max(id) AS antall FROM transaksjoner", fetchone=True).get("antall") or 0
+        else:
+            database = lag_database(filnavn, antall, frø)
+        skriv_ut(f"database med {antall} transaksjoner klar på {time.perf_counter() - start:.1f} s")
+
+        kontekst = Kontekst(database, mappe, antall, import_rader, frø)
+        for gruppe in GRUPPER:
+            if gruppe not in grupper:
+                continue
+
+            for navn, (benchmark_gruppe, andel, lag_kall) in BENCHMARKER.items():
+                if benchmark_gruppe != gruppe:
+                    continue
+
+                resultat = mål(kontekst, lag_kall, max(1, int(gjentakelser * andel)))
+                resultater[navn] = {"gruppe": gruppe, **resultat}
+                skriv_ut(f"{navn:<60} {resultat['per_sekund'] or 0:>10.1f}/s  p50 {resultat['p50_ms']:>9.3f} ms  "
+                         f"p99 {resultat['p99_ms']:>9.3f} ms  {resultat['topp_minne_mb']:>7.2f} MB")
+
+        database.close()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "tidspunkt": datetime.datetime.now().isoformat(timespec="seconds"),
+            "antall": antall,
+            "frø": frø,
+            "gjentakelser": gjentakelser,
+            "import_rader": import_rader,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plattform": platform.platform(),
+            "prosessorer": os.cpu_count(),
+        },
+        "resultater": resultater,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmark.kjør")
+    parser.add_argument("--antall", default="10k", help="antall transaksjoner, f.eks. 10k, 1M eller 10M")
+    parser.add_argument("--frø", type=int, default=1)
+    parser.add_argument("--gjentakelser", type=int, default=200, help="kall per metode (færre for csv og rapporter)")
+    parser.add_argument("--import-rader", default="10k", help="rader i hver csv-fil som importeres")
+    parser.add_argument("--database", help="kopier denne databasen fra benchmark.generator i stedet for å lage en ny")
+    parser.add_argument("--grupper", default=",".join(GRUPPER), help=f"kommaseparert, noen av {','.join(GRUPPER)}")
+    parser.add_argument("--ut", help="skriv resultatet som json hit, ellers til stdout")
+    argumenter = parser.parse_args()
+
+    grupper = tuple(argumenter.grupper.split(","))
+    for gruppe in grupper:
+        if gruppe not in GRUPPER:
+            parser.error(f"ukjent gruppe {gruppe}")
+
+    resultat = kjør(tolk_antall(argumenter.antall), argumenter.frø, argumenter.gjentakelser, tolk_antall(argumenter.import_rader),
+                    argumenter.database, grupper, skriv_ut=lambda tekst: print(tekst, file=sys.stderr))
+
+    tekst = json.dumps(resultat, ensure_ascii=False, indent=2)
+    if argumenter.ut:
+        with open(argumenter.ut, "w", encoding="utf-8") as fil:
+            fil.write(tekst)
+    else:
+        print(tekst)
@@ -0,0 +1,216 @@
+"""
+Lasttest av server.py: mange klienter som sender en blanding av forespørsler over keep-alive-tilkoblinger samtidig,
+og måler forespørsler per sekund og p50/p99/p99.9 per endepunkt.
+Uten --url lages en database med benchmark.generator, og serveren startes i en egen prosess, så klientene ikke deler GIL med den.
+
+Bruk: python -m benchmark.last [--url http://127.0.0.1:8000] [--antall 10k] [--klienter 16] [--sekunder 10]
+                               [--skriveandel 0.05] [--skrivekø] [--ut resultat.json]
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote, urlencode, urlsplit
+
+from benchmark.generator import KATEGORIER, lag_database, lag_transaksjoner, tolk_antall
+from benchmark.kjør import _git_commit, _persentil
+
+MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _lesing(tilfeldig: random.Random, antall: int) -> tuple:
+    """(navn, http-metode, sti, kropp) for en tilfeldig leseforespørsel, med omtrent samme blanding som en nettside"""
+    dag = datetime.date(2015, 1, 1) + datetime.timedelta(days=tilfeldig.randrange(3650))
+    valg = tilfeldig.random()
+
+    if valg < 0.4:
+        return "hent_på_id", "GET", f"/transaksjoner/hent_på_id?iden={tilfeldig.randint(1, antall)}", None
+    if valg < 0.6:
+        argumenter = {"start_dato": dag.isoformat(), "slutt_dato": (dag + datetime.timedelta(days=30)).isoformat(), "grense": 50}
+        return "mellom_datoer", "GET", f"/transaksjoner/hent_transaksjoner_mellom_datoer?{urlencode(argumenter)}", None
+    if valg < 0.8:
+        kropp = {"datoer": [dag.isoformat(), None], "har_kategorier": [[tilfeldig.choice(KATEGORIER[:5])]],
+                 "pris_mellom": [100, 1000], "grense": 20}
+        return "spørring", "POST", "/transaksjoner/spørring", kropp
+    if valg < 0.9:
+        argumenter = {"tekst": tilfeldig.choice(["rema", "kiwi oslo", "vy", "ikea"]), "grense": 20}
+        return "søk", "GET", f"/transaksjoner/søk_på_beskrivelse?{urlencode(argumenter)}", None
+
+    return "per_måned", "GET", f"/rapporter/per_måned?{urlencode({'fra_måned': f'{dag.year}-01', 'til_måned': f'{dag.year}-12'})}", None
+
+
+class _Klient(threading.Thread):
+    def __init__(self, vert: str, port: int, slutt: float, antall: int, skriveandel: float, frø: int, start_nummer: int):
+        super().__init__(daemon=True)
+        self.vert = vert
+        self.port = port
+        self.slutt = slutt
+        self.antall = antall
+        self.skriveandel = skriveandel
+        self.tilfeldig = random.Random(frø)
+        self.nye = lag_transaksjoner(10_000_000, frø, start_nummer=start_nummer)   # unike, så skrivingene ikke blir duplikater
+        self.tider = {}
+        self.feil = {}
+
+    def _forespørsel(self) -> tuple:
+        if self.tilfeldig.random() < self.skriveandel:
+            transaksjon = next(self.nye)
+            kropp = {"beløp": transaksjon["pris"], "handling": transaksjon["type"], "dato": transaksjon["dato"],
+                     "beskrivelse": transaksjon["beskrivelse"], "kategorier": transaksjon["kategorier"], "personer": transaksjon["personer"]}
+            return "skriv_transaksjon_med_alt", "POST", "/transaksjoner/skriv_transaksjon_med_alt", kropp
+
+        return _lesing(self.tilfeldig, self.antall)
+
+    def run(self):
+        tilkobling = http.client.HTTPConnection(self.vert, self.port, timeout=30)   # én tilkobling for alle forespørslene
+        while time.perf_counter() < self.slutt:
+            navn, metode, sti, kropp = self._forespørsel()
+            data = json.dumps(kropp).encode("utf-8") if kropp is not None else None
+            hoder = {"Content-Type": "application/json"} if data else {}
+
+            start = time.perf_counter()
+            try:
+                tilkobling.request(metode, quote(sti, safe="/?=&%"), body=data, headers=hoder)
+                svar = tilkobling.getresponse()
+                svar.read()
+                status = svar.status
+            except (OSError, http.client.HTTPException):
+                tilkobling.close()
+                tilkobling = http.client.HTTPConnection(self.vert, self.port, timeout=30)
+                status = None
+            tid = time.perf_counter() - start
+
+            self.tider.setdefault(navn, []).append(tid)
+            if status is None or status >= 400:
+                self.feil[navn] = self.feil.get(navn, 0) + 1
+
+        tilkobling.close()
+
+
+def _oppsummer(tider: list[float], sekunder: float, feil: int) -> dict:
+    sorterte = sorted(tider)
+    return {
+        "forespørsler": len(sorterte),
+        "feil": feil,
+        "per_sekund": len(sorterte) / sekunder,
+        "p50_ms": _persentil(sorterte, 0.50) * 1000,
+        "p99_ms": _persentil(sorterte, 0.99) * 1000,
+        "p999_ms": _persentil(sorterte, 0.999) * 1000,
+        "maks_ms": sorterte[-1] * 1000,
+    }
+
+
+def last(vert: str, port: int, antall: int, klienter: int = 16, sekunder: float = 10, skriveandel: float = 0.05, frø: int = 1) -> dict:
+    """
+    :param antall: største transaksjons-id i databasen, for tilfeldige oppslag
+    :return: {"totalt": {...}, "endepunkter": {navn: {forespørsler, feil, per_sekund, p50_ms, p99_ms, p999_ms, maks_ms}}}
+    """
+    slutt = time.perf_counter() + sekunder
+    tråder = [_Klient(vert, port, slutt, antall, skriveandel, frø + i, antall + (i + 1) * 10_000_000) for i in range(klienter)]
+    start = time.perf_counter()
+    for tråd in tråder:
+        tråd.start()
+    for tråd in tråder:
+        tråd.join()
+    varighet = time.perf_counter() - start
+
+    alle_tider = {}
+    alle_feil = {}
+    for tråd in tråder:
+        for navn, tider in tråd.tider.items():
+            alle_tider.setdefault(navn, []).extend(tider)
+        for navn, feil in tråd.feil.items():
+            alle_feil[navn] = alle_feil.get(navn, 0) + feil
+
+    return {
+        "totalt": _oppsummer([tid for tider in alle_tider.values() for tid in tider], varighet, sum(alle_feil.values())),
+        "endepunkter": {navn: _oppsummer(tider, varighet, alle_feil.get(navn, 0)) for navn, tider in sorted(alle_tider.items())},
+    }
+
+
+def _ledig_port() -> int:
+    with socket.socket() as sokkel:
+        sokkel.bind(("127.0.0.1", 0))
+        return sokkel.getsockname()[1]
+
+
+def _vent_på_server(vert: str, port: int, prosess: subprocess.Popen, tidsavbrudd: float = 30) -> None:
+    slutt = time.monotonic() + tidsavbrudd
+    while time.monotonic() < slutt:
+        if prosess.poll() is not None:
+            raise RuntimeError(f"Serveren stoppet med kode {prosess.returncode}")
+        try:
+            socket.create_connection((vert, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+
+    raise RuntimeError(f"Serveren svarte ikke på {vert}:{port} innen {tidsavbrudd} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmark.last")
+    parser.add_argument("--url", help="en server som allerede kjører. Ellers startes en lokal med en ny database")
+    parser.add_argument("--antall", default="10k", help="transaksjoner i den nye databasen, eller største id på serveren med --url")
+    parser.add_argument("--frø", type=int, default=1)
+    parser.add_argument("--klienter", type=int, default=16, help="samtidige klienter, hver med sin egen keep-alive-tilkobling")
+    parser.add_argument("--sekunder", type=float, default=10)
+    parser.add_argument("--skriveandel", type=float, default=0.05, help="andel av forespørslene som skriver en ny transaksjon")
+    parser.add_argument("--tilkoblinger", type=int, default=8, help="tilkoblinger i poolen til den lokale serveren")
+    parser.add_argument("--skrivekø", action="store_true", help="start den lokale serveren med skrivekø")
+    parser.add_argument("--ut", help="skriv resultatet som json hit, ellers til stdout")
+    argumenter = parser.parse_args()
+
+    antall = tolk_antall(argumenter.antall)
+    prosess = None
+    with tempfile.TemporaryDirectory() as mappe:
+        if argumenter.url:
+            adresse = urlsplit(argumenter.url)
+            vert, port = adresse.hostname, adresse.port or 80
+        else:
+            filnavn = os.path.join(mappe, "last.db")
+            lag_database(filnavn, antall, argumenter.frø).close()
+            vert, port = "127.0.0.1", _ledig_port()
+            kommando = [sys.executable, "-m", "server", filnavn, "--port", str(port), "--tilkoblinger", str(argumenter.tilkoblinger)]
+            if argumenter.skrivekø:
+                kommando.append("--skrivekø")
+            prosess = subprocess.Popen(kommando, cwd=MAPPE, stderr=subprocess.DEVNULL)
+
+        try:
+            if prosess is not None:
+                _vent_på_server(vert, port, prosess)
+            resultat = last(vert, port, antall, argumenter.klienter, argumenter.sekunder, argumenter.skriveandel, argumenter.frø)
+        finally:
+            if prosess is not None:
+                prosess.terminate()
+                prosess.wait()
+
+    resultat["meta"] = {
+        "commit": _git_commit(),
+        "tidspunkt": datetime.datetime.now().isoformat(timespec="seconds"),
+        "url": argumenter.url,
+        "antall": antall,
+        "klienter": argumenter.klienter,
+        "sekunder": argumenter.sekunder,
+        "skriveandel": argumenter.skriveandel,
+        "skrivekø": argumenter.skrivekø,
+        "prosessorer": os.cpu_count(),
+    }
+
+    for navn, tall in [("totalt", resultat["totalt"]), *resultat["endepunkter"].items()]:
+        print(f"{navn:<28} {tall['per_sekund']:>9.1f}/s  p50 {tall['p50_ms']:>8.2f} ms  p99 {tall['p99_ms']:>8.2f} ms  "
+              f"p99.9 {tall['p999_ms']:>8.2f} ms  feil {tall['feil']}", file=sys.stderr)
+
+    if argumenter.ut:
+        with open(argumenter.ut, "w", encoding="utf-8") as fil:
+            json.dump(resultat, fil, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(resultat, ensure_ascii=False, indent=2))
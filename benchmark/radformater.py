@@ -0,0 +1,67 @@
+"""
+Sammenligner minne og tid for radformatene i rader.py på hent_transaksjoner_mellom_datoer over hele transaksjoner-tabellen.
+For hvert format måles tiden for å hente radene, tiden for å lese pris fra hver rad, og med tracemalloc
+største minnebruk underveis og hvor mye resultatet tar når det er ferdig.
+
+Bruk: python -m benchmark.radformater [antall transaksjoner]
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmark.spørringsplaner import fyll_med_data
+from database import Database
+from kategorier import Kategorier
+from personer import Personer
+from rader import RADFORMATER
+from transaksjoner import Transaksjoner
+
+
+def hent(transaksjoner: Transaksjoner, radformat: str) -> list:
+    return transaksjoner.hent_transaksjoner_mellom_datoer("2000-01-01", "2100-01-01", radformat=radformat).get("innhold")
+
+
+def mål(transaksjoner: Transaksjoner, radformat: str) -> dict:
+    """Tiden måles uten tracemalloc, siden den gjør hver allokering mye tregere"""
+    gc.collect()
+    start = time.perf_counter()
+    rader = hent(transaksjoner, radformat)
+    hent_tid = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if radformat == "tuppel":
+        pris = rader.kolonner.index("pris")
+        total = sum(rad[pris] for rad in rader)
+    else:
+        total = sum(rad["pris"] for rad in rader)
+    les_tid = time.perf_counter() - start
+    del rader
+
+    gc.collect()
+    tracemalloc.start()
+    rader = hent(transaksjoner, radformat)
+    nå, topp = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"rader": len(rader), "hent_ms": hent_tid * 1000, "les_ms": les_tid * 1000, "topp_mb": topp / 1024 / 1024,
+            "beholdt_mb": nå / 1024 / 1024, "sum": total}
+
+
+if __name__ == "__main__":
+    antall = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    with tempfile.TemporaryDirectory() as mappe:
+        database = Database(os.path.join(mappe, "benchmark.db"))
+        fyll_med_data(database, antall)
+        transaksjoner = Transaksjoner(database, Personer(database), Kategorier(database))
+
+        mål(transaksjoner, "dict")  # varm opp side-cachen
+        print(f"{'radformat':<10}{'rader':>10}{'hent ms':>10}{'les ms':>10}{'topp MB':>10}{'beholdt MB':>12}")
+        for radformat in RADFORMATER:
+            resultat = mål(transaksjoner, radformat)
+            print(f"{radformat:<10}{resultat['rader']:>10}{resultat['hent_ms']:>10.1f}{resultat['les_ms']:>10.1f}{resultat['topp_mb']:>10.1f}{resultat['beholdt_mb']:>12.1f}")
+
+        database.close()
@@ -0,0 +1,51 @@
+"""
+Sammenligner to resultatfiler fra benchmark.kjør, f.eks. fra to commits, og viser endringen i p50, p99 og gjennomstrømning per metode.
+Negative prosenter på tid er bedre, positive på gjennomstrømning er bedre.
+
+Bruk: python -m benchmark.sammenlign <før.json> <etter.json>
+"""
+import json
+import sys
+
+
+def _endring(før, etter) -> str:
+    if not før or etter is None:
+        return "-"
+    return f"{(etter - før) / før * 100:+.1f} %"
+
+
+def sammenlign(før: dict, etter: dict) -> list[dict]:
+    """:return: [{navn, p50_ms, p99_ms, per_sekund}] med endring i prosent, for metodene som er med i begge"""
+    rader = []
+    for navn, resultat in etter.get("resultater").items():
+        forrige = før.get("resultater").get(navn)
+        if forrige is None:
+            continue
+
+        rader.append({
+            "navn": navn,
+            "p50_ms": _endring(forrige.get("p50_ms"), resultat.get("p50_ms")),
+            "p99_ms": _endring(forrige.get("p99_ms"), resultat.get("p99_ms")),
+            "per_sekund": _endring(forrige.get("per_sekund"), resultat.get("per_sekund")),
+        })
+
+    return rader
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Bruk: python -m benchmark.sammenlign <før.json> <etter.json>")
+        sys.exit(1)
+
+    with open(sys.argv[1], encoding="utf-8") as fil:
+        før = json.load(fil)
+    with open(sys.argv[2], encoding="utf-8") as fil:
+        etter = json.load(fil)
+
+    for meta in (før, etter):
+        print(f"{meta['meta'].get('commit') or 'ukjent commit'}  {meta['meta'].get('antall')} transaksjoner  {meta['meta'].get('tidspunkt')}")
+    print()
+
+    print(f"{'metode':<60}{'p50':>10}{'p99':>10}{'per sekund':>12}")
+    for rad in sammenlign(før, etter):
+        print(f"{rad['navn']:<60}{rad['p50_ms']:>10}{rad['p99_ms']:>10}{rad['per_sekund']:>12}")
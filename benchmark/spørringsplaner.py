@@ -0,0 +1,76 @@
+"""
+Viser EXPLAIN QUERY PLAN og kjøretid for de vanligste spørringene i Transaksjoner,
+først på skjemaet uten indekser (versjon 1) og så etter alle migreringene.
+
+Bruk: python -m benchmark.spørringsplaner [antall transaksjoner]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from database import Database
+from migreringer import migrer, hent_versjon
+from privat import _TRANSAKSJON_KOLONNER
+
+SPØRRINGER = {
+    "hent_transaksjoner_mellom_datoer": (f"SELECT {_TRANSAKSJON_KOLONNER} FROM transaksjoner WHERE dato BETWEEN ? AND ?",
+                                         ("2023-03-01", "2023-03-07")),
+    "hent_transaksjoner_på_pris": (f"SELECT {_TRANSAKSJON_KOLONNER} FROM transaksjoner WHERE pris > ?", (9990,)),
+    "hent_transaksjoner_på_type": (f"SELECT {_TRANSAKSJON_KOLONNER} FROM transaksjoner WHERE type = ?", ("tilbakebetaling",)),
+    "hent_personer": ("SELECT p.* FROM person_tag pt JOIN personer p ON p.id = pt.person_id WHERE pt.transaksjon_id = ?", (1234,)),
+    "hent_kategorier": ("SELECT k.* FROM kategori_tag kt JOIN kategorier k ON k.id = kt.kategori_id WHERE kt.transaksjon_id = ?", (1234,)),
+    "Kategorier.hent_transaksjoner": ("SELECT transaksjon_id FROM kategori_tag WHERE kategori_id = ?", (3,)),
+    "fjern_transaksjon (tags)": ("SELECT 1 FROM kategori_tag WHERE transaksjon_id = ?", (1234,)),
+}
+
+
+def fyll_med_data(database: Database, antall: int) -> None:
+    tilfeldig = random.Random(1)
+    typer = ["innskudd", "uttak", "utlegg", "tilbakebetaling"]
+
+    with database.transaksjon():
+        database.executemany("INSERT INTO kategorier (navn) VALUES (?)", [(f"kategori {i}",) for i in range(20)])
+        database.executemany("INSERT INTO personer (navn) VALUES (?)", [(f"person {i}",) for i in range(10)])
+        database.executemany(
+            "INSERT INTO transaksjoner (pris, type, dato, beskrivelse, fingeravtrykk) VALUES (?, ?, ?, ?, ?)",
+            [(tilfeldig.randint(1, 10000), tilfeldig.choice(typer),
+              f"{tilfeldig.randint(2015, 2024)}-{tilfeldig.randint(1, 12):02}-{tilfeldig.randint(1, 28):02}",
+              f"butikk {tilfeldig.randint(1, 500)}", str(i)) for i in range(antall)])
+        database.executemany("INSERT INTO kategori_tag (transaksjon_id, kategori_id) VALUES (?, ?)",
+                             [(i, tilfeldig.randint(1, 20)) for i in range(1, antall + 1)])
+        database.executemany("INSERT INTO person_tag (transaksjon_id, person_id) VALUES (?, ?)",
+                             [(i, tilfeldig.randint(1, 10)) for i in range(1, antall + 1)])
+
+
+def vis_planer(database: Database, gjentakelser: int = 5) -> None:
+    print(f"--- skjemaversjon {hent_versjon(database)} ---")
+    for navn, (query, params) in SPØRRINGER.items():
+        plan = database.execute(f"EXPLAIN QUERY PLAN {query}", params, fetchall=True)
+
+        start = time.perf_counter()
+        for _ in range(gjentakelser):
+            database.execute(query, params, fetchall=True)
+        millisekunder = (time.perf_counter() - start) / gjentakelser * 1000
+
+        print(f"{navn}: {millisekunder:.2f} ms")
+        for steg in plan:
+            print(f"    {steg.get('detail')}")
+
+
+if __name__ == "__main__":
+    antall = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    with tempfile.TemporaryDirectory() as mappe:
+        database = Database(os.path.join(mappe, "benchmark.db"), migrer=False)
+        migrer(database, til_versjon=1)
+        fyll_med_data(database, antall)
+        database.execute("ANALYZE")
+
+        vis_planer(database)
+        migrer(database)
+        database.execute("ANALYZE")
+        vis_planer(database)
+
+        database.close()
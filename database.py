@@ -1,30 +1,468 @@
 import sqlite3
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from rader import RADFORMATER, lag_rader
+from skjema import Skjema
+
+STANDARD_PRAGMAS = {
+    "journal_mode": "WAL",      # lesere blokkerer ikke skrivere og omvendt
+    "synchronous": "NORMAL",    # trygt sammen med WAL, og mye færre fsync
+    "temp_store": "MEMORY",
+    "cache_size": -16000,       # ca 16 MB side-cache per tilkobling
+    "busy_timeout": 5000,       # vent i stedet for "database is locked"
+    "foreign_keys": "ON",       # sqlite har dem av som standard. Tag-radene fjernes av ON DELETE CASCADE
+}
 
 class Database:
-    def __init__(self, database):
+    def __init__(self, database, størrelse: int = 4, pragmas: dict = None, migrer: bool = True, skrivekø: bool = False,
+                 maks_batch: int = 100, maks_forsinkelse: float = 0.0, radformat: str = "dict", instrumentering=None,
+                 resultat_cache=None, vent_på_tilkobling: float = 30.0):
+        """
+        :param database: filsti til sqlite-databasen
+        :param størrelse: hvor mange tilkoblinger som holdes åpne i poolen
+        :param pragmas: overstyrer/utvider STANDARD_PRAGMAS. Kjøres én gang per tilkobling
+        :param migrer: oppretter/oppdaterer skjemaet med migreringer.py hvis databasen ikke er på nyeste versjon,
+            og sjekker at det er som i database.schema.txt etterpå. Kaster sqlite3.DatabaseError hvis ikke
+        :param skrivekø: send alle skrivinger fra domeneklassene gjennom én skrivetråd, se send_skriving
+        :param maks_batch: maks antall skrivinger skrivetråden samler i én commit
+        :param maks_forsinkelse: hvor mange sekunder skrivetråden venter på flere skrivinger før den committer.
+            Med 0 tar den bare med det som allerede ligger i køen, som er nok når mange tråder skriver, siden køen fylles
+            mens forrige commit pågår. Å vente lønner seg bare hvis de som skriver ikke venter på svaret
+        :param radformat: standard radformat (se rader.py) for list-metodene i Transaksjoner, som kan gi store resultater.
+            execute gir fortsatt dict med mindre radformat sendes med, siden domeneklassene endrer på radene de henter
+        :param instrumentering: instrumentering.Instrumentering, eller noe annet med registrer og tilkobling_åpnet,
+            som får vite om hver spørring fra execute og executemany og hver ny tilkobling. Kan også settes senere
+        :param resultat_cache: resultat_cache.ResultatCache for lesemetodene i domeneklassene. Av som standard.
+            Skriveoperasjonene i domeneklassene holder den oppdatert, se _skriveoperasjon og _mellomlagret i privat.py
+        :param vent_på_tilkobling: sekunder å vente på en ledig tilkobling når alle er lånt ut, før sqlite3.OperationalError.
+            None venter for alltid
+        """
+        if radformat not in RADFORMATER:
+            raise ValueError(f"Ukjent radformat {radformat}, forventet en av {RADFORMATER}")
+
         self.database = database
 
+        if database == ":memory:":
+            størrelse = 1   # hver tilkobling til :memory: er en egen database, så vi kan bare ha én
+
+        self.størrelse = max(1, størrelse)
+        self.pragmas = {**STANDARD_PRAGMAS, **(pragmas or {})}
+        self.radformat = radformat
+        self.instrumentering = instrumentering
+        self.resultat_cache = resultat_cache
+        self.vent_på_tilkobling = vent_på_tilkobling
+
+        self._ledige = queue.LifoQueue()    # sist brukte tilkobling er varmest i cachen
+        self._antall_åpne = 0
+        self._lås = threading.Lock()
+        self._lukket = False
+        self._lokal = threading.local()     # aktiv transaksjon per tråd
+        self._skjema = None
+
+        if migrer:
+            from migreringer import migrer as kjør_migreringer     # migreringene bruker Database, så de kan ikke importeres øverst
+            kjør_migreringer(self)
+            self.skjema.valider()
+
+        self.maks_batch = max(1, maks_batch)
+        self.maks_forsinkelse = maks_forsinkelse
+        self._skrivekø = None
+        self._skrivetråd = None
+        if skrivekø:
+            self._skrivekø = queue.Queue()
+            self._skrivetråd = threading.Thread(target=self._skriveløkke, name="sqlite-skriver", daemon=True)
+            self._skrivetråd.start()
+
     def _koble_til(self):
-        conn = sqlite3.connect(self.database)
+        if self.instrumentering is not None:
+            self.instrumentering.tilkobling_åpnet()
+
+        conn = sqlite3.connect(self.database, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+
+        for navn, verdi in self.pragmas.items():
+            conn.execute(f"PRAGMA {navn} = {verdi}")
+
         return conn
 
-    def execute(self, query, params=(), fetchone=False, fetchall=False, commit=False):
-        conn = self._koble_til()
-        peker = conn.cursor()
+    def _lån_tilkobling(self):
+        if self._lukket:
+            raise sqlite3.ProgrammingError("Databasen er lukket")
 
         try:
-            resultat = peker.execute(query, params)
-            if fetchone:
-                rad = peker.fetchone()
-                resultat = dict(rad) if rad else None
-            elif fetchall:
-                rader = peker.fetchall()
-                resultat = [dict(rad) for rad in rader]
-
-            if commit:
-                conn.commit()
-
-            return resultat
+            return self._ikke_lukket(self._ledige.get_nowait())
+        except queue.Empty:
+            pass
+
+        with self._lås:
+            if self._antall_åpne < self.størrelse:
+                self._antall_åpne += 1
+                try:
+                    return self._koble_til()
+                except Exception:
+                    self._antall_åpne -= 1
+                    raise
+
+        try:
+            conn = self._ledige.get(timeout=self.vent_på_tilkobling)     # poolen er full, vent til noen leverer tilbake
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"Ingen ledig tilkobling etter {self.vent_på_tilkobling} sekunder, "
+                                           f"alle {self.størrelse} i poolen er lånt ut") from None
+
+        return self._ikke_lukket(conn)
+
+    def _ikke_lukket(self, conn):
+        """close() vekker de som venter med None, som legges tilbake til neste som venter"""
+        if conn is None:
+            self._ledige.put(None)
+            raise sqlite3.ProgrammingError("Databasen er lukket")
+        return conn
+
+    def _lever_tilkobling(self, conn):
+        if self._lukket:
+            conn.close()
+            with self._lås:
+                self._antall_åpne -= 1
+            return
+
+        self._ledige.put(conn)
+
+    @contextmanager
+    def _tilkobling(self):
+        conn = self._lån_tilkobling()
+        try:
+            yield conn
         finally:
+            self._lever_tilkobling(conn)
+
+    def _nivåer(self) -> list:
+        nivåer = getattr(self._lokal, "nivåer", None)
+        if nivåer is None:
+            nivåer = self._lokal.nivåer = []
+        return nivåer
+
+    @contextmanager
+    def transaksjon(self, fremmednøkler: bool = True):
+        """
+        Kjører alt inne i with-blokken som én transaksjon med én commit.
+        Alle execute-kall fra samme tråd bruker samme tilkobling, og commit=True blir ignorert til blokken er ferdig.
+        Nøstede transaksjoner blir savepoints, så en indre feil ruller bare tilbake sin egen del.
+        Ved exception rulles alt tilbake og exceptionen kastes videre.
+
+        with database.transaksjon():
+            database.execute("DELETE ...", commit=True)
+            database.execute("DELETE ...", commit=True)
+
+        :param fremmednøkler: False slår av foreign_keys for tilkoblingen mens transaksjonen pågår, som når migreringene bygger
+            tabeller på nytt. Sqlite kan ikke endre det inne i en transaksjon, så det har ingen virkning på nøstede transaksjoner
+        """
+        nivåer = self._nivåer()
+        nivå = {"rull_tilbake": False, "etter_commit": []}
+
+        if nivåer:
+            conn = self._lokal.conn
+            savepoint = f"nivå_{len(nivåer)}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+            nivåer.append(nivå)
+            try:
+                yield conn
+            except BaseException:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                if nivå["rull_tilbake"]:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                else:
+                    nivåer[-2]["etter_commit"].extend(nivå["etter_commit"])
+                conn.execute(f"RELEASE {savepoint}")
+            finally:
+                nivåer.pop()
+            return
+
+        with self._tilkobling() as conn:
+            if not fremmednøkler:
+                conn.execute("PRAGMA foreign_keys = OFF")
+            try:
+                conn.execute("BEGIN IMMEDIATE")    # ta skrivelåsen med en gang, så slipper vi lås-oppgradering midt i
+            except BaseException:
+                if not fremmednøkler:   # ikke lever tilkoblingen tilbake til poolen uten fremmednøkler
+                    conn.execute(f"PRAGMA foreign_keys = {self.pragmas.get('foreign_keys', 'OFF')}")
+                raise
+            self._lokal.conn = conn
+            nivåer.append(nivå)
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                if nivå["rull_tilbake"]:
+                    conn.rollback()
+                else:
+                    conn.commit()
+            finally:
+                nivåer.pop()
+                self._lokal.conn = None
+                if conn.in_transaction:
+                    conn.rollback()     # commit feilet, ikke lever tilbake en halvferdig transaksjon
+                if not fremmednøkler:
+                    conn.execute(f"PRAGMA foreign_keys = {self.pragmas.get('foreign_keys', 'OFF')}")
+
+        if not nivå["rull_tilbake"]:
+            for funksjon in nivå["etter_commit"]:
+                funksjon()
+
+    def rull_tilbake(self):
+        """Markerer den innerste aktive transaksjonen for tilbakerulling når with-blokken avsluttes"""
+        nivåer = self._nivåer()
+        if not nivåer:
+            raise sqlite3.ProgrammingError("Ingen aktiv transaksjon å rulle tilbake")
+
+        nivåer[-1]["rull_tilbake"] = True
+
+    def etter_commit(self, funksjon) -> None:
+        """
+        Kjører funksjon når den aktive transaksjonen er committet, eller med en gang hvis det ikke er noen aktiv transaksjon.
+        Blir transaksjonen (eller savepointet funksjonen ble lagt til i) rullet tilbake, kjøres den aldri.
+        Brukes til å holde cacher i minnet i takt med det som faktisk er lagret.
+        """
+        nivåer = self._nivåer()
+        if not nivåer:
+            funksjon()
+            return
+
+        nivåer[-1]["etter_commit"].append(funksjon)
+
+    @property
+    def skjema(self) -> Skjema:
+        """Tabellene, kolonnene og indeksene, se skjema.py. Leses første gang den brukes"""
+        if self._skjema is None:
+            self.les_skjema()
+        return self._skjema
+
+    def les_skjema(self) -> Skjema:
+        """Leser skjemaet fra sqlite_master på nytt, etter endringer som ikke går gjennom migreringer.migrer"""
+        self._skjema = Skjema.les(self)
+        return self._skjema
+
+    def i_transaksjon(self) -> bool:
+        return bool(self._nivåer())
+
+    def _utfør(self, peker, query, params, fetchone, fetchall, radformat):
+        if self.instrumentering is None:
+            return self._hent_resultat(peker, query, params, fetchone, fetchall, radformat)
+
+        start = time.perf_counter()
+        resultat = self._hent_resultat(peker, query, params, fetchone, fetchall, radformat)
+        sekunder = time.perf_counter() - start
+
+        if fetchall:
+            rader = len(resultat)
+        elif fetchone:
+            rader = int(resultat is not None)
+        else:
+            rader = max(peker.rowcount, 0)
+        self.instrumentering.registrer(query, params, sekunder, rader, peker.connection)
+
+        return resultat
+
+    @staticmethod
+    def _hent_resultat(peker, query, params, fetchone, fetchall, radformat):
+        if fetchall and radformat != "dict":
+            peker.row_factory = None    # rene tupler, uten sqlite3.Row i mellom
+            peker.execute(query, params)
+            return lag_rader(tuple(kolonne[0] for kolonne in peker.description), peker.fetchall(), radformat)
+
+        resultat = peker.execute(query, params)
+        if fetchone:
+            rad = peker.fetchone()
+            resultat = dict(rad) if rad else None
+        elif fetchall:
+            rader = peker.fetchall()
+            resultat = [dict(rad) for rad in rader]
+
+        return resultat
+
+    def execute(self, query, params=(), fetchone=False, fetchall=False, commit=False, radformat: str = "dict"):
+        """
+        :param radformat: hvordan radene fra fetchall skal se ut, en av rader.RADFORMATER. fetchone gir alltid dict
+        """
+        if radformat not in RADFORMATER:
+            raise ValueError(f"Ukjent radformat {radformat}, forventet en av {RADFORMATER}")
+
+        aktiv = getattr(self._lokal, "conn", None)
+        if aktiv is not None:
+            return self._utfør(aktiv.cursor(), query, params, fetchone, fetchall, radformat)   # commit skjer når transaksjonen avsluttes
+
+        with self._tilkobling() as conn:
+            try:
+                resultat = self._utfør(conn.cursor(), query, params, fetchone, fetchall, radformat)
+
+                if commit:
+                    conn.commit()
+
+                return resultat
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()     # ikke la ucommittede endringer henge igjen på en delt tilkobling
+
+    def executemany(self, query, param_liste, commit=False):
+        """Som execute, men kjører samme query for hver parameter-tuppel i param_liste"""
+        aktiv = getattr(self._lokal, "conn", None)
+        if aktiv is not None:
+            return self._utfør_mange(aktiv, query, param_liste)
+
+        with self._tilkobling() as conn:
+            try:
+                resultat = self._utfør_mange(conn, query, param_liste)
+
+                if commit:
+                    conn.commit()
+
+                return resultat
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+
+    def _utfør_mange(self, conn, query, param_liste):
+        if self.instrumentering is None:
+            return conn.executemany(query, param_liste)
+
+        param_liste = list(param_liste)     # kan være en generator, og første tuppel trengs til spørringsplanen
+        start = time.perf_counter()
+        resultat = conn.executemany(query, param_liste)
+        sekunder = time.perf_counter() - start
+
+        self.instrumentering.registrer(query, param_liste[0] if param_liste else (), sekunder, max(resultat.rowcount, 0), conn)
+        return resultat
+
+    def iterer(self, query, params=(), størrelse: int = 1000):
+        """
+        Gir radene fra query som dict én og én, men henter dem fra cursoren i biter på størrelse rader,
+        så hele resultatet aldri ligger i minnet. Tilkoblingen er lånt ut helt til generatoren er ferdig eller lukket.
+        """
+        aktiv = getattr(self._lokal, "conn", None)
+        if aktiv is not None:
+            yield from self._iterer(aktiv.cursor(), query, params, størrelse)
+            return
+
+        with self._tilkobling() as conn:
+            try:
+                yield from self._iterer(conn.cursor(), query, params, størrelse)
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+
+    @staticmethod
+    def _iterer(peker, query, params, størrelse):
+        peker.execute(query, params)
+        while True:
+            rader = peker.fetchmany(størrelse)
+            if not rader:
+                break
+
+            for rad in rader:
+                yield dict(rad)
+
+    def send_skriving(self, funksjon, *args, **kwargs) -> Future:
+        """
+        Legger funksjon(*args, **kwargs) i skrivekøen og returnerer en Future med det funksjonen returnerer (eller kaster).
+        Skrivetråden samler det som ligger i køen, opptil maks_batch eller maks_forsinkelse sekunder, og kjører alt i én transaksjon
+        med én commit. Hver funksjon får sitt eget savepoint, så en som feiler eller kaller rull_tilbake bare ruller tilbake seg selv.
+        Futuren blir ferdig først når committen er gjort.
+        """
+        if self._skrivekø is None:
+            raise sqlite3.ProgrammingError("Databasen har ingen skrivekø, lag den med skrivekø=True")
+        if self._lukket:
+            raise sqlite3.ProgrammingError("Databasen er lukket")
+
+        fremtid = Future()
+        self._skrivekø.put((lambda: funksjon(*args, **kwargs), fremtid))
+        return fremtid
+
+    def kjør_skriving(self, funksjon, *args, **kwargs):
+        """
+        Kjører funksjon(*args, **kwargs) gjennom skrivekøen og venter på svaret, eller direkte hvis det ikke er noen skrivekø.
+        Kall fra skrivetråden selv, eller fra inne i en transaksjon, kjøres også direkte, siden de allerede har skrivelåsen.
+        """
+        if self._skrivekø is None or threading.current_thread() is self._skrivetråd or self.i_transaksjon():
+            return funksjon(*args, **kwargs)
+
+        return self.send_skriving(funksjon, *args, **kwargs).result()
+
+    def _skriveløkke(self):
+        while True:
+            jobb = self._skrivekø.get()
+            if jobb is None:
+                return
+
+            batch = [jobb]
+            frist = time.monotonic() + self.maks_forsinkelse
+            stopp = False
+            while len(batch) < self.maks_batch:
+                try:
+                    jobb = self._skrivekø.get(timeout=max(0.0, frist - time.monotonic()))
+                except queue.Empty:
+                    break
+                if jobb is None:
+                    stopp = True
+                    break
+                batch.append(jobb)
+
+            self._kjør_batch(batch)
+            if stopp:
+                return
+
+    def _kjør_batch(self, batch: list) -> None:
+        batch = [(funksjon, fremtid) for funksjon, fremtid in batch if fremtid.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        resultater = []
+        try:
+            with self.transaksjon():
+                for funksjon, fremtid in batch:
+                    try:
+                        with self.transaksjon():
+                            resultater.append((fremtid, funksjon(), None))
+                    except Exception as feil:
+                        resultater.append((fremtid, None, feil))
+        except Exception as feil:   # committen feilet, da er ingenting lagret
+            for _, fremtid in batch:
+                fremtid.set_exception(feil)
+            return
+
+        for fremtid, resultat, feil in resultater:
+            if feil is None:
+                fremtid.set_result(resultat)
+            else:
+                fremtid.set_exception(feil)
+
+    def close(self):
+        """
+        Lukker alle tilkoblingene i poolen. Tilkoblinger som er lånt ut lukkes når de leveres tilbake.
+        Skrivinger som allerede ligger i skrivekøen blir gjort ferdig først. Tråder som venter på en tilkobling får
+        sqlite3.ProgrammingError.
+        """
+        if self._skrivetråd is not None and not self._lukket:
+            self._skrivekø.put(None)
+            self._skrivetråd.join()
+
+        self._lukket = True
+        while True:
+            try:
+                conn = self._ledige.get_nowait()
+            except queue.Empty:
+                break
+            if conn is None:    # close() er kalt før
+                continue
             conn.close()
+            with self._lås:
+                self._antall_åpne -= 1
+
+        self._ledige.put(None)  # vekker de som venter i _lån_tilkobling, og hver av dem legger den tilbake til neste
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import sys
+
+from database import Database
+from privat import _i_biter
+
+
+def lag_fingeravtrykk(transaksjon: dict) -> str:
+    """
+    Lager et kanonisk fingeravtrykk av en transaksjon, så like transaksjoner kan finnes med ett oppslag i en unik indeks
+    :param transaksjon: {pris, type, dato, beskrivelse, kategorier: [str], personer: [str]}
+    :return: sha256 i hex av pris, type, dato, beskrivelse og sorterte kategori- og personnavn
+    """
+    kanonisk = json.dumps([
+        transaksjon.get("pris"),
+        transaksjon.get("type"),
+        transaksjon.get("dato"),
+        transaksjon.get("beskrivelse") or "",
+        sorted(set(transaksjon.get("kategorier") or [])),    # en tag kan bare være på en transaksjon én gang
+        sorted(set(transaksjon.get("personer") or [])),
+    ], ensure_ascii=False, separators=(",", ":"))
+
+    return hashlib.sha256(kanonisk.encode("utf-8")).hexdigest()
+
+
+def hent_med_tag_navn(database: Database, transaksjon_ider: list) -> dict:
+    """
+    Henter transaksjonene med navnene på kategoriene og personene sine
+    :return: {id: {id, pris, type, dato, beskrivelse, kategorier: [str], personer: [str]}}
+    """
+    transaksjoner = {}
+    for bit in _i_biter(list(transaksjon_ider)):
+        spørsmålstegn_tekst = ",".join(["?"] * len(bit))
+
+        for rad in database.execute(f"SELECT id, pris, type, dato, beskrivelse FROM transaksjoner WHERE id IN ({spørsmålstegn_tekst})",
+                                    bit, fetchall=True):
+            rad["kategorier"] = []
+            rad["personer"] = []
+            transaksjoner[rad.get("id")] = rad
+
+        for tag_tabel, navn_tabel, kolonne, felt in (("kategori_tag", "kategorier", "kategori_id", "kategorier"),
+                                                      ("person_tag", "personer", "person_id", "personer")):
+            tags = database.execute(f"""
+                SELECT tag.transaksjon_id, navn.navn FROM {tag_tabel} tag
+                JOIN {navn_tabel} navn ON navn.id = tag.{kolonne}
+                WHERE tag.transaksjon_id IN ({spørsmålstegn_tekst})""", bit, fetchall=True)
+
+            for tag in tags:
+                if tag.get("transaksjon_id") in transaksjoner:
+                    transaksjoner[tag.get("transaksjon_id")][felt].append(tag.get("navn"))
+
+    return transaksjoner
+
+
+def oppdater_fingeravtrykk(database: Database, transaksjon_ider: list) -> None:
+    """
+    Regner ut fingeravtrykket på nytt for transaksjonene, etter at felt eller tags er endret.
+    :raises sqlite3.IntegrityError: hvis endringen gjør en transaksjon lik en annen som finnes fra før
+    """
+    if not transaksjon_ider:
+        return
+
+    with database.transaksjon():
+        transaksjoner = hent_med_tag_navn(database, transaksjon_ider)
+        database.executemany("UPDATE transaksjoner SET fingeravtrykk = ? WHERE id = ?",
+                             [(lag_fingeravtrykk(transaksjon), ide) for ide, transaksjon in transaksjoner.items()], commit=True)
+
+
+def finnes_fingeravtrykk(database: Database, fingeravtrykk: str) -> bool:
+    return database.execute("SELECT 1 FROM transaksjoner WHERE fingeravtrykk = ?", (fingeravtrykk,), fetchone=True) is not None
+
+
+def fyll_inn_fingeravtrykk(database: Database, batch_størrelse: int = 5000) -> dict:
+    """
+    Legger til fingeravtrykk-kolonnen og den unike indeksen i en eksisterende database, og regner ut alle fingeravtrykkene.
+    Hvis flere transaksjoner allerede er like, får den med lavest id fingeravtrykket og resten får NULL.
+    :return: {"oppdatert": int, "duplikater": [id]}
+    """
+    kolonner = [rad.get("name") for rad in database.execute("PRAGMA table_info(transaksjoner)", fetchall=True)]
+
+    with database.transaksjon():
+        if "fingeravtrykk" not in kolonner:
+            database.execute("ALTER TABLE transaksjoner ADD COLUMN fingeravtrykk TEXT", commit=True)
+
+        database.execute("DROP INDEX IF EXISTS transaksjoner_fingeravtrykk", commit=True)
+        database.execute("UPDATE transaksjoner SET fingeravtrykk = NULL", commit=True)
+
+        sett = set()
+        duplikater = []
+        oppdatert = 0
+        siste_id = 0
+        while True:
+            ider = [rad.get("id") for rad in database.execute(
+                "SELECT id FROM transaksjoner WHERE id > ? ORDER BY id LIMIT ?", (siste_id, batch_størrelse), fetchall=True)]
+            if not ider:
+                break
+            siste_id = ider[-1]
+
+            oppdateringer = []
+            for ide, transaksjon in sorted(hent_med_tag_navn(database, ider).items()):
+                fingeravtrykk = lag_fingeravtrykk(transaksjon)
+                if fingeravtrykk in sett:
+                    duplikater.append(ide)
+                    continue
+
+                sett.add(fingeravtrykk)
+                oppdateringer.append((fingeravtrykk, ide))
+
+            database.executemany("UPDATE transaksjoner SET fingeravtrykk = ? WHERE id = ?", oppdateringer, commit=True)
+            oppdatert += len(oppdateringer)
+
+        database.execute("CREATE UNIQUE INDEX transaksjoner_fingeravtrykk ON transaksjoner(fingeravtrykk)", commit=True)
+
+    return {"oppdatert": oppdatert, "duplikater": duplikater}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Bruk: python fingeravtrykk.py <databasefil>")
+        sys.exit(1)
+
+    db = Database(sys.argv[1], migrer=False)
+    resultat = fyll_inn_fingeravtrykk(db)
+    db.close()
+
+    print(f"Oppdaterte {resultat['oppdatert']} transaksjoner")
+    if resultat["duplikater"]:
+        print(f"{len(resultat['duplikater'])} transaksjoner var duplikater og fikk ikke fingeravtrykk: {resultat['duplikater']}")
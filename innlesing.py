@@ -0,0 +1,123 @@
+"""
+Lesing av mange kontoutskrifter (csv i formatet eksporter_csv_fil skriver) på en gang, se Transaksjoner.importer_mappe.
+les_csv_fil kjøres i egne prosesser, så tolking, validering og fingeravtrykk for flere filer går på hver sin kjerne.
+Den må ligge på toppnivå i en modul uten databasetilkoblinger, så den kan pickles, og alt den gir tilbake må kunne pickles.
+
+Bruk: python -m innlesing <databasefil> <mappe> [--mønster *.csv] [--prosesser 4] [--batch 5000]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from fingeravtrykk import lag_fingeravtrykk
+from privat import _tolk_csv_rad
+from retur_meldinger import SUKSESS_INGEN_INNHOLD
+from validering import er_hentet_transaksjon_innhold_gyldig
+
+
+def les_csv_fil(filnavn: str) -> dict:
+    """
+    Tolker og validerer alle radene i filen, som importer_csv_fil_bulk, og lager fingeravtrykket til hver gyldig transaksjon
+    :return: {fil, lest, transaksjoner: [{pris, type, dato, beskrivelse, kategorier, personer}], fingeravtrykk: [str],
+        avvist: [{linje, melding}], sekunder}. fingeravtrykk hører til transaksjonene med samme plass
+    """
+    start = time.perf_counter()
+    transaksjoner = []
+    fingeravtrykk = []
+    avvist = []
+    lest = 0
+
+    with open(filnavn, "r", newline="") as csvfil:
+        leser = csv.DictReader(csvfil, delimiter=";")
+        for rad in leser:
+            lest += 1
+            try:
+                transaksjon = _tolk_csv_rad(rad)
+            except (TypeError, ValueError):
+                avvist.append({"linje": leser.line_num, "melding": f"Ugyldig pris {rad.get('pris')}"})
+                continue
+
+            validert = er_hentet_transaksjon_innhold_gyldig(transaksjon)
+            if validert.get("status") != SUKSESS_INGEN_INNHOLD:
+                avvist.append({"linje": leser.line_num, "melding": validert.get("melding")})
+                continue
+
+            transaksjoner.append(transaksjon)
+            fingeravtrykk.append(lag_fingeravtrykk(transaksjon))
+
+    return {"fil": filnavn, "lest": lest, "transaksjoner": transaksjoner, "fingeravtrykk": fingeravtrykk, "avvist": avvist,
+            "sekunder": time.perf_counter() - start}
+
+
+FILFEIL = (OSError, UnicodeError, ValueError, csv.Error)     # feil i én fil, som ikke skal stoppe resten
+
+
+def les_filer(filnavn: list[str], prosesser: int = None):
+    """
+    Gir (fil, resultat fra les_csv_fil) etter hvert som filene blir ferdige, ikke i rekkefølge. Er filen ikke lesbar, er resultatet exceptionen.
+    Maks to filer per prosess er lest eller under lesing om gangen, så ferdige filer ikke hoper seg opp hvis skrivingen er tregere.
+    :param prosesser: antall prosesser. Standard er antall kjerner, 0 leser i denne prosessen
+    """
+    if prosesser == 0:
+        for fil in filnavn:
+            try:
+                yield fil, les_csv_fil(fil)
+            except FILFEIL as feil:
+                yield fil, feil
+        return
+
+    prosesser = prosesser or os.cpu_count() or 1
+    gjenstår = iter(filnavn)
+    with ProcessPoolExecutor(max_workers=prosesser) as pool:
+        ventende = {}
+        while True:
+            for fil in gjenstår:
+                ventende[pool.submit(les_csv_fil, fil)] = fil
+                if len(ventende) >= 2 * prosesser:
+                    break
+            if not ventende:
+                return
+
+            ferdige, _ = wait(ventende, return_when=FIRST_COMPLETED)
+            for fremtid in ferdige:
+                fil = ventende.pop(fremtid)
+                feil = fremtid.exception()
+                if feil is not None and not isinstance(feil, FILFEIL):
+                    raise feil
+                yield fil, feil if feil is not None else fremtid.result()
+
+
+if __name__ == "__main__":
+    from database import Database
+    from kategorier import Kategorier
+    from personer import Personer
+    from transaksjoner import Transaksjoner
+
+    parser = argparse.ArgumentParser(prog="python -m innlesing")
+    parser.add_argument("database", help="filsti til sqlite-databasen, lages hvis den ikke finnes")
+    parser.add_argument("mappe", help="mappen med csv-filene")
+    parser.add_argument("--mønster", default="*.csv", help="hvilke filer i mappen som skal leses")
+    parser.add_argument("--prosesser", type=int, default=None, help="prosesser som leser filene, standard er antall kjerner")
+    parser.add_argument("--batch", type=int, default=5000, help="antall transaksjoner per transaksjon i databasen")
+    argumenter = parser.parse_args()
+
+    def skriv_fremdrift(fil: dict) -> None:
+        print(f"{fil['fil']}: {fil['lagt_til']} nye, {fil['duplikater']} duplikater, {len(fil['avvist'])} avvist, "
+              f"{fil['rader_per_sekund']:.0f} rader/s", file=sys.stderr)
+
+    database = Database(argumenter.database)
+    personer = Personer(database)
+    kategorier = Kategorier(database)
+    try:
+        svar = Transaksjoner(database, personer, kategorier).importer_mappe(
+            argumenter.mappe, argumenter.mønster, argumenter.prosesser, argumenter.batch, skriv_fremdrift)
+    finally:
+        database.close()
+
+    oppsummering = dict(svar.get("innhold") or {})
+    oppsummering.pop("filer", None)     # er allerede skrevet ut fil for fil
+    print(json.dumps({"status": svar.get("status"), "melding": svar.get("melding"), **oppsummering}, ensure_ascii=False, indent=2))
@@ -0,0 +1,130 @@
+"""
+Statistikk over spørringene som går gjennom Database.execute og executemany, og logg over trege spørringer med spørringsplan.
+
+    instrumentering = Instrumentering(treg_grense=0.05)
+    database = Database("økonomi.db", instrumentering=instrumentering)
+    ...
+    print(instrumentering.dump())
+
+Database kan bruke et hvilket som helst objekt med de samme to metodene, registrer og tilkobling_åpnet.
+Uten instrumentering (standard) koster det bare én sjekk på None per kall.
+"""
+import functools
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("database.treg")
+
+_TEKST = re.compile(r"'(?:[^']|'')*'")
+_TALL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETERLISTE = re.compile(r"\?(?:\s*,\s*\?)+")
+_MELLOMROM = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def normaliser_sql(query: str) -> str:
+    """
+    Gjør spørringer som bare er forskjellige i verdier like, så de telles sammen:
+    tekst og tall blir ?, IN (?, ?, ?) med hvor mange ? som helst blir IN (?, ...), og all whitespace blir ett mellomrom
+    """
+    query = _TEKST.sub("?", query)
+    query = _TALL.sub("?", query)
+    query = _PARAMETERLISTE.sub("?, ...", query)
+    return _MELLOMROM.sub(" ", query).strip()
+
+
+class Instrumentering:
+    def __init__(self, treg_grense: float = 0.1, maks_trege: int = 100, planer: bool = True):
+        """
+        :param treg_grense: sekunder. Spørringer som tar minst så lang tid havner i loggen over trege spørringer
+        :param maks_trege: hvor mange trege spørringer som huskes, de eldste forsvinner først
+        :param planer: kjør EXPLAIN QUERY PLAN på trege spørringer og ta planen med i loggen
+        """
+        self.treg_grense = treg_grense
+        self.planer = planer
+        self._lås = threading.Lock()
+        self._spørringer = {}
+        self._trege = deque(maxlen=maks_trege)
+        self._tilkoblinger = 0
+
+    def registrer(self, query: str, params, sekunder: float, rader: int, conn) -> None:
+        """
+        Kalles av Database etter hver spørring
+        :param rader: rader hentet, eller endret for INSERT/UPDATE/DELETE
+        :param conn: tilkoblingen spørringen ble kjørt på, til EXPLAIN QUERY PLAN
+        """
+        normalisert = normaliser_sql(query)
+        with self._lås:
+            statistikk = self._spørringer.get(normalisert)
+            if statistikk is None:
+                statistikk = self._spørringer[normalisert] = {"antall": 0, "total_s": 0.0, "maks_s": 0.0, "rader": 0}
+            statistikk["antall"] += 1
+            statistikk["total_s"] += sekunder
+            statistikk["rader"] += rader
+            if sekunder > statistikk["maks_s"]:
+                statistikk["maks_s"] = sekunder
+
+        if sekunder >= self.treg_grense:
+            self._registrer_treg(query, params, sekunder, rader, conn)
+
+    def _registrer_treg(self, query, params, sekunder, rader, conn) -> None:
+        plan = None
+        if self.planer:
+            try:
+                plan = [rad[3] for rad in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+            except Exception as feil:    # planen er bare til hjelp, den skal aldri få spørringen til å feile
+                plan = [f"kunne ikke hente plan: {feil}"]
+
+        treg = {
+            "sql": _MELLOMROM.sub(" ", query).strip(),
+            "params": repr(params)[:200],
+            "sekunder": sekunder,
+            "rader": rader,
+            "plan": plan,
+            "tidspunkt": time.time(),
+        }
+        with self._lås:
+            self._trege.append(treg)
+
+        logger.warning("Treg spørring (%.3f s, %d rader): %s | plan: %s", sekunder, rader, treg["sql"], plan)
+
+    def tilkobling_åpnet(self) -> None:
+        with self._lås:
+            self._tilkoblinger += 1
+
+    def statistikk(self, sorter_på: str = "total_s") -> list[dict]:
+        """:return: [{sql, antall, total_s, snitt_s, maks_s, rader}], sortert synkende på sorter_på"""
+        with self._lås:
+            rader = [{"sql": sql, **statistikk, "snitt_s": statistikk["total_s"] / statistikk["antall"]}
+                     for sql, statistikk in self._spørringer.items()]
+
+        return sorted(rader, key=lambda rad: rad[sorter_på], reverse=True)
+
+    def trege(self) -> list[dict]:
+        with self._lås:
+            return list(self._trege)
+
+    def dump(self, filnavn: str = None) -> dict:
+        """
+        :param filnavn: skriv også resultatet som json hit
+        :return: {tilkoblinger, spørringer: statistikk(), trege: trege()}
+        """
+        with self._lås:
+            tilkoblinger = self._tilkoblinger
+
+        resultat = {"tilkoblinger": tilkoblinger, "spørringer": self.statistikk(), "trege": self.trege()}
+        if filnavn:
+            with open(filnavn, "w", encoding="utf-8") as fil:
+                json.dump(resultat, fil, ensure_ascii=False, indent=2)
+
+        return resultat
+
+    def nullstill(self) -> None:
+        with self._lås:
+            self._spørringer.clear()
+            self._trege.clear()
+            self._tilkoblinger = 0
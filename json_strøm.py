@@ -0,0 +1,146 @@
+"""
+Gjør om et svar fra _formater_svar til json i biter, for svar der innholdet er en generator (Spørring.strøm og
+iterer_-metodene i Transaksjoner). Radene, dictene og json-teksten for hele resultatet ligger aldri i minnet samtidig,
+og første bit er klar så snart første rad er lest.
+    som_json    én json-konvolutt {"status", "melding", "innhold": [...]}, der lista skrives rad for rad
+    som_ndjson  én json-verdi per linje: først {"status", "melding"}, så én linje per rad
+
+    with som_ndjson(transaksjoner.iterer_transaksjoner_mellom_datoer("2015-01-01", "2024-12-31")) as strøm:
+        for bit in strøm:
+            fil.write(bit)
+"""
+import json
+from collections.abc import Iterator, Mapping
+
+from retur_meldinger import SUKSESS, SUKSESS_INGEN_INNHOLD
+
+BIT_STØRRELSE = 64 * 1024
+_TOM = object()
+
+
+def _til_json(verdi):
+    """For radene fra rader.py, som ikke er dict"""
+    if isinstance(verdi, Mapping):
+        return dict(verdi)
+    if hasattr(verdi, "som_dict"):
+        return verdi.som_dict()
+    raise TypeError(f"{type(verdi).__name__} kan ikke gjøres om til json")
+
+
+def _kod(verdi) -> bytes:
+    return json.dumps(verdi, ensure_ascii=False, default=_til_json).encode("utf-8")
+
+
+class Strøm:
+    """
+    Bitene (bytes) til ett svar. status er kjent før første bit leses, så den kan brukes i hodet på et HTTP-svar.
+    Lukk strømmen hvis den ikke leses ferdig, så generatoren med radene leverer tilkoblingen sin tilbake til poolen
+    """
+    def __init__(self, status: int, innholdstype: str, biter: Iterator, rader: Iterator = None):
+        self.status = status
+        self.innholdstype = innholdstype
+        self._biter = biter
+        self._rader = rader
+
+    def __iter__(self):
+        return self._biter
+
+    def close(self) -> None:
+        self._biter.close()
+        if hasattr(self._rader, "close"):
+            self._rader.close()     # biter som aldri ble startet lukker ikke radene selv
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *feil):
+        self.close()
+
+
+def _del_opp(svar: dict, tom_melding: str) -> tuple:
+    """
+    :return: (konvolutten uten innhold, første rad eller _TOM, resten av radene).
+        Leser første rad, så et tomt resultat får SUKSESS_INGEN_INNHOLD som i hent()
+    """
+    hode = {nøkkel: verdi for nøkkel, verdi in svar.items() if nøkkel != "innhold"}
+    rader = iter(svar.get("innhold") or [])
+    første = next(rader, _TOM)
+
+    if første is _TOM and hode.get("status") == SUKSESS:
+        hode["status"] = SUKSESS_INGEN_INNHOLD
+        hode["melding"] = tom_melding
+
+    return hode, første, rader
+
+
+def _samle(deler: Iterator, bit_størrelse: int) -> Iterator:
+    """Slår sammen små deler til biter på minst bit_størrelse bytes, så hver rad ikke blir en egen skriving"""
+    buffer = []
+    størrelse = 0
+    for del_ in deler:
+        buffer.append(del_)
+        størrelse += len(del_)
+        if størrelse >= bit_størrelse:
+            yield b"".join(buffer)
+            buffer.clear()
+            størrelse = 0
+
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _json_biter(hode: dict, første, rader: Iterator, bit_størrelse: int) -> Iterator:
+    try:
+        start = _kod(hode)[:-1] + b', "innhold": ['     # uten } til slutt, innholdet kommer sist
+        if første is _TOM:
+            yield start + b"]}"
+            return
+
+        yield start + _kod(første)      # med en gang, så klienten får noe før resten er lest
+        yield from _samle((b", " + _kod(rad) for rad in rader), bit_størrelse)
+        yield b"]}"
+    finally:
+        if hasattr(rader, "close"):
+            rader.close()
+
+
+def _ndjson_biter(hode: dict, første, rader: Iterator, bit_størrelse: int) -> Iterator:
+    try:
+        if første is _TOM:
+            yield _kod(hode) + b"\n"
+            return
+
+        yield _kod(hode) + b"\n" + _kod(første) + b"\n"
+        yield from _samle((_kod(rad) + b"\n" for rad in rader), bit_størrelse)
+    finally:
+        if hasattr(rader, "close"):
+            rader.close()
+
+
+def som_json(svar: dict, tom_melding: str = "Fant ingen transaksjoner", bit_størrelse: int = BIT_STØRRELSE) -> Strøm:
+    """
+    :param svar: fra _formater_svar, der innhold er en generator eller en liste. Annet innhold skrives som det er, i én bit
+    :param tom_melding: melding hvis innholdet er tomt og statusen SUKSESS
+    :param bit_størrelse: omtrent hvor mange bytes hver bit skal ha
+    :return: Strøm med bitene til {"status", "melding", "innhold": [...]}, og neste_peker hvis den er i svaret
+    """
+    if not isinstance(svar.get("innhold"), (Iterator, list, tuple)):
+        return Strøm(svar.get("status"), "application/json; charset=utf-8", iter([_kod(svar)]))
+
+    hode, første, rader = _del_opp(svar, tom_melding)
+    return Strøm(hode.get("status"), "application/json; charset=utf-8", _json_biter(hode, første, rader, bit_størrelse), rader)
+
+
+def som_ndjson(svar: dict, tom_melding: str = "Fant ingen transaksjoner", bit_størrelse: int = BIT_STØRRELSE) -> Strøm:
+    """
+    :param svar: fra _formater_svar, der innhold er en generator eller en liste. Annet innhold blir én linje etter konvolutten
+    :param tom_melding: melding hvis innholdet er tomt og statusen SUKSESS
+    :param bit_størrelse: omtrent hvor mange bytes hver bit skal ha
+    :return: Strøm med {"status", "melding"} på første linje, og én rad per linje etter den
+    """
+    if not isinstance(svar.get("innhold"), (Iterator, list, tuple)):
+        hode = {nøkkel: verdi for nøkkel, verdi in svar.items() if nøkkel != "innhold"}
+        return Strøm(svar.get("status"), "application/x-ndjson; charset=utf-8", iter([_kod(hode) + b"\n" + _kod(svar.get("innhold")) + b"\n"]))
+
+    hode, første, rader = _del_opp(svar, tom_melding)
+    return Strøm(hode.get("status"), "application/x-ndjson; charset=utf-8", _ndjson_biter(hode, første, rader, bit_størrelse), rader)
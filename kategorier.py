@@ -1,12 +1,39 @@
-from sqlite3 import OperationalError
-from privat import _hent_rad_fra_tabel, _formater_svar, _finn_transaksjoner_på_id_liste
+from sqlite3 import OperationalError, IntegrityError
+from fingeravtrykk import oppdater_fingeravtrykk
+from navne_cache import NavneCache
+from privat import _hent_rad_fra_tabel, _formater_svar, _skriveoperasjon, _finn_transaksjoner_på_id_liste
 from retur_meldinger import *
 from validering import *
 
 class Kategorier:
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, cache_størrelse: int = 1024, varm_opp: bool = False):
+        """
+        :param cache_størrelse: maks antall navn i NavneCache-en som brukes av hent_på_navn og hent_på_id
+        :param varm_opp: last hele tabellen inn i cachen med en gang
+        """
         self.database = database
+        self.cache = NavneCache(cache_størrelse)
 
+        if varm_opp:
+            self.varm_opp_cache()
+
+
+    def varm_opp_cache(self) -> None:
+        """Laster så mange rader fra kategorier som det er plass til inn i cachen"""
+        for rad in self.database.execute("SELECT id, navn FROM kategorier LIMIT ?", (self.cache.maks_størrelse,), fetchall=True):
+            self.cache.legg_til(rad.get("id"), rad.get("navn"))
+
+
+    def _husk(self, rad: dict) -> None:
+        """Legger raden i cachen, men først når den er committet, så cachen aldri inneholder noe som blir rullet tilbake"""
+        self.database.etter_commit(lambda: self.cache.legg_til(rad.get("id"), rad.get("navn")))
+
+
+    def _glem(self, ide) -> None:
+        self.cache.fjern(ide=ide)
+        self.database.etter_commit(lambda: self.cache.fjern(ide=ide))   # en annen tråd kan ha lagt den inn igjen før commit
+
+    @_skriveoperasjon("kategorier")
     def legg_til(self, kategori_navn):
         """Legge til en ny kategori i databasen"""
         if not er_gyldig_tekst(kategori_navn):
@@ -14,6 +41,7 @@ class Kategorier:
 
         try:
             retur_verdi = self.database.execute("INSERT INTO kategorier(navn) VALUES (?) RETURNING *", (kategori_navn,), fetchone=True, commit=True)
+            self._husk(retur_verdi)
             return _formater_svar(OPPRETTET_NY, retur_verdi, "suksess")
 
         except OperationalError as e:
@@ -25,7 +53,15 @@ class Kategorier:
         if not er_helltall(iden):
             return _formater_svar(UGYLDIG_INPUT, [], f"forventet type int, fikk {iden} av typen {type(iden).__name__}")
 
-        return _hent_rad_fra_tabel(self.database, "kategorier", "id", iden, f"Fant ingen kategori med iden {iden}")
+        navn = self.cache.hent_navn(iden)
+        if navn is not None:
+            return _formater_svar(SUKSESS, {"id": iden, "navn": navn}, "suksess")
+
+        svar = _hent_rad_fra_tabel(self.database, "kategorier", "id", iden, f"Fant ingen kategori med iden {iden}")
+        if svar.get("status") == SUKSESS:
+            self._husk(svar.get("innhold"))
+
+        return svar
 
 
     def hent_på_navn(self, kategori_navn: str) -> dict:
@@ -33,7 +69,15 @@ class Kategorier:
         if not er_gyldig_tekst(kategori_navn):
             return _formater_svar(UGYLDIG_INPUT, [], f"forventet type str, fikk {kategori_navn} av typen {type(kategori_navn).__name__}")
 
-        return _hent_rad_fra_tabel(self.database, "kategorier", "navn", kategori_navn, f"Fant ingen kategori med navn {kategori_navn}")
+        ide = self.cache.hent_id(kategori_navn)
+        if ide is not None:
+            return _formater_svar(SUKSESS, {"id": ide, "navn": kategori_navn}, "suksess")
+
+        svar = _hent_rad_fra_tabel(self.database, "kategorier", "navn", kategori_navn, f"Fant ingen kategori med navn {kategori_navn}")
+        if svar.get("status") == SUKSESS:
+            self._husk(svar.get("innhold"))
+
+        return svar
 
 
     def hent_transaksjoner(self, kategori_id) -> dict:
@@ -44,21 +88,43 @@ class Kategorier:
         return _finn_transaksjoner_på_id_liste(self.database, transaksjon_ider)
 
 
+    @_skriveoperasjon("kategorier")
     def oppdater_kategori(self, kategori_id, kategori_navn) -> dict:
         """status: int, innhold: [], message: str"""
-        kategori = self.database.execute(
-            "UPDATE kategorier SET navn = ? WHERE id = ? RETURNING *", (kategori_navn, kategori_id,),
-            fetchone=True, commit=True)
+        try:
+            with self.database.transaksjon():
+                kategori = self.database.execute(
+                    "UPDATE kategorier SET navn = ? WHERE id = ? RETURNING *", (kategori_navn, kategori_id,),
+                    fetchone=True, commit=True)
+                oppdater_fingeravtrykk(self.database, self._transaksjon_ider(kategori_id))    # navnet er en del av fingeravtrykket
+                self._glem(kategori_id)
+                if kategori:
+                    self._husk(kategori)
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], f"Kunne ikke gi nytt navn til {kategori_id}, {kategori_navn} finnes fra før eller gir like transaksjoner")
 
         if not kategori:
             return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "Tomme celler. Kan være feil kategori_id")
 
         return _formater_svar(SUKSESS, kategori, "suksess")
 
+    @_skriveoperasjon("kategorier", "kategori_tag")
     def fjern_kategori(self, kategori_id) -> dict:
         """status: int, innhold: [], message: str"""
-        self.database.execute("DELETE FROM kategorier WHERE id = ?", (kategori_id,), commit=True)
-        self.database.execute("DELETE FROM kategori_tag WHERE kategori_id = ?", (kategori_id,), commit=True)
+        try:
+            with self.database.transaksjon():
+                transaksjon_ider = self._transaksjon_ider(kategori_id)
+                self.database.execute("DELETE FROM kategorier WHERE id = ?", (kategori_id,), commit=True)   # kategori_tag fjernes av ON DELETE CASCADE
+                oppdater_fingeravtrykk(self.database, transaksjon_ider)
+                self._glem(kategori_id)
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], f"Kan ikke fjerne {kategori_id}, da ville noen transaksjoner blitt like")
+
         return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
 
 
+    def _transaksjon_ider(self, kategori_id) -> list:
+        return [rad.get("transaksjon_id") for rad in
+                self.database.execute("SELECT transaksjon_id FROM kategori_tag WHERE kategori_id = ?", (kategori_id,), fetchall=True)]
+
+
@@ -0,0 +1,263 @@
+"""
+Skjemaet i databasen er versjonert med PRAGMA user_version.
+Migrering nummer n i MIGRERINGER tar databasen fra versjon n-1 til versjon n, og kjøres i sin egen transaksjon.
+Nye endringer i skjemaet legges til som en ny funksjon sist i listen, eksisterende migreringer skal aldri endres.
+"""
+import sqlite3
+
+from fingeravtrykk import fyll_inn_fingeravtrykk
+
+
+def _grunnskjema(database) -> None:
+    """Versjon 1: tabellene fra database.schema.txt, med fingeravtrykk"""
+    database.execute("""
+        CREATE TABLE IF NOT EXISTS kategorier(
+            id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL UNIQUE,
+            navn TEXT NOT NULL UNIQUE
+        )""")
+    database.execute("""
+        CREATE TABLE IF NOT EXISTS personer(
+            id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL UNIQUE,
+            navn TEXT NOT NULL UNIQUE
+        )""")
+    database.execute("""
+        CREATE TABLE IF NOT EXISTS transaksjoner(
+            id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL UNIQUE,
+            pris NUMERIC NOT NULL,
+            type TEXT NOT NULL,
+            dato TEXT NOT NULL,
+            beskrivelse TEXT,
+            fingeravtrykk TEXT
+        )""")
+    database.execute("""
+        CREATE TABLE IF NOT EXISTS kategori_tag(
+            transaksjon_id INTEGER,
+            kategori_id INTEGER,
+            FOREIGN KEY(transaksjon_id) REFERENCES transaksjoner(id)
+            FOREIGN KEY(kategori_id) REFERENCES kategorier(id)
+        )""")
+    database.execute("""
+        CREATE TABLE IF NOT EXISTS person_tag(
+            transaksjon_id INTEGER,
+            person_id INTEGER,
+            FOREIGN KEY(transaksjon_id) REFERENCES transaksjoner(id)
+            FOREIGN KEY(person_id) REFERENCES personer(id)
+        )""")
+
+    kolonner = [rad.get("name") for rad in database.execute("PRAGMA table_info(transaksjoner)", fetchall=True)]
+    if "fingeravtrykk" not in kolonner:     # database laget før fingeravtrykket fantes
+        fyll_inn_fingeravtrykk(database)
+    else:
+        database.execute("CREATE UNIQUE INDEX IF NOT EXISTS transaksjoner_fingeravtrykk ON transaksjoner(fingeravtrykk)")
+
+
+def _indekser_og_tag_nøkler(database) -> None:
+    """
+    Versjon 2: indekser for alle oppslagene i Transaksjoner, sammensatt primærnøkkel på tag-tabellene
+    og ON DELETE CASCADE fra tags til transaksjoner, kategorier og personer
+    """
+    for tag_tabel, navn_tabel, kolonne in (("kategori_tag", "kategorier", "kategori_id"), ("person_tag", "personer", "person_id")):
+        # sqlite kan ikke endre nøkler på en eksisterende tabell, så den bygges på nytt
+        database.execute(f"""
+            CREATE TABLE {tag_tabel}_ny(
+                transaksjon_id INTEGER NOT NULL REFERENCES transaksjoner(id) ON DELETE CASCADE,
+                {kolonne} INTEGER NOT NULL REFERENCES {navn_tabel}(id) ON DELETE CASCADE,
+                PRIMARY KEY (transaksjon_id, {kolonne})
+            ) WITHOUT ROWID""")
+        database.execute(f"""
+            INSERT OR IGNORE INTO {tag_tabel}_ny (transaksjon_id, {kolonne})
+            SELECT transaksjon_id, {kolonne} FROM {tag_tabel}
+            WHERE transaksjon_id IN (SELECT id FROM transaksjoner) AND {kolonne} IN (SELECT id FROM {navn_tabel})""")
+        database.execute(f"DROP TABLE {tag_tabel}")
+        database.execute(f"ALTER TABLE {tag_tabel}_ny RENAME TO {tag_tabel}")
+
+        # primærnøkkelen dekker oppslag på transaksjon_id, denne dekker oppslag den andre veien
+        database.execute(f"CREATE INDEX {tag_tabel}_{kolonne} ON {tag_tabel}({kolonne}, transaksjon_id)")
+
+    database.execute("CREATE INDEX transaksjoner_dato ON transaksjoner(dato)")
+    database.execute("CREATE INDEX transaksjoner_pris ON transaksjoner(pris)")
+    database.execute("CREATE INDEX transaksjoner_type_dato ON transaksjoner(type, dato)")
+
+    fyll_inn_fingeravtrykk(database)    # doble tags er fjernet, så fingeravtrykkene kan ha endret seg
+
+
+def har_fts5(database) -> bool:
+    return bool(database.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5') AS fts5", fetchone=True).get("fts5"))
+
+
+def _fulltekst_søk(database) -> None:
+    """
+    Versjon 3: FTS5-indeks over beskrivelse, holdt i takt med transaksjoner av triggere.
+    Indeksen peker på radene i transaksjoner (content=), så beskrivelsene lagres ikke to ganger.
+    Hvis sqlite er bygget uten FTS5 hoppes den over, og Transaksjoner.søk_på_beskrivelse bruker LIKE i stedet
+    """
+    if not har_fts5(database):
+        return
+
+    # remove_diacritics 0, så æ, ø og å ikke blir gjort om til a og o
+    database.execute("""
+        CREATE VIRTUAL TABLE transaksjoner_fts USING fts5(
+            beskrivelse, content='transaksjoner', content_rowid='id', tokenize='unicode61 remove_diacritics 0'
+        )""")
+    database.execute("""
+        CREATE TRIGGER transaksjoner_fts_ny AFTER INSERT ON transaksjoner BEGIN
+            INSERT INTO transaksjoner_fts(rowid, beskrivelse) VALUES (new.id, new.beskrivelse);
+        END""")
+    database.execute("""
+        CREATE TRIGGER transaksjoner_fts_fjern AFTER DELETE ON transaksjoner BEGIN
+            INSERT INTO transaksjoner_fts(transaksjoner_fts, rowid, beskrivelse) VALUES ('delete', old.id, old.beskrivelse);
+        END""")
+    # bare når beskrivelsen endres, ellers ville hver oppdatering av fingeravtrykket skrevet til indeksen
+    database.execute("""
+        CREATE TRIGGER transaksjoner_fts_endre AFTER UPDATE OF beskrivelse ON transaksjoner BEGIN
+            INSERT INTO transaksjoner_fts(transaksjoner_fts, rowid, beskrivelse) VALUES ('delete', old.id, old.beskrivelse);
+            INSERT INTO transaksjoner_fts(rowid, beskrivelse) VALUES (new.id, new.beskrivelse);
+        END""")
+    database.execute("INSERT INTO transaksjoner_fts(transaksjoner_fts) VALUES ('rebuild')")
+
+
+_SAMMENDRAG_TAGS = (("sammendrag_kategori", "kategori_tag", "kategori_id"), ("sammendrag_person", "person_tag", "person_id"))
+
+
+def bygg_sammendrag_på_nytt(database) -> None:
+    """Regner ut alle sammendrag-tabellene fra bunnen av. Triggerne holder dem oppdatert etterpå"""
+    with database.transaksjon():
+        database.execute("DELETE FROM sammendrag_måned")
+        database.execute("""
+            INSERT INTO sammendrag_måned (måned, type, antall, sum)
+            SELECT substr(dato, 1, 7), type, count(*), sum(pris) FROM transaksjoner GROUP BY 1, 2""")
+
+        for sammendrag, tag_tabel, kolonne in _SAMMENDRAG_TAGS:
+            database.execute(f"DELETE FROM {sammendrag}")
+            database.execute(f"""
+                INSERT INTO {sammendrag} (måned, {kolonne}, type, antall, sum)
+                SELECT substr(t.dato, 1, 7), tag.{kolonne}, t.type, count(*), sum(t.pris)
+                FROM {tag_tabel} tag JOIN transaksjoner t ON t.id = tag.transaksjon_id GROUP BY 1, 2, 3""")
+
+
+def _sammendrag(database) -> None:
+    """
+    Versjon 4: antall og sum per måned og type, og per måned, type og kategori/person, til rapporter.py.
+    Triggere på transaksjoner og tag-tabellene holder dem oppdatert, så alle skrivemåter (skriv, import, oppdater, fjern) blir med.
+    """
+    database.execute("""
+        CREATE TABLE sammendrag_måned(
+            måned TEXT NOT NULL,
+            type TEXT NOT NULL,
+            antall INTEGER NOT NULL,
+            sum NUMERIC NOT NULL,
+            PRIMARY KEY (måned, type)
+        ) WITHOUT ROWID""")
+
+    database.execute("""
+        CREATE TRIGGER sammendrag_måned_ny AFTER INSERT ON transaksjoner BEGIN
+            INSERT INTO sammendrag_måned (måned, type, antall, sum) VALUES (substr(new.dato, 1, 7), new.type, 1, new.pris)
+            ON CONFLICT (måned, type) DO UPDATE SET antall = antall + 1, sum = sum + excluded.sum;
+        END""")
+    database.execute("""
+        CREATE TRIGGER sammendrag_måned_fjern AFTER DELETE ON transaksjoner BEGIN
+            UPDATE sammendrag_måned SET antall = antall - 1, sum = sum - old.pris
+            WHERE måned = substr(old.dato, 1, 7) AND type = old.type;
+            DELETE FROM sammendrag_måned WHERE måned = substr(old.dato, 1, 7) AND type = old.type AND antall = 0;
+        END""")
+    database.execute("""
+        CREATE TRIGGER sammendrag_måned_endre AFTER UPDATE OF pris, type, dato ON transaksjoner BEGIN
+            UPDATE sammendrag_måned SET antall = antall - 1, sum = sum - old.pris
+            WHERE måned = substr(old.dato, 1, 7) AND type = old.type;
+            DELETE FROM sammendrag_måned WHERE måned = substr(old.dato, 1, 7) AND type = old.type AND antall = 0;
+            INSERT INTO sammendrag_måned (måned, type, antall, sum) VALUES (substr(new.dato, 1, 7), new.type, 1, new.pris)
+            ON CONFLICT (måned, type) DO UPDATE SET antall = antall + 1, sum = sum + excluded.sum;
+        END""")
+
+    for sammendrag, tag_tabel, kolonne in _SAMMENDRAG_TAGS:
+        database.execute(f"""
+            CREATE TABLE {sammendrag}(
+                måned TEXT NOT NULL,
+                {kolonne} INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                antall INTEGER NOT NULL,
+                sum NUMERIC NOT NULL,
+                PRIMARY KEY (måned, {kolonne}, type)
+            ) WITHOUT ROWID""")
+
+        # trekker én transaksjon fra raden den hører til, og fjerner raden hvis den er tom
+        trekk_fra = f"""
+            UPDATE {sammendrag} SET antall = antall - 1, sum = sum - t.pris
+            FROM transaksjoner t WHERE t.id = old.transaksjon_id
+                AND {sammendrag}.måned = substr(t.dato, 1, 7) AND {sammendrag}.{kolonne} = old.{kolonne} AND {sammendrag}.type = t.type;
+            DELETE FROM {sammendrag} WHERE {kolonne} = old.{kolonne} AND antall = 0;"""
+        legg_til = f"""
+            INSERT INTO {sammendrag} (måned, {kolonne}, type, antall, sum)
+            SELECT substr(t.dato, 1, 7), new.{kolonne}, t.type, 1, t.pris FROM transaksjoner t WHERE t.id = new.transaksjon_id
+            ON CONFLICT (måned, {kolonne}, type) DO UPDATE SET antall = antall + 1, sum = sum + excluded.sum;"""
+
+        database.execute(f"CREATE TRIGGER {sammendrag}_ny AFTER INSERT ON {tag_tabel} BEGIN {legg_til} END")
+        database.execute(f"CREATE TRIGGER {sammendrag}_endre AFTER UPDATE ON {tag_tabel} BEGIN {trekk_fra} {legg_til} END")
+        # fjern_transaksjon sletter transaksjonen før tagsene, og da finnes den ikke lenger i trekk_fra.
+        # Derfor trekkes tagsene fra før transaksjonen slettes, og trekk_fra på tag-tabellen finner ingenting etterpå
+        database.execute(f"CREATE TRIGGER {sammendrag}_fjern AFTER DELETE ON {tag_tabel} BEGIN {trekk_fra} END")
+        database.execute(f"""
+            CREATE TRIGGER {sammendrag}_fjern_transaksjon BEFORE DELETE ON transaksjoner BEGIN
+                UPDATE {sammendrag} SET antall = antall - 1, sum = sum - old.pris
+                WHERE måned = substr(old.dato, 1, 7) AND type = old.type
+                    AND {kolonne} IN (SELECT {kolonne} FROM {tag_tabel} WHERE transaksjon_id = old.id);
+                DELETE FROM {sammendrag} WHERE måned = substr(old.dato, 1, 7) AND type = old.type AND antall = 0;
+            END""")
+        database.execute(f"""
+            CREATE TRIGGER {sammendrag}_endre_transaksjon AFTER UPDATE OF pris, type, dato ON transaksjoner BEGIN
+                UPDATE {sammendrag} SET antall = antall - 1, sum = sum - old.pris
+                WHERE måned = substr(old.dato, 1, 7) AND type = old.type
+                    AND {kolonne} IN (SELECT {kolonne} FROM {tag_tabel} WHERE transaksjon_id = old.id);
+                DELETE FROM {sammendrag} WHERE måned = substr(old.dato, 1, 7) AND type = old.type AND antall = 0;
+                INSERT INTO {sammendrag} (måned, {kolonne}, type, antall, sum)
+                SELECT substr(new.dato, 1, 7), {kolonne}, new.type, 1, new.pris FROM {tag_tabel} WHERE transaksjon_id = new.id
+                ON CONFLICT (måned, {kolonne}, type) DO UPDATE SET antall = antall + 1, sum = sum + excluded.sum;
+            END""")
+
+    bygg_sammendrag_på_nytt(database)
+
+
+MIGRERINGER = [
+    _grunnskjema,
+    _indekser_og_tag_nøkler,
+    _fulltekst_søk,
+    _sammendrag,
+]
+
+
+def hent_versjon(database) -> int:
+    return database.execute("PRAGMA user_version", fetchone=True).get("user_version")
+
+
+def migrer(database, til_versjon: int = None) -> list:
+    """
+    Kjører alle migreringene databasen mangler
+    :param database: Database
+    :param til_versjon: stopp på denne versjonen i stedet for den nyeste
+    :return: versjonene som ble kjørt
+    """
+    if til_versjon is None:
+        til_versjon = len(MIGRERINGER)
+
+    kjørt = []
+    while hent_versjon(database) < til_versjon:
+        # uten fremmednøkler, så tabeller kan bygges på nytt uten at DROP TABLE sletter noe med ON DELETE CASCADE.
+        # I stedet sjekkes alle nøklene før siste commit. Ikke før, gamle databaser kan ha tags uten transaksjon til versjon 2 rydder
+        with database.transaksjon(fremmednøkler=False):
+            versjon = hent_versjon(database)    # en annen prosess kan ha migrert mens vi ventet på skrivelåsen
+            if versjon >= til_versjon:
+                break
+
+            MIGRERINGER[versjon](database)
+
+            brudd = database.execute("PRAGMA foreign_key_check", fetchall=True) if versjon + 1 == til_versjon else []
+            if brudd:
+                raise sqlite3.IntegrityError(f"Migrering til versjon {versjon + 1} brøt fremmednøkler: {brudd[:10]}")
+
+            database.execute(f"PRAGMA user_version = {versjon + 1}")
+            kjørt.append(versjon + 1)
+
+    if kjørt:
+        database.les_skjema()
+
+    return kjørt
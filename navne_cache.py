@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+
+class NavneCache:
+    """
+    Begrenset LRU-cache for navn <-> id i personer- og kategorier-tabellen.
+    Tabellene er små og navnene gjentas hele tiden, så de fleste oppslag slipper å gå til databasen.
+    """
+    def __init__(self, maks_størrelse: int = 1024):
+        self.maks_størrelse = maks_størrelse
+        self._på_navn = OrderedDict()   # navn -> id, sist brukte sist
+        self._på_id = {}                # id -> navn
+        self._lås = threading.Lock()
+        self.treff = 0
+        self.bom = 0
+
+    def hent_id(self, navn: str) -> int or None:
+        with self._lås:
+            ide = self._på_navn.get(navn)
+            if ide is None:
+                self.bom += 1
+                return None
+
+            self._på_navn.move_to_end(navn)
+            self.treff += 1
+            return ide
+
+    def hent_navn(self, ide: int) -> str or None:
+        with self._lås:
+            navn = self._på_id.get(ide)
+            if navn is None:
+                self.bom += 1
+                return None
+
+            self._på_navn.move_to_end(navn)
+            self.treff += 1
+            return navn
+
+    def legg_til(self, ide: int, navn: str) -> None:
+        with self._lås:
+            self._fjern(ide, navn)
+            self._på_navn[navn] = ide
+            self._på_id[ide] = navn
+
+            while len(self._på_navn) > self.maks_størrelse:
+                _, gammel_id = self._på_navn.popitem(last=False)
+                self._på_id.pop(gammel_id, None)
+
+    def fjern(self, ide: int = None, navn: str = None) -> None:
+        with self._lås:
+            self._fjern(ide, navn)
+
+    def _fjern(self, ide, navn) -> None:
+        if ide in self._på_id:
+            self._på_navn.pop(self._på_id.pop(ide), None)
+
+        if navn in self._på_navn:
+            self._på_id.pop(self._på_navn.pop(navn), None)
+
+    def tøm(self) -> None:
+        with self._lås:
+            self._på_navn.clear()
+            self._på_id.clear()
+
+    def statistikk(self) -> dict:
+        """{treff, bom, treffrate, størrelse, maks_størrelse}"""
+        with self._lås:
+            oppslag = self.treff + self.bom
+            return {
+                "treff": self.treff,
+                "bom": self.bom,
+                "treffrate": self.treff / oppslag if oppslag else 0.0,
+                "størrelse": len(self._på_navn),
+                "maks_størrelse": self.maks_størrelse,
+            }
+
+    def nullstill_statistikk(self) -> None:
+        with self._lås:
+            self.treff = 0
+            self.bom = 0
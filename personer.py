@@ -1,12 +1,39 @@
-from sqlite3 import OperationalError
-from privat import _hent_rad_fra_tabel, _formater_svar, _finn_transaksjoner_på_id_liste
+from sqlite3 import OperationalError, IntegrityError
+from fingeravtrykk import oppdater_fingeravtrykk
+from navne_cache import NavneCache
+from privat import _hent_rad_fra_tabel, _formater_svar, _skriveoperasjon, _finn_transaksjoner_på_id_liste
 from retur_meldinger import *
 from validering import *
 
 class Personer:
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, cache_størrelse: int = 1024, varm_opp: bool = False):
+        """
+        :param cache_størrelse: maks antall navn i NavneCache-en som brukes av hent_på_navn og hent_på_id
+        :param varm_opp: last hele tabellen inn i cachen med en gang
+        """
         self.database = database
+        self.cache = NavneCache(cache_størrelse)
 
+        if varm_opp:
+            self.varm_opp_cache()
+
+
+    def varm_opp_cache(self) -> None:
+        """Laster så mange rader fra personer som det er plass til inn i cachen"""
+        for rad in self.database.execute("SELECT id, navn FROM personer LIMIT ?", (self.cache.maks_størrelse,), fetchall=True):
+            self.cache.legg_til(rad.get("id"), rad.get("navn"))
+
+
+    def _husk(self, rad: dict) -> None:
+        """Legger raden i cachen, men først når den er committet, så cachen aldri inneholder noe som blir rullet tilbake"""
+        self.database.etter_commit(lambda: self.cache.legg_til(rad.get("id"), rad.get("navn")))
+
+
+    def _glem(self, ide) -> None:
+        self.cache.fjern(ide=ide)
+        self.database.etter_commit(lambda: self.cache.fjern(ide=ide))   # en annen tråd kan ha lagt den inn igjen før commit
+
+    @_skriveoperasjon("personer")
     def legg_til(self, navn : str):
         """Legge til en ny person i databasen"""
         if not er_gyldig_tekst(navn):
@@ -14,6 +41,7 @@ class Personer:
 
         try:
             retur_verdi = self.database.execute("INSERT INTO personer(navn) VALUES (?) RETURNING *", (navn,), fetchone=True, commit=True)
+            self._husk(retur_verdi)
             return _formater_svar(OPPRETTET_NY, retur_verdi, "suksess")
 
         except OperationalError as e:
@@ -25,7 +53,15 @@ class Personer:
         if not er_helltall(iden):
             return _formater_svar(UGYLDIG_INPUT, [], f"forventet type int, fikk {iden} av typen {type(iden).__name__}")
 
-        return _hent_rad_fra_tabel(self.database, "personer", "id", iden, f"Fant ingen personer med iden {iden}")
+        navn = self.cache.hent_navn(iden)
+        if navn is not None:
+            return _formater_svar(SUKSESS, {"id": iden, "navn": navn}, "suksess")
+
+        svar = _hent_rad_fra_tabel(self.database, "personer", "id", iden, f"Fant ingen personer med iden {iden}")
+        if svar.get("status") == SUKSESS:
+            self._husk(svar.get("innhold"))
+
+        return svar
 
 
     def hent_på_navn(self, navn : str) -> dict:
@@ -33,7 +69,15 @@ class Personer:
         if not er_gyldig_tekst(navn):
             return _formater_svar(UGYLDIG_INPUT, [], f"forventet type str, fikk {navn} av typen {type(navn).__name__}")
 
-        return _hent_rad_fra_tabel(self.database, "personer", "navn", navn, f"Fant ingen personer med navn {navn}")
+        ide = self.cache.hent_id(navn)
+        if ide is not None:
+            return _formater_svar(SUKSESS, {"id": ide, "navn": navn}, "suksess")
+
+        svar = _hent_rad_fra_tabel(self.database, "personer", "navn", navn, f"Fant ingen personer med navn {navn}")
+        if svar.get("status") == SUKSESS:
+            self._husk(svar.get("innhold"))
+
+        return svar
 
 
     def hent_transaksjoner(self, person_id) -> dict:
@@ -44,11 +88,20 @@ class Personer:
         return _finn_transaksjoner_på_id_liste(self.database, transaksjon_ider)
 
 
+    @_skriveoperasjon("personer")
     def oppdater_person(self, person_id, person_navn) -> dict:
         """status: int, innhold: [], message: str"""
-        person = self.database.execute(
-            "UPDATE personer SET navn = ? WHERE id = ? RETURNING *", (person_navn, person_id,),
-            fetchone=True, commit=True)
+        try:
+            with self.database.transaksjon():
+                person = self.database.execute(
+                    "UPDATE personer SET navn = ? WHERE id = ? RETURNING *", (person_navn, person_id,),
+                    fetchone=True, commit=True)
+                oppdater_fingeravtrykk(self.database, self._transaksjon_ider(person_id))    # navnet er en del av fingeravtrykket
+                self._glem(person_id)
+                if person:
+                    self._husk(person)
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], f"Kunne ikke gi nytt navn til {person_id}, {person_navn} finnes fra før eller gir like transaksjoner")
 
         if not person:
             return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "Tomme celler. Kan være feil person_id")
@@ -56,9 +109,22 @@ class Personer:
         return _formater_svar(SUKSESS, person, "suksess")
 
 
+    @_skriveoperasjon("personer", "person_tag")
     def fjern_person(self, person_id) -> dict:
         """status: int, innhold: [], message: str"""
-        self.database.execute("DELETE FROM personer WHERE id = ?", (person_id,), commit=True)
-        self.database.execute("DELETE FROM person_tag WHERE person_id = ?", (person_id,), commit=True)
+        try:
+            with self.database.transaksjon():
+                transaksjon_ider = self._transaksjon_ider(person_id)
+                self.database.execute("DELETE FROM personer WHERE id = ?", (person_id,), commit=True)   # person_tag fjernes av ON DELETE CASCADE
+                oppdater_fingeravtrykk(self.database, transaksjon_ider)
+                self._glem(person_id)
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], f"Kan ikke fjerne {person_id}, da ville noen transaksjoner blitt like")
+
         return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
 
+
+    def _transaksjon_ider(self, person_id) -> list:
+        return [rad.get("transaksjon_id") for rad in
+                self.database.execute("SELECT transaksjon_id FROM person_tag WHERE person_id = ?", (person_id,), fetchall=True)]
+
@@ -1,22 +1,85 @@
+import base64
+import functools
+import inspect
 import json
+import re
 
 from database import Database
 import datetime
-from retur_meldinger import SUKSESS_INGEN_INNHOLD, SUKSESS
+from retur_meldinger import SUKSESS_INGEN_INNHOLD, SUKSESS, TABEL_FINNES_IKKE
 
-def _formater_svar(status: int, innhold: dict or list, melding: str) -> dict:
+_TRANSAKSJON_KOLONNER = "id, pris, type, dato, beskrivelse"   # alt unntatt fingeravtrykket, som bare er for intern bruk
+
+def _formater_svar(status: int, innhold: dict or list, melding: str, neste_peker: str = None) -> dict:
     """
     :param status: retur-kode. hentet fra "retur_meldinger.py" modulen
     :param innhold: innholdet i svaret
     :param melding: en forklaring på returkoden
-    :return: et dict med status, innhold og melding
+    :param neste_peker: peker til neste side, hvis svaret er en side og det finnes flere
+    :return: et dict med status, innhold og melding, og neste_peker hvis den er satt
     :rtype: dict
     """
-    return {
+    svar = {
         "status": status,
         "innhold": innhold,
         "melding": melding
     }
+    if neste_peker is not None:
+        svar["neste_peker"] = neste_peker
+
+    return svar
+
+_TAG_TABELLER = ("person_tag", "kategori_tag", "personer", "kategorier")
+
+def _skriveoperasjon(*tabeller):
+    """
+    For metoder på domeneklassene som skriver til databasen. Kallet går gjennom Database.kjør_skriving,
+    så det havner i skrivekøen hvis databasen har en, og returnerer det samme som før når committen er gjort.
+    Har databasen en resultat_cache, økes skriveversjonen til tabellene etter commit, så svar lest fra dem ikke brukes igjen.
+    :param tabeller: tabellene metoden kan skrive til, også de som endres av ON DELETE CASCADE
+    """
+    def dekorator(metode):
+        @functools.wraps(metode)
+        def gjennom_skrivekø(self, *args, **kwargs):
+            try:
+                return self.database.kjør_skriving(metode, self, *args, **kwargs)
+            finally:
+                cache = self.database.resultat_cache
+                if cache is not None:
+                    self.database.etter_commit(lambda: cache.skrevet(tabeller))     # ingenting hvis det blir rullet tilbake
+
+        return gjennom_skrivekø
+
+    return dekorator
+
+def _mellomlagret(*tabeller):
+    """
+    For lesemetoder på domeneklassene. Har databasen en resultat_cache, hentes svaret derfra så lenge ingen av tabellene er skrevet til.
+    Inne i en transaksjon går kallet alltid til databasen, siden transaksjonen kan se sine egne skrivinger før commit.
+    :param tabeller: tabellene metoden leser fra. Med med_alt=True kommer personer, kategorier og tag-tabellene i tillegg
+    """
+    def dekorator(metode):
+        signatur = inspect.signature(metode)
+
+        @functools.wraps(metode)
+        def fra_cache(self, *args, **kwargs):
+            cache = self.database.resultat_cache
+            if cache is None or self.database.i_transaksjon():
+                return metode(self, *args, **kwargs)
+
+            try:
+                bundet = signatur.bind(self, *args, **kwargs)
+            except TypeError:
+                return metode(self, *args, **kwargs)    # metoden gir feilen selv
+            bundet.apply_defaults()
+
+            argumenter = tuple(bundet.arguments.items())[1:]    # uten self
+            lest_fra = tabeller + (_TAG_TABELLER if bundet.arguments.get("med_alt") else ())
+            return cache.hent_eller_kjør(metode.__qualname__, argumenter, lest_fra, lambda: metode(self, *args, **kwargs))
+
+        return fra_cache
+
+    return dekorator
 
 def _hent_key_med_value_fra_dict(dictionary: dict, value) -> str:
     """
@@ -40,8 +103,12 @@ def _hent_rad_fra_tabel(database: Database, tabelnavn : str, kolonnenavn : str,
     :param kolonnenavn: filteret
     :param verdi: filterverdi
     :param feilmelding: returmelding hvis ingen element ble funnet
-    :return: _formater_svar med elementet som innhold, eller [] hvis ingen element
+    :return: _formater_svar med elementet som innhold, eller [] hvis ingen element.
+        TABEL_FINNES_IKKE hvis tabellen eller kolonnen ikke finnes i Database.skjema, siden navnene settes rett inn i spørringen
     """
+    if not database.skjema.har_kolonne(tabelnavn, kolonnenavn):
+        return _formater_svar(TABEL_FINNES_IKKE, [], f"Fant ikke kolonnen {kolonnenavn} i tabellen {tabelnavn}")
+
     rad = database.execute(f"SELECT * FROM {tabelnavn} WHERE {kolonnenavn} = ?", (verdi,), fetchone=True)
 
     if not rad:
@@ -59,7 +126,7 @@ def _finn_transaksjoner_på_id_liste(database: Database, transaksjon_ider: dict)
 
     spørsmålstegn_tekst = ",".join(["?"] * len(id_liste))
 
-    query = f"SELECT * FROM transaksjoner WHERE id in ({spørsmålstegn_tekst})"
+    query = f"SELECT {_TRANSAKSJON_KOLONNER} FROM transaksjoner WHERE id in ({spørsmålstegn_tekst})"
     transaksjoner = database.execute(query, id_liste, fetchall=True)
 
     return _formater_svar(SUKSESS, transaksjoner, "suksess")
@@ -82,6 +149,64 @@ def _str_til_str_list_parser(tekst: str) -> list:
     return tekst_liste
 
 
+def _tolk_csv_rad(rad: dict) -> dict:
+    """
+    Gjør om en rad fra csv.DictReader til samme form som input til skriv_transaksjon_med_alt
+    :param rad: {"pris": str, "type": str, "dato": str, "beskrivelse": str, "kategorier": str, "personer": str}
+    :return: {"pris": int, "type": str, "dato": str, "beskrivelse": str, "kategorier": [str], "personer": [str]}
+    :raises ValueError: hvis prisen ikke er et heltall
+    """
+    return {
+        "pris": int(rad.get("pris")),
+        "type": rad.get("type"),
+        "dato": rad.get("dato"),
+        "beskrivelse": rad.get("beskrivelse"),
+        "kategorier": sorted(_str_til_str_list_parser(rad.get("kategorier") or "[]")),
+        "personer": sorted(_str_til_str_list_parser(rad.get("personer") or "[]")),
+    }
+
+
+def _i_biter(elementer: list, størrelse: int = 900) -> list:
+    """Deler opp en liste i biter, så IN (?, ?, ...) ikke går over sqlite sin grense for antall parametere"""
+    for start in range(0, len(elementer), størrelse):
+        yield elementer[start:start + størrelse]
+
+
+def _lag_peker(transaksjon: dict, kolonne: str = "dato") -> str:
+    """
+    Peker til raden etter transaksjonen, sortert på (kolonne, id). Klienten skal bare sende den tilbake, ikke lese den
+    :param kolonne: kolonnen siden er sortert på
+    """
+    verdi = json.dumps([transaksjon.get(kolonne), transaksjon.get("id")], separators=(",", ":"))
+    return base64.urlsafe_b64encode(verdi.encode("utf-8")).decode("ascii")
+
+
+def _les_peker(peker: str) -> tuple:
+    """
+    :return: (verdi, id) fra _lag_peker, der verdi er fra kolonnen siden er sortert på
+    :raises ValueError: hvis pekeren ikke er laget av _lag_peker
+    """
+    try:
+        verdi, ide = json.loads(base64.urlsafe_b64decode(peker.encode("ascii")))
+    except (TypeError, ValueError, AttributeError, UnicodeError) as feil:
+        raise ValueError(f"Ugyldig peker {peker}") from feil
+
+    if not isinstance(verdi, (str, int, float)) or isinstance(verdi, bool) or not isinstance(ide, int) or isinstance(ide, bool):
+        raise ValueError(f"Ugyldig peker {peker}")
+
+    return verdi, ide
+
+
+def _søke_ord(tekst: str) -> list[str]:
+    """Deler søketeksten opp i ord, uten tegn som betyr noe i FTS5 sitt spørrespråk"""
+    return re.findall(r"\w+", tekst)
+
+
+def _lag_fts_spørring(ord: list[str]) -> str:
+    """Alle ordene må finnes som starten på et ord i beskrivelsen: ["rema", "10"] -> '"rema"* "10"*'"""
+    return " ".join(f'"{o}"*' for o in ord)
+
+
 def _filtrer_ut_tag_navn_fra_transaksjon(transaksjon) -> list[str]:
     alle_navn = []
     navn_i_transaksjon = transaksjon.get("innhold")
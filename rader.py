@@ -0,0 +1,100 @@
+"""
+Kompakte alternativer til én dict per rad, for store resultater. Velges med radformat:
+    "dict"     én dict per rad, som før
+    "tuppel"   én tuppel per rad, i en TuppelRader-liste som har kolonnenavnene én gang
+    "post"     én __slots__-post per rad, med felt for hver kolonne. Én klasse per sett med kolonner
+    "visning"  én RadVisning per rad, et Mapping over tuppelen som slår opp kolonnene når de brukes
+"post" og "visning" har get og [] som en dict, så koden som leser radene trenger ikke endres.
+"""
+import dataclasses
+import functools
+import keyword
+from collections.abc import Mapping
+
+RADFORMATER = ("dict", "tuppel", "post", "visning")
+
+
+class TuppelRader(list):
+    """Liste med rader som tupler, og kolonnenavnene én gang i kolonner"""
+    def __init__(self, kolonner: tuple, rader=()):
+        super().__init__(rader)
+        self.kolonner = kolonner
+
+    def som_dicts(self) -> list[dict]:
+        return [dict(zip(self.kolonner, rad)) for rad in self]
+
+
+class RadVisning(Mapping):
+    """Leser en rad som en dict uten å lage en. Alle radene fra samme spørring deler indeks (kolonnenavn -> posisjon)"""
+    __slots__ = ("_indeks", "_verdier")
+
+    def __init__(self, indeks: dict, verdier: tuple):
+        self._indeks = indeks
+        self._verdier = verdier
+
+    def __getitem__(self, kolonne):
+        return self._verdier[self._indeks[kolonne]]
+
+    def __iter__(self):
+        return iter(self._indeks)
+
+    def __len__(self):
+        return len(self._indeks)
+
+    def __repr__(self):
+        return f"RadVisning({dict(self)})"
+
+
+class _Post:
+    """Felles metoder for postklassene fra postklasse, så de kan leses som en dict"""
+    __slots__ = ()
+    _kolonner = ()
+    _felt = {}
+
+    def get(self, kolonne, standard=None):
+        felt = self._felt.get(kolonne)
+        return standard if felt is None else getattr(self, felt)
+
+    def __getitem__(self, kolonne):
+        if kolonne not in self._felt:
+            raise KeyError(kolonne)
+        return getattr(self, self._felt[kolonne])
+
+    def keys(self):
+        return self._kolonner
+
+    def som_dict(self) -> dict:
+        return {kolonne: getattr(self, felt) for kolonne, felt in self._felt.items()}
+
+
+@functools.lru_cache(maxsize=256)
+def postklasse(kolonner: tuple) -> type:
+    """Lager (og husker) en __slots__-klasse med et felt per kolonne. Kolonner som ikke kan være feltnavn, som count(*) eller get, blir kolonne_<n>"""
+    felt = tuple(kolonne if kolonne.isidentifier() and not keyword.iskeyword(kolonne) and not hasattr(_Post, kolonne)
+                 else f"kolonne_{i}" for i, kolonne in enumerate(kolonner))
+
+    return dataclasses.make_dataclass("Post", felt, bases=(_Post,), slots=True,
+                                      namespace={"_kolonner": kolonner, "_felt": dict(zip(kolonner, felt))})
+
+
+def lag_rader(kolonner: tuple, rader: list[tuple], radformat: str) -> list:
+    """
+    :param kolonner: kolonnenavnene, i samme rekkefølge som verdiene i hver rad
+    :param rader: radene som tupler, fra en cursor uten row_factory
+    :param radformat: en av RADFORMATER
+    """
+    if radformat == "dict":
+        return [dict(zip(kolonner, rad)) for rad in rader]
+
+    if radformat == "tuppel":
+        return TuppelRader(kolonner, rader)
+
+    if radformat == "post":
+        klasse = postklasse(kolonner)
+        return [klasse(*rad) for rad in rader]
+
+    if radformat == "visning":
+        indeks = {kolonne: i for i, kolonne in enumerate(kolonner)}
+        return [RadVisning(indeks, rad) for rad in rader]
+
+    raise ValueError(f"Ukjent radformat {radformat}, forventet en av {RADFORMATER}")
@@ -0,0 +1,117 @@
+from sqlite3 import OperationalError
+from migreringer import bygg_sammendrag_på_nytt
+from privat import _formater_svar
+from retur_meldinger import *
+from validering import *
+
+# hva hver gruppering heter i spørringen. s er sammendrag-tabellen, k og p er kategorier og personer
+GRUPPERINGER = {
+    "år": "substr(s.måned, 1, 4)",
+    "måned": "s.måned",
+    "type": "s.type",
+    "kategori": "k.navn",
+    "person": "p.navn",
+}
+
+class Rapporter:
+    """
+    Summer, antall og snitt gruppert på måned, type, kategori og person.
+    Leser fra sammendrag-tabellene som triggerne i migreringer.py holder oppdatert, så en rapport koster
+    like mye uansett hvor mange transaksjoner det er, bare hvor mange måneder, kategorier og personer.
+    En transaksjon med flere kategorier (eller personer) telles med én gang på hver av dem.
+    """
+    def __init__(self, database: Database):
+        self.database = database
+
+
+    def oppsummer(self, grupper: list[str] = ("måned", "type"), fra_måned: str = None, til_måned: str = None,
+                  handling: str = None, kategori: str = None, person: str = None) -> dict:
+        """
+        :param grupper: hva det skal grupperes på, noen av "år", "måned", "type", "kategori" og "person".
+            Ikke både "kategori" og "person". Tom liste gir totalen
+        :param fra_måned: "ÅÅÅÅ-MM", ta bare med måneder fra og med denne
+        :param til_måned: "ÅÅÅÅ-MM", ta bare med måneder til og med denne
+        :param handling: ta bare med transaksjoner av denne typen
+        :param kategori: ta bare med transaksjoner med en kategori med dette navnet
+        :param person: ta bare med transaksjoner med en person med dette navnet
+        :return: _formater_svar[innhold] -> [{<hver gruppe>, antall, sum, snitt}], sortert på gruppene
+        """
+        if not isinstance(grupper, (list, tuple)) or not all(isinstance(gruppe, str) for gruppe in grupper):
+            return _formater_svar(UGYLDIG_INPUT, [], f"forventet grupper som en liste med tekst, fikk {grupper} av typen {type(grupper).__name__}")
+
+        for gruppe in grupper:
+            if gruppe not in GRUPPERINGER:
+                return _formater_svar(UGYLDIG_INPUT, [], f"Kan ikke gruppere på {gruppe}, forventet noen av {list(GRUPPERINGER)}")
+
+        med_kategori = "kategori" in grupper or kategori is not None
+        med_person = "person" in grupper or person is not None
+        if med_kategori and med_person:
+            return _formater_svar(UGYLDIG_INPUT, [], "Kan ikke gruppere eller filtrere på både kategori og person")
+
+        filtere = []
+        filter_verdier = []
+
+        for måned, tegn in ((fra_måned, ">="), (til_måned, "<=")):
+            if måned is not None:
+                if not er_gyldig_måned(måned):
+                    return _formater_svar(UGYLDIG_INPUT, [], f"forventet måned som ÅÅÅÅ-MM, fikk {måned} av typen {type(måned).__name__}")
+                filtere.append(f"s.måned {tegn} ?")
+                filter_verdier.append(måned)
+
+        if handling is not None:
+            if not er_gyldig_handling(handling):
+                return _formater_svar(UGYLDIG_INPUT, [], f'Feil type handling. forventet "innskudd", "uttak", "utlegg" eller "tilbakebetaling" fikk "{handling}"')
+            filtere.append("s.type = ?")
+            filter_verdier.append(handling)
+
+        for navn, kolonne in ((kategori, "k.navn"), (person, "p.navn")):
+            if navn is not None:
+                if not er_gyldig_tekst(navn):
+                    return _formater_svar(UGYLDIG_INPUT, [], f"forventet type str, fikk {navn} av typen {type(navn).__name__}")
+                filtere.append(f"{kolonne} = ?")
+                filter_verdier.append(navn)
+
+        if med_kategori:
+            tabel = "sammendrag_kategori s JOIN kategorier k ON k.id = s.kategori_id"
+        elif med_person:
+            tabel = "sammendrag_person s JOIN personer p ON p.id = s.person_id"
+        else:
+            tabel = "sammendrag_måned s"
+
+        kolonner = "".join(f"{GRUPPERINGER[gruppe]} AS {gruppe}, " for gruppe in grupper)
+        filter_tekst = f" WHERE {' AND '.join(filtere)}" if filtere else ""
+        gruppering = f" GROUP BY {', '.join(grupper)} ORDER BY {', '.join(grupper)}" if grupper else ""
+
+        try:
+            rader = self.database.execute(f"""
+                SELECT {kolonner}sum(s.antall) AS antall, sum(s.sum) AS sum, CAST(sum(s.sum) AS REAL) / sum(s.antall) AS snitt
+                FROM {tabel}{filter_tekst}{gruppering}""", tuple(filter_verdier), fetchall=True)
+        except OperationalError as e:
+            return _formater_svar(TABEL_FINNES_IKKE, [], f"Fant ikke sammendrag-tabellene, er databasen migrert? feilmelding {e}")
+
+        rader = [rad for rad in rader if rad.get("antall")]    # uten grupper gir en tom tabell én rad med NULL
+        if not rader:
+            return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "Fant ingen transaksjoner")
+
+        return _formater_svar(SUKSESS, rader, "suksess")
+
+
+    def per_måned(self, fra_måned: str = None, til_måned: str = None, handling: str = None) -> dict:
+        """status: int, innhold: [{måned, type, antall, sum, snitt}], message: str"""
+        return self.oppsummer(["måned", "type"], fra_måned, til_måned, handling)
+
+
+    def per_kategori(self, fra_måned: str = None, til_måned: str = None, handling: str = None, per_måned: bool = True) -> dict:
+        """status: int, innhold: [{måned, kategori, type, antall, sum, snitt}], message: str. Uten måned hvis per_måned er False"""
+        return self.oppsummer(["måned", "kategori", "type"] if per_måned else ["kategori", "type"], fra_måned, til_måned, handling)
+
+
+    def per_person(self, fra_måned: str = None, til_måned: str = None, handling: str = None, per_måned: bool = True) -> dict:
+        """status: int, innhold: [{måned, person, type, antall, sum, snitt}], message: str. Uten måned hvis per_måned er False"""
+        return self.oppsummer(["måned", "person", "type"] if per_måned else ["person", "type"], fra_måned, til_måned, handling)
+
+
+    def bygg_på_nytt(self) -> dict:
+        """Regner ut sammendragene på nytt fra transaksjonene, hvis de av en eller annen grunn ikke stemmer"""
+        bygg_sammendrag_på_nytt(self.database)
+        return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
@@ -0,0 +1,130 @@
+import pickle
+import threading
+from collections import OrderedDict
+
+
+class ResultatCache:
+    """
+    Begrenset LRU-cache for svar fra lesemetodene i domeneklassene, på (metode, argumenter).
+    Hver tabell har en skriveversjon som skriveoperasjonene øker etter commit (se _skriveoperasjon i privat.py).
+    Et svar lagres med versjonene til tabellene det ble lest fra, og brukes bare så lenge ingen av dem har endret seg,
+    så en skriving til person_tag ikke kaster ut svar som bare leste transaksjoner.
+
+    Svarene lagres pickle-et. Det gir størrelsen i bytes, og hvert treff blir en ny kopi, så den som kaller kan endre på svaret.
+    Svar som ikke kan pickles (som radformat "post") lagres ikke.
+    Skrivinger som ikke går gjennom domeneklassene må meldes med skrevet(), eller tøm().
+    """
+    def __init__(self, maks_antall: int = 1024, maks_bytes: int = 64 * 1024 * 1024):
+        self.maks_antall = maks_antall
+        self.maks_bytes = maks_bytes
+        self._poster = OrderedDict()     # nøkkel -> (versjoner, pickle-et svar), sist brukte sist
+        self._bytes = 0
+        self._versjoner = {}             # tabell -> skriveversjon
+        self._epoke = 0                  # økes av tøm(), så svar som leses mens den tømmes ikke blir lagret
+        self._lås = threading.Lock()
+        self.treff = 0
+        self.bom = 0
+        self.utdaterte = 0
+        self.ikke_lagret = 0
+        self._per_metode = {}            # metode -> [treff, bom]
+
+    def _gjeldende(self, tabeller: tuple) -> tuple:
+        return (self._epoke, *(self._versjoner.get(tabell, 0) for tabell in tabeller))
+
+    def hent_eller_kjør(self, metode: str, argumenter, tabeller: tuple, funksjon):
+        """
+        :param metode: navnet på lesemetoden, for nøkkelen og statistikken
+        :param argumenter: argumentene til metoden. repr() av dem er en del av nøkkelen
+        :param tabeller: tabellene svaret leses fra
+        :param funksjon: kalles uten argumenter og gir svaret hvis det ikke ligger i cachen
+        :return: svaret, som en kopi hvis det kom fra cachen
+        """
+        nøkkel = (metode, repr(argumenter))
+        with self._lås:
+            versjoner = self._gjeldende(tabeller)    # før lesingen, så en skriving under den gjør svaret utdatert
+            post = self._poster.get(nøkkel)
+            telling = self._per_metode.setdefault(metode, [0, 0])
+
+            if post is not None and post[0] == versjoner:
+                self._poster.move_to_end(nøkkel)
+                self.treff += 1
+                telling[0] += 1
+                data = post[1]
+            else:
+                if post is not None:
+                    self.utdaterte += 1
+                    self._fjern(nøkkel)
+                self.bom += 1
+                telling[1] += 1
+                data = None
+
+        if data is not None:
+            return pickle.loads(data)
+
+        svar = funksjon()
+        self._lagre(nøkkel, tabeller, versjoner, svar)
+        return svar
+
+    def _lagre(self, nøkkel: tuple, tabeller: tuple, versjoner: tuple, svar) -> None:
+        try:
+            data = pickle.dumps(svar, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            with self._lås:
+                self.ikke_lagret += 1
+            return
+
+        with self._lås:
+            if len(data) > self.maks_bytes or self._gjeldende(tabeller) != versjoner:   # for stort, eller allerede utdatert
+                self.ikke_lagret += 1
+                return
+
+            self._fjern(nøkkel)
+            self._poster[nøkkel] = (versjoner, data)
+            self._bytes += len(data)
+
+            while len(self._poster) > self.maks_antall or self._bytes > self.maks_bytes:
+                _, (_, gammel) = self._poster.popitem(last=False)
+                self._bytes -= len(gammel)
+
+    def _fjern(self, nøkkel: tuple) -> None:
+        post = self._poster.pop(nøkkel, None)
+        if post is not None:
+            self._bytes -= len(post[1])
+
+    def skrevet(self, tabeller) -> None:
+        """Øker skriveversjonen til tabellene, så svar som er lest fra dem ikke brukes igjen"""
+        with self._lås:
+            for tabell in tabeller:
+                self._versjoner[tabell] = self._versjoner.get(tabell, 0) + 1
+
+    def tøm(self) -> None:
+        with self._lås:
+            self._poster.clear()
+            self._bytes = 0
+            self._epoke += 1
+
+    def statistikk(self) -> dict:
+        """{treff, bom, treffrate, utdaterte, ikke_lagret, størrelse, bytes, maks_antall, maks_bytes, per_metode: {metode: {treff, bom, treffrate}}}"""
+        with self._lås:
+            oppslag = self.treff + self.bom
+            return {
+                "treff": self.treff,
+                "bom": self.bom,
+                "treffrate": self.treff / oppslag if oppslag else 0.0,
+                "utdaterte": self.utdaterte,
+                "ikke_lagret": self.ikke_lagret,
+                "størrelse": len(self._poster),
+                "bytes": self._bytes,
+                "maks_antall": self.maks_antall,
+                "maks_bytes": self.maks_bytes,
+                "per_metode": {metode: {"treff": treff, "bom": bom, "treffrate": treff / (treff + bom) if treff + bom else 0.0}
+                               for metode, (treff, bom) in sorted(self._per_metode.items())},
+            }
+
+    def nullstill_statistikk(self) -> None:
+        with self._lås:
+            self.treff = 0
+            self.bom = 0
+            self.utdaterte = 0
+            self.ikke_lagret = 0
+            self._per_metode.clear()
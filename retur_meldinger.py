@@ -9,6 +9,7 @@ UGYLDIG_INPUT = 400
 IKKE_AUTORISERT = 401
 IKKE_FUNNET = 404
 KONFLIKT = 409
+FOR_STOR = 413   #forespørselen er større enn det som tillates
 
 #Systemfeil
 GENERELL_FEIL = 500
@@ -0,0 +1,362 @@
+"""
+HTTP/JSON-server over Transaksjoner, Personer, Kategorier og Rapporter, med bare standardbiblioteket.
+Alle forespørslene deler én Database, så tilkoblingene i poolen gjenbrukes, og HTTP/1.1 keep-alive gjør at klienten
+kan sende mange forespørsler over samme tcp-tilkobling. Hver tilkobling får sin egen tråd.
+
+    GET  /transaksjoner/hent_på_id?iden=5
+    POST /transaksjoner/skriv_transaksjon_med_alt   {"beløp": 100, "handling": "uttak", "dato": "2024-01-01", "beskrivelse": "kaffe"}
+    POST /transaksjoner/spørring   {"pris_mellom": [100, 500], "typer": [["uttak"]], "sorter": ["pris", true], "grense": 50}
+
+Stien prosent-kodes som vanlig i URL-er (hent_på_id blir hent_p%C3%A5_id).
+Argumentene er nøkkelordene til metoden, fra json-kroppen og/eller query-strengen. Verdiene i query-strengen gjøres om etter typen
+parameteren har i metoden (int, bool, og json for lister og dicts), resten blir tekst. Filtrene til spørring er json-lister eller tekst.
+Lesemetodene kan brukes med GET og POST, resten bare med POST. GET / gir alle endepunktene.
+Svaret er alltid _formater_svar-konvolutten som json, med HTTP-status fra HTTP_STATUS.
+iterer_-metodene, og spørring med "strøm": true, sendes med Transfer-Encoding: chunked etter hvert som radene leses,
+som én json-konvolutt eller som NDJSON hvis klienten sender Accept: application/x-ndjson. Se json_strøm.py.
+
+Bruk: python -m server <databasefil> [--vert 127.0.0.1] [--port 8000] [--tilkoblinger 8] [--skrivekø]
+"""
+import argparse
+import inspect
+import json
+import logging
+import socket
+import typing
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from database import Database
+from json_strøm import _til_json, som_json, som_ndjson
+from kategorier import Kategorier
+from personer import Personer
+from privat import _formater_svar
+from rapporter import Rapporter
+from retur_meldinger import *
+from transaksjoner import Transaksjoner
+
+logger = logging.getLogger("server")
+
+# SUKSESS_INGEN_INNHOLD blir 200, siden HTTP 204 ikke kan ha en kropp, og klienten skal få meldingen
+HTTP_STATUS = {
+    SUKSESS: 200,
+    OPPRETTET_NY: 201,
+    SUKSESS_INGEN_INNHOLD: 200,
+    UGYLDIG_INPUT: 400,
+    IKKE_AUTORISERT: 401,
+    IKKE_FUNNET: 404,
+    KONFLIKT: 409,
+    FOR_STOR: 413,
+    GENERELL_FEIL: 500,
+    TABEL_FINNES_IKKE: 500,
+}
+
+ENDEPUNKTER = {
+    "transaksjoner": {
+        "les": ("hent_på_id", "hent_transaksjoner_på_pris", "hent_transaksjoner_på_type", "hent_transaksjoner_mellom_datoer",
+                "hent_transaksjoner_på_dato", "hent_transaksjoner_på_beskrivelse", "søk_på_beskrivelse", "hent_personer",
+                "hent_kategorier", "hent_transaksjon_med_alt", "hent_mange_med_alt", "finn_transaksjoner_med_info",
+                "iterer_transaksjoner_på_pris", "iterer_transaksjoner_på_type", "iterer_transaksjoner_mellom_datoer",
+                "iterer_transaksjoner_på_dato", "iterer_transaksjoner_på_beskrivelse"),
+        "skriv": ("skriv", "skriv_kategori", "skriv_person", "skriv_transaksjon_med_alt", "skriv_mange", "oppdater_transaksjon",
+                  "oppdater_kategori_tag", "oppdater_person_tag", "fjern_transaksjon", "fjern_transaksjoner",
+                  "fjern_transaksjons_kategori", "fjern_transaksjons_person"),
+    },
+    "personer": {
+        "les": ("hent_på_id", "hent_på_navn", "hent_transaksjoner"),
+        "skriv": ("legg_til", "oppdater_person", "fjern_person"),
+    },
+    "kategorier": {
+        "les": ("hent_på_id", "hent_på_navn", "hent_transaksjoner"),
+        "skriv": ("legg_til", "oppdater_kategori", "fjern_kategori"),
+    },
+    "rapporter": {
+        "les": ("oppsummer", "per_måned", "per_kategori", "per_person"),
+        "skriv": ("bygg_på_nytt",),
+    },
+}
+
+# metodene på spørring.Spørring som kan brukes fra /transaksjoner/spørring, resten av nøklene går til hent()
+SPØRRING_FILTRE = ("id_er", "pris", "pris_mellom", "datoer", "dato", "typer", "beskrivelse_lik", "beskrivelse_inneholder", "tekst",
+                   "har_kategorier", "har_personer", "sorter")
+SPØRRING_SIDE = ("grense", "peker", "med_alt", "strøm")
+
+MAKS_KROPP = 10 * 1024 * 1024
+
+
+def _parameter_type(parameter: inspect.Parameter):
+    """Typen parameteren forventer: annotasjonen, ellers typen til standardverdien, ellers str"""
+    if parameter.annotation is not inspect.Parameter.empty:
+        return parameter.annotation
+    if parameter.default is not inspect.Parameter.empty and parameter.default is not None:
+        return type(parameter.default)
+    return str
+
+
+def _tolk_verdi(tekst: str, forventet):
+    """
+    En verdi fra query-strengen, der alt er tekst, som typen parameteren forventer.
+    Bare lister og dicts leses som json, så handling=5 blir teksten "5" og ikke et tall
+    :raises ValueError: hvis teksten ikke kan bli den typen
+    """
+    forventet = typing.get_origin(forventet) or forventet
+    if forventet is bool:
+        if tekst.lower() not in ("true", "false", "1", "0"):
+            raise ValueError(f"forventet true eller false, fikk {tekst}")
+        return tekst.lower() in ("true", "1")
+    if forventet is int:
+        return int(tekst)
+    if forventet is float:
+        return float(tekst)
+    if forventet in (list, tuple, set, dict):
+        return json.loads(tekst)
+    return tekst
+
+
+def _tolk_filter(tekst: str):
+    """Et filter til /transaksjoner/spørring fra query-strengen: en json-liste eller et json-objekt med argumentene, ellers én tekstverdi"""
+    try:
+        verdi = json.loads(tekst)
+    except ValueError:
+        return tekst
+    return verdi if isinstance(verdi, (list, dict)) else tekst
+
+
+def _tolk_query(query: dict, typer: dict) -> dict:
+    """
+    :param query: {nøkkel: [tekst]} fra parse_qs
+    :param typer: {nøkkel: type} for parameterne. Ukjente nøkler blir tekst, og gir feil når argumentene sjekkes mot metoden
+    :raises ValueError: hvis en verdi ikke passer med typen, eller en nøkkel som ikke er en liste er med flere ganger
+    """
+    tolket = {}
+    for nøkkel, verdier in query.items():
+        forventet = typer.get(nøkkel, str)
+        if forventet is _tolk_filter:
+            if len(verdier) > 1:
+                raise ValueError(f"{nøkkel} er med flere ganger")
+            tolket[nøkkel] = _tolk_filter(verdier[0])
+        elif len(verdier) > 1:
+            if (typing.get_origin(forventet) or forventet) not in (list, tuple, set):
+                raise ValueError(f"{nøkkel} er med flere ganger, men er ikke en liste")
+            tolket[nøkkel] = list(verdier)
+        else:
+            try:
+                tolket[nøkkel] = _tolk_verdi(verdier[0], forventet)
+            except ValueError as feil:
+                raise ValueError(f"{nøkkel}: {feil}") from feil
+    return tolket
+
+
+class Backend:
+    """Domeneklassene over én delt Database. Uavhengig av HTTP, så den kan brukes fra andre servere også"""
+    def __init__(self, database: Database):
+        self.database = database
+        self.personer = Personer(database)
+        self.kategorier = Kategorier(database)
+        self.transaksjoner = Transaksjoner(database, self.personer, self.kategorier)
+        self.rapporter = Rapporter(database)
+
+    def håndter(self, http_metode: str, ressurs: str, navn: str, argumenter: dict, query: dict = None) -> dict:
+        """
+        :param http_metode: "GET" eller "POST"
+        :param argumenter: argumentene fra json-kroppen, med typene de har der
+        :param query: {nøkkel: [tekst]} fra query-strengen. Gjøres om etter typene til parameterne i metoden, se _tolk_verdi.
+            Verdier i argumenter vinner over query
+        :return: _formater_svar fra metoden, eller UGYLDIG_INPUT/IKKE_FUNNET hvis forespørselen ikke passer med noe endepunkt
+        """
+        if ressurs == "transaksjoner" and navn == "spørring":
+            typer = {**{filter: _tolk_filter for filter in SPØRRING_FILTRE}, "grense": int, "peker": str, "med_alt": bool, "strøm": bool}
+            try:
+                argumenter = {**_tolk_query(query or {}, typer), **argumenter}
+            except ValueError as feil:
+                return _formater_svar(UGYLDIG_INPUT, [], f"Ugyldig verdi i query-strengen: {feil}")
+            return self._spørring(argumenter)
+
+        endepunkter = ENDEPUNKTER.get(ressurs)
+        if endepunkter is None or navn not in endepunkter["les"] + endepunkter["skriv"]:
+            return _formater_svar(IKKE_FUNNET, [], f"Fant ikke endepunktet /{ressurs}/{navn}")
+
+        if http_metode == "GET" and navn not in endepunkter["les"]:
+            return _formater_svar(UGYLDIG_INPUT, [], f"/{ressurs}/{navn} endrer data, og må sendes med POST")
+
+        metode = getattr(getattr(self, ressurs), navn)
+        signatur = inspect.signature(metode)
+        try:
+            typer = {parameter.name: _parameter_type(parameter) for parameter in signatur.parameters.values()}
+            argumenter = {**_tolk_query(query or {}, typer), **argumenter}
+        except ValueError as feil:
+            return _formater_svar(UGYLDIG_INPUT, [], f"Ugyldig verdi i query-strengen til /{ressurs}/{navn}: {feil}")
+
+        try:
+            signatur.bind(**argumenter)
+        except TypeError as feil:
+            return _formater_svar(UGYLDIG_INPUT, [], f"Feil argumenter til /{ressurs}/{navn}: {feil}")
+
+        return metode(**argumenter)
+
+    def _spørring(self, argumenter: dict) -> dict:
+        """
+        {filter: argumenter, ..., grense, peker, med_alt, strøm}. Argumentene er en liste (posisjonelle), en dict (nøkkelord) eller én verdi.
+        Filtrene brukes i rekkefølgen i json-objektet. Med strøm blir grense og peker ignorert, og alle som passer strømmes
+        """
+        spørring = self.transaksjoner.spørring()
+        for filter, verdi in argumenter.items():
+            if filter in SPØRRING_SIDE:
+                continue
+            if filter not in SPØRRING_FILTRE:
+                return _formater_svar(UGYLDIG_INPUT, [], f"Ukjent filter {filter}, forventet en av {SPØRRING_FILTRE + SPØRRING_SIDE}")
+
+            try:
+                if isinstance(verdi, list):
+                    getattr(spørring, filter)(*verdi)
+                elif isinstance(verdi, dict):
+                    getattr(spørring, filter)(**verdi)
+                else:
+                    getattr(spørring, filter)(verdi)
+            except TypeError as feil:
+                return _formater_svar(UGYLDIG_INPUT, [], f"Feil argumenter til {filter}: {feil}")
+
+        if argumenter.get("strøm"):
+            return spørring.strøm(med_alt=bool(argumenter.get("med_alt")))
+        return spørring.hent(argumenter.get("grense"), argumenter.get("peker"), med_alt=bool(argumenter.get("med_alt")))
+
+    def oversikt(self) -> dict:
+        innhold = {ressurs: {"les": list(metoder["les"]), "skriv": list(metoder["skriv"])} for ressurs, metoder in ENDEPUNKTER.items()}
+        innhold["transaksjoner"]["les"].append("spørring")
+        return _formater_svar(SUKSESS, innhold, "suksess")
+
+
+class _Forespørsel(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, så lenge klienten ikke ber om noe annet
+    server_version = "okonomi-backend"
+
+    def setup(self):
+        super().setup()
+        # hodene og kroppen skrives hver for seg, og med Nagle ville den andre skrivingen ventet på ack fra klienten
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        self._svar_på("GET")
+
+    def do_POST(self):
+        self._svar_på("POST")
+
+    def _svar_på(self, http_metode: str) -> None:
+        strøm = None
+        try:
+            svar = self._håndter(http_metode)
+            if isinstance(svar.get("innhold"), Iterator):
+                ndjson = "application/x-ndjson" in (self.headers.get("Accept") or "")
+                strøm = som_ndjson(svar) if ndjson else som_json(svar)     # leser første rad, så statusen er kjent
+        except Exception as feil:
+            logger.exception("Feil i %s %s", http_metode, self.path)
+            svar = _formater_svar(GENERELL_FEIL, [], f"Intern feil: {type(feil).__name__}")
+
+        if strøm is not None:
+            with strøm:
+                self._send_strøm(strøm)
+            return
+
+        try:
+            kropp = json.dumps(svar, ensure_ascii=False, default=_til_json).encode("utf-8")
+        except TypeError as feil:
+            logger.exception("Kunne ikke lage json av svaret på %s", self.path)
+            svar = _formater_svar(GENERELL_FEIL, [], f"Intern feil: {feil}")
+            kropp = json.dumps(svar, ensure_ascii=False).encode("utf-8")
+
+        self.send_response(HTTP_STATUS.get(svar.get("status"), 500))
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(kropp)))
+        self.end_headers()
+        self.wfile.write(kropp)
+
+    def _send_strøm(self, strøm) -> None:
+        self.send_response(HTTP_STATUS.get(strøm.status, 500))
+        self.send_header("Content-Type", strøm.innholdstype)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            for bit in strøm:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(bit), bit))
+            self.wfile.write(b"0\r\n\r\n")
+        except Exception:
+            # hodene er sendt, så det går ikke an å svare med en feil. Uten den siste tomme chunken ser klienten at svaret ble avbrutt
+            logger.exception("Feil midt i strømmen til %s", self.path)
+            self.close_connection = True
+
+    def _håndter(self, http_metode: str) -> dict:
+        deler = urlsplit(self.path)
+        sti = [unquote(del_) for del_ in deler.path.split("/") if del_]     # hent_p%C3%A5_id -> hent_på_id
+
+        # kroppen må alltid leses, ellers blir den liggende og ødelegger neste forespørsel på samme tilkobling.
+        # Kan den ikke leses riktig, lukkes tilkoblingen i stedet
+        if self.headers.get("Transfer-Encoding"):
+            self.close_connection = True
+            return _formater_svar(UGYLDIG_INPUT, [], "Kroppen må sendes med Content-Length, ikke Transfer-Encoding")
+
+        tekst_lengde = (self.headers.get("Content-Length") or "0").strip()
+        if not tekst_lengde.isdigit():     # også negative tall, som ville fått rfile.read til å lese til tilkoblingen lukkes
+            self.close_connection = True
+            return _formater_svar(UGYLDIG_INPUT, [], f"Ugyldig Content-Length: {tekst_lengde}")
+
+        lengde = int(tekst_lengde)
+        if lengde > MAKS_KROPP:
+            self.close_connection = True
+            return _formater_svar(FOR_STOR, [], f"Kroppen er for stor, maks {MAKS_KROPP} bytes")
+        rå_kropp = self.rfile.read(lengde) if lengde else b""
+
+        if not sti:
+            return self.server.backend.oversikt()
+        if len(sti) != 2:
+            return _formater_svar(IKKE_FUNNET, [], f"Fant ikke endepunktet {deler.path}, forventet /<ressurs>/<metode>")
+
+        argumenter = {}
+        if rå_kropp:
+            try:
+                kropp = json.loads(rå_kropp)
+            except ValueError as feil:
+                return _formater_svar(UGYLDIG_INPUT, [], f"Kroppen er ikke gyldig json: {feil}")
+            if not isinstance(kropp, dict):
+                return _formater_svar(UGYLDIG_INPUT, [], "Kroppen må være et json-objekt med argumentene til metoden")
+            argumenter = kropp
+
+        return self.server.backend.håndter(http_metode, sti[0], sti[1], argumenter, parse_qs(deler.query, keep_blank_values=True))
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def lag_server(database: Database, vert: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Lager serveren uten å starte den. Kjør den med serve_forever(), og stopp med shutdown() og server_close().
+    :param port: 0 gir en ledig port, som kan leses fra server.server_address
+    """
+    server = ThreadingHTTPServer((vert, port), _Forespørsel)
+    server.daemon_threads = True
+    server.backend = Backend(database)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m server")
+    parser.add_argument("database", help="filsti til sqlite-databasen, lages hvis den ikke finnes")
+    parser.add_argument("--vert", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--tilkoblinger", type=int, default=8, help="tilkoblinger i poolen, delt av alle forespørslene")
+    parser.add_argument("--skrivekø", action="store_true", help="samle skrivinger fra samtidige forespørsler i felles commits")
+    argumenter = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    database = Database(argumenter.database, størrelse=argumenter.tilkoblinger, skrivekø=argumenter.skrivekø)
+    server = lag_server(database, argumenter.vert, argumenter.port)
+    logger.info("Lytter på http://%s:%d", *server.server_address[:2])
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        database.close()
@@ -0,0 +1,101 @@
+"""
+Tabellene, kolonnene og indeksene i databasen, lest fra sqlite_master én gang og holdt i minnet (Database.skjema).
+Kode som setter sammen spørringer med tabell- eller kolonnenavn sjekker navnene mot skjemaet i stedet for å spørre databasen hver gang.
+Leses på nytt av migreringer.migrer når skjemaet endres.
+"""
+import sqlite3
+
+# slik skjemaet skal være etter siste migrering, se database.schema.txt. transaksjoner_fts er ikke med, den finnes bare med FTS5
+FORVENTEDE_TABELLER = {
+    "transaksjoner": ("id", "pris", "type", "dato", "beskrivelse", "fingeravtrykk"),
+    "kategorier": ("id", "navn"),
+    "personer": ("id", "navn"),
+    "kategori_tag": ("transaksjon_id", "kategori_id"),
+    "person_tag": ("transaksjon_id", "person_id"),
+    "sammendrag_måned": ("måned", "type", "antall", "sum"),
+    "sammendrag_kategori": ("måned", "kategori_id", "type", "antall", "sum"),
+    "sammendrag_person": ("måned", "person_id", "type", "antall", "sum"),
+}
+
+FORVENTEDE_INDEKSER = {
+    "transaksjoner_fingeravtrykk": ("transaksjoner", ("fingeravtrykk",)),
+    "transaksjoner_dato": ("transaksjoner", ("dato",)),
+    "transaksjoner_pris": ("transaksjoner", ("pris",)),
+    "transaksjoner_type_dato": ("transaksjoner", ("type", "dato")),
+    "kategori_tag_kategori_id": ("kategori_tag", ("kategori_id", "transaksjon_id")),
+    "person_tag_person_id": ("person_tag", ("person_id", "transaksjon_id")),
+}
+
+
+class Skjema:
+    def __init__(self, tabeller: dict, indekser: dict, versjon: int):
+        """
+        :param tabeller: {tabell: (kolonne, ...)} i rekkefølgen fra CREATE TABLE
+        :param indekser: {indeks: (tabell, (kolonne, ...))}
+        :param versjon: PRAGMA user_version da skjemaet ble lest
+        """
+        self.tabeller = tabeller
+        self.indekser = indekser
+        self.versjon = versjon
+
+    @classmethod
+    def les(cls, database) -> "Skjema":
+        """Leser alle tabellene med kolonner og alle indeksene med kolonner, med én spørring for hver"""
+        tabeller = {}
+        for rad in database.execute("""
+                SELECT m.name AS tabell, k.name AS kolonne FROM sqlite_master m JOIN pragma_table_info(m.name) k
+                WHERE m.type = 'table' ORDER BY m.name, k.cid""", fetchall=True):
+            tabeller.setdefault(rad["tabell"], []).append(rad["kolonne"])
+
+        indekser = {}
+        for rad in database.execute("""
+                SELECT m.name AS indeks, m.tbl_name AS tabell, k.name AS kolonne FROM sqlite_master m JOIN pragma_index_info(m.name) k
+                WHERE m.type = 'index' ORDER BY m.name, k.seqno""", fetchall=True):
+            indekser.setdefault(rad["indeks"], (rad["tabell"], []))[1].append(rad["kolonne"])
+
+        versjon = database.execute("PRAGMA user_version", fetchone=True)["user_version"]
+
+        return cls({tabell: tuple(kolonner) for tabell, kolonner in tabeller.items()},
+                   {indeks: (tabell, tuple(kolonner)) for indeks, (tabell, kolonner) in indekser.items()}, versjon)
+
+    def har_tabell(self, tabell: str) -> bool:
+        return tabell in self.tabeller
+
+    def har_kolonne(self, tabell: str, kolonne: str) -> bool:
+        return kolonne in self.tabeller.get(tabell, ())
+
+    def kolonner(self, tabell: str) -> tuple:
+        """:raises KeyError: hvis tabellen ikke finnes"""
+        return self.tabeller[tabell]
+
+    def indekser_på(self, tabell: str) -> dict:
+        """:return: {indeks: (kolonne, ...)} for indeksene på tabellen"""
+        return {indeks: kolonner for indeks, (indeks_tabell, kolonner) in self.indekser.items() if indeks_tabell == tabell}
+
+    def mangler(self, tabeller: dict = None, indekser: dict = None) -> list[str]:
+        """
+        :param tabeller: standard er FORVENTEDE_TABELLER
+        :param indekser: standard er FORVENTEDE_INDEKSER
+        :return: en beskrivelse av hver tabell, kolonne og indeks som mangler eller er annerledes. Tom hvis skjemaet er som forventet
+        """
+        tabeller = FORVENTEDE_TABELLER if tabeller is None else tabeller
+        indekser = FORVENTEDE_INDEKSER if indekser is None else indekser
+
+        mangler = []
+        for tabell, kolonner in tabeller.items():
+            if not self.har_tabell(tabell):
+                mangler.append(f"tabellen {tabell}")
+                continue
+            mangler.extend(f"kolonnen {tabell}.{kolonne}" for kolonne in kolonner if not self.har_kolonne(tabell, kolonne))
+
+        for indeks, (tabell, kolonner) in indekser.items():
+            if self.indekser.get(indeks) != (tabell, tuple(kolonner)):
+                mangler.append(f"indeksen {indeks} på {tabell}({', '.join(kolonner)})")
+
+        return mangler
+
+    def valider(self) -> None:
+        """:raises sqlite3.DatabaseError: hvis noe fra mangler() mangler"""
+        mangler = self.mangler()
+        if mangler:
+            raise sqlite3.DatabaseError(f"Databasen (versjon {self.versjon}) har ikke forventet skjema, mangler: {', '.join(mangler)}")
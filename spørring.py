@@ -0,0 +1,283 @@
+"""
+Spørrebygger for transaksjoner. Filtrene kan kombineres fritt, og blir til én parameterisert SELECT med AND mellom dem:
+
+    svar = transaksjoner.spørring().pris_mellom(100, 500).datoer("2024-01-01", "2024-06-30") \
+        .typer(["uttak", "utlegg"]).har_kategorier(["mat", "reise"]).sorter("pris", synkende=True).hent(grense=50)
+
+Ugyldige verdier kaster ikke exception, de gir UGYLDIG_INPUT fra hent() og antall(), som resten av Transaksjoner.
+Filtrene på tags og fulltekst er IN-delspørringer, så sqlite kan velge om den starter fra tag-indeksene eller fra transaksjoner.
+For store resultater gir strøm() en generator i stedet for en liste, se json_strøm.py for å sende den videre som json.
+"""
+import json
+
+from privat import _formater_svar, _lag_peker, _les_peker, _søke_ord, _lag_fts_spørring, _TRANSAKSJON_KOLONNER
+from retur_meldinger import *
+from validering import er_helltall, er_gyldig_dato, er_gyldig_handling, er_gyldig_tekst, er_gyldig_side
+
+SAMMENLIGNINGER = ("=", "!=", "<", "<=", ">", ">=")
+SORTERINGER = ("dato", "pris", "id")    # de som har en indeks, så sortering og peker ikke trenger å lese hele tabellen
+
+
+class Spørring:
+    def __init__(self, transaksjoner):
+        """:param transaksjoner: Transaksjoner, som gir databasen, fulltekst-indeksen og _hydrer"""
+        self.transaksjoner = transaksjoner
+        self.database = transaksjoner.database
+        self._filtere = []
+        self._verdier = []
+        self._feil = None
+        self._sortering = "dato"
+        self._synkende = False
+        self._sortert = False
+
+    def _legg_til(self, filter: str, *verdier) -> "Spørring":
+        self._filtere.append(filter)
+        self._verdier.extend(verdier)
+        return self
+
+    def _ugyldig(self, melding: str) -> "Spørring":
+        if self._feil is None:     # den første feilen er den brukeren bør se
+            self._feil = melding
+        return self
+
+    def id_er(self, ider: list[int]) -> "Spørring":
+        if not isinstance(ider, (list, tuple)) or not all(er_helltall(ide) for ide in ider):
+            return self._ugyldig(f"forventet en liste med int, fikk {ider} av typen {type(ider).__name__}")
+        # som én json-liste, så antallet id-er ikke begrenses av hvor mange ? sqlite tillater
+        return self._legg_til("t.id IN (SELECT value FROM json_each(?))", json.dumps(list(ider)))
+
+    def pris(self, tegn: str, beløp: int) -> "Spørring":
+        """:param tegn: en av SAMMENLIGNINGER, pris <tegn> beløp"""
+        if tegn not in SAMMENLIGNINGER:
+            return self._ugyldig(f"Fant ikke tegn {tegn}")
+        if not er_helltall(beløp):
+            return self._ugyldig(f"Forventet typen int, fikk verdien {beløp} av typen {type(beløp).__name__}")
+
+        return self._legg_til(f"t.pris {tegn} ?", beløp)
+
+    def pris_mellom(self, minst: int = None, høyst: int = None) -> "Spørring":
+        """Begge grensene er med. None betyr ingen grense"""
+        if minst is not None:
+            self.pris(">=", minst)
+        if høyst is not None:
+            self.pris("<=", høyst)
+        return self
+
+    def datoer(self, fra: str = None, til: str = None) -> "Spørring":
+        """Begge datoene er med. None betyr ingen grense"""
+        for dato, tegn in ((fra, ">="), (til, "<=")):
+            if dato is None:
+                continue
+            if not er_gyldig_dato(dato):
+                return self._ugyldig(f"forventet dato med iso-format. fikk {dato} av typen {type(dato).__name__}")
+            self._legg_til(f"t.dato {tegn} ?", dato)
+
+        return self
+
+    def dato(self, dato: str) -> "Spørring":
+        return self.datoer(dato, dato)
+
+    def typer(self, handlinger: list[str]) -> "Spørring":
+        """:param handlinger: en eller flere av "innskudd", "uttak", "utlegg" og "tilbakebetaling", transaksjonen må ha en av dem"""
+        if isinstance(handlinger, str):
+            handlinger = [handlinger]
+        if not isinstance(handlinger, (list, tuple, set)):
+            return self._ugyldig(f"forventet en liste med handlinger, fikk {handlinger} av typen {type(handlinger).__name__}")
+
+        handlinger = list(handlinger)
+        for handling in handlinger:
+            if not er_gyldig_tekst(handling) or not er_gyldig_handling(handling):
+                return self._ugyldig(f'Feil type handling. forventet "innskudd", "uttak", "utlegg" eller "tilbakebetaling" fikk "{handling}", av typen {type(handling).__name__}')
+        if not handlinger:
+            return self._ugyldig("forventet minst én handling")
+
+        return self._legg_til(f"t.type IN ({', '.join(['?'] * len(handlinger))})", *handlinger)
+
+    def beskrivelse_lik(self, beskrivelse: str) -> "Spørring":
+        if not er_gyldig_tekst(beskrivelse):
+            return self._ugyldig(f"Forventet beskrivelse som tekst, ikke {beskrivelse}")
+        return self._legg_til("t.beskrivelse = ?", beskrivelse)
+
+    def beskrivelse_inneholder(self, tekst: str) -> "Spørring":
+        """LIKE %tekst%, uten indeks. Bruk tekst() for ordsøk med fulltekst-indeksen"""
+        if not er_gyldig_tekst(tekst):
+            return self._ugyldig(f"Forventet beskrivelse som tekst, ikke {tekst}")
+        return self._legg_til("t.beskrivelse LIKE ?", f"%{tekst}%")
+
+    def tekst(self, søk: str) -> "Spørring":
+        """
+        Hvert ord i søk må finnes som starten på et ord i beskrivelsen, som i Transaksjoner.søk_på_beskrivelse.
+        Bruker fulltekst-indeksen hvis den finnes, ellers LIKE på hvert ord. En tekst uten ord gir ingen treff
+        """
+        if not er_gyldig_tekst(søk):
+            return self._ugyldig(f"Forventet søketekst som tekst, ikke {søk}")
+
+        ord = _søke_ord(søk)
+        if not ord:
+            return self._legg_til("0")
+
+        if self.transaksjoner._fulltekst_tilgjengelig():
+            return self._legg_til("t.id IN (SELECT rowid FROM transaksjoner_fts WHERE transaksjoner_fts MATCH ?)", _lag_fts_spørring(ord))
+
+        for et_ord in ord:
+            self._legg_til("t.beskrivelse LIKE ?", f"%{et_ord}%")
+        return self
+
+    def _har_tags(self, tag_tabel: str, navn_tabel: str, kolonne: str, navn: list[str], alle: bool) -> "Spørring":
+        if isinstance(navn, str):
+            navn = [navn]
+        if not isinstance(navn, (list, tuple)) or not navn or not all(er_gyldig_tekst(et_navn) for et_navn in navn):
+            return self._ugyldig(f"forventet en liste med minst ett navn, fikk {navn} av typen {type(navn).__name__}")
+
+        navn = list(dict.fromkeys(navn))
+        spørsmålstegn_tekst = ", ".join(["?"] * len(navn))
+        delspørring = f"SELECT transaksjon_id FROM {tag_tabel} WHERE {kolonne} IN (SELECT id FROM {navn_tabel} WHERE navn IN ({spørsmålstegn_tekst}))"
+
+        if alle:
+            return self._legg_til(f"t.id IN ({delspørring} GROUP BY transaksjon_id HAVING count(*) = ?)", *navn, len(navn))
+        return self._legg_til(f"t.id IN ({delspørring})", *navn)
+
+    def har_kategorier(self, navn: list[str], alle: bool = False) -> "Spørring":
+        """:param alle: transaksjonen må ha alle kategoriene, ikke bare minst én av dem"""
+        return self._har_tags("kategori_tag", "kategorier", "kategori_id", navn, alle)
+
+    def har_personer(self, navn: list[str], alle: bool = False) -> "Spørring":
+        """:param alle: transaksjonen må ha alle personene, ikke bare minst én av dem"""
+        return self._har_tags("person_tag", "personer", "person_id", navn, alle)
+
+    def sorter(self, kolonne: str = "dato", synkende: bool = False) -> "Spørring":
+        """Rader med lik verdi sorteres på id. Pekere fra hent() gjelder bare for samme sortering"""
+        if kolonne not in SORTERINGER:
+            return self._ugyldig(f"Kan ikke sortere på {kolonne}, forventet en av {SORTERINGER}")
+
+        self._sortering = kolonne
+        self._synkende = bool(synkende)
+        self._sortert = True
+        return self
+
+    def _hvor(self, filtere: list[str] = None) -> str:
+        filtere = self._filtere + (filtere or [])
+        return f" WHERE {' AND '.join(filtere)}" if filtere else ""
+
+    def _hent_rader(self, grense: int = None, peker: str = None, radformat: str = None, med_alt: bool = False) -> tuple:
+        """
+        Selve spørringen, for hent() og list-metodene i Transaksjoner. Forventer at filtrene og siden er sjekket.
+        Uten grense og peker hentes alt, usortert hvis sorter() ikke er kalt.
+        Med grense sorteres det og neste side starter etter siste rad på denne (keyset, ikke OFFSET),
+        så hver side er like rask og bruker like lite minne uansett hvor langt ut i historikken den er.
+        :param radformat: se rader.py. Standard er Database.radformat. med_alt gir alltid dict, siden de får personer og kategorier
+        :return: (transaksjoner, neste_peker). neste_peker er None på siste side
+        """
+        if med_alt:
+            radformat = "dict"
+        elif radformat is None:
+            radformat = self.database.radformat
+
+        filtere = []
+        verdier = list(self._verdier)
+        sortering = ""
+        retning = " DESC" if self._synkende else ""
+
+        if peker is not None:
+            filtere.append(f"(t.{self._sortering}, t.id) {'<' if self._synkende else '>'} (?, ?)")
+            verdier.extend(_les_peker(peker))
+
+        if grense is not None or peker is not None or self._sortert:
+            sortering = f" ORDER BY t.{self._sortering}{retning}, t.id{retning}"
+
+        if grense is not None:
+            sortering += " LIMIT ?"
+            verdier.append(grense + 1)   # én ekstra for å vite om det finnes en side til
+
+        transaksjoner = self.database.execute(f"SELECT {_TRANSAKSJON_KOLONNER} FROM transaksjoner t{self._hvor(filtere)}{sortering}",
+                                              tuple(verdier), fetchall=True, radformat=radformat)
+
+        neste_peker = None
+        if grense is not None and len(transaksjoner) > grense:
+            transaksjoner.pop()
+            siste = transaksjoner[-1]
+            if radformat == "tuppel":
+                siste = dict(zip(transaksjoner.kolonner, siste))
+            neste_peker = _lag_peker(siste, self._sortering)
+
+        if med_alt:
+            self.transaksjoner._hydrer(transaksjoner)
+
+        return transaksjoner, neste_peker
+
+    def _iterer_rader(self, størrelse: int = 1000, med_alt: bool = False):
+        """
+        Radene som dict, sortert som i _hent_rader, hentet fra cursoren med fetchmany i biter på størrelse rader.
+        med_alt samler personer og kategorier som json i samme spørring, ikke med _hydrer,
+        så generatoren bare holder én tilkobling og ikke må vente på en ledig fra poolen midt i strømmen
+        """
+        retning = " DESC" if self._synkende else ""
+        tags = ""
+        if med_alt:
+            tags = """,
+                (SELECT json_group_array(json_object('id', p.id, 'navn', p.navn)) FROM person_tag pt JOIN personer p ON p.id = pt.person_id
+                    WHERE pt.transaksjon_id = t.id) AS personer,
+                (SELECT json_group_array(json_object('id', k.id, 'navn', k.navn)) FROM kategori_tag kt JOIN kategorier k ON k.id = kt.kategori_id
+                    WHERE kt.transaksjon_id = t.id) AS kategorier"""
+
+        rader = self.database.iterer(f"""
+            SELECT {_TRANSAKSJON_KOLONNER}{tags} FROM transaksjoner t{self._hvor()}
+            ORDER BY t.{self._sortering}{retning}, t.id{retning}""", tuple(self._verdier), størrelse)
+
+        try:
+            for rad in rader:
+                if med_alt:
+                    rad["personer"] = json.loads(rad["personer"])
+                    rad["kategorier"] = json.loads(rad["kategorier"])
+                yield rad
+        finally:
+            rader.close()   # leverer tilkoblingen tilbake, også når den som leser stopper før siste rad
+
+    def hent(self, grense: int = None, peker: str = None, radformat: str = None, med_alt: bool = False) -> dict:
+        """
+        :param grense: hent maks så mange. Gir neste_peker hvis det finnes flere
+        :param peker: neste_peker fra forrige side
+        :param radformat: se rader.py. Standard er Database.radformat
+        :param med_alt: ta med personer og kategorier på hver transaksjon, som i hent_transaksjon_med_alt
+        :return: _formater_svar[innhold] -> [{id, pris, type, dato, beskrivelse}], og neste_peker hvis det finnes flere.
+            SUKSESS_INGEN_INNHOLD hvis ingen transaksjoner passer
+        """
+        if self._feil is not None:
+            return _formater_svar(UGYLDIG_INPUT, [], self._feil)
+
+        side = er_gyldig_side(grense, peker, radformat)
+        if side.get("status") != SUKSESS_INGEN_INNHOLD:
+            return side
+
+        transaksjoner, neste_peker = self._hent_rader(grense, peker, radformat, med_alt)
+
+        if not transaksjoner:
+            return _formater_svar(SUKSESS_INGEN_INNHOLD, transaksjoner, "Fant ingen transaksjoner")
+
+        return _formater_svar(SUKSESS, transaksjoner, "suksess", neste_peker)
+
+    def strøm(self, størrelse: int = 1000, med_alt: bool = False) -> dict:
+        """
+        Som hent() uten grense, men innholdet er en generator som leser radene fra cursoren etter hvert,
+        så minnebruken er den samme uansett hvor mange transaksjoner som passer. Sortert på dato og id hvis sorter() ikke er kalt.
+        Generatoren låner en tilkobling fra poolen når første rad leses, og holder den til den er tømt eller lukket.
+        :param størrelse: antall rader som hentes fra databasen om gangen
+        :param med_alt: ta med personer og kategorier på hver transaksjon, som i hent_transaksjon_med_alt
+        :return: _formater_svar[innhold] -> generator med {id, pris, type, dato, beskrivelse}.
+            SUKSESS også når ingen passer, siden det ikke er kjent før radene leses
+        """
+        if self._feil is not None:
+            return _formater_svar(UGYLDIG_INPUT, [], self._feil)
+
+        if not er_helltall(størrelse) or størrelse < 1:
+            return _formater_svar(UGYLDIG_INPUT, [], f"forventet størrelse som et positivt heltall, fikk {størrelse} av typen {type(størrelse).__name__}")
+
+        return _formater_svar(SUKSESS, self._iterer_rader(størrelse, bool(med_alt)), "suksess")
+
+    def antall(self) -> dict:
+        """:return: _formater_svar[innhold] -> {antall}"""
+        if self._feil is not None:
+            return _formater_svar(UGYLDIG_INPUT, [], self._feil)
+
+        rad = self.database.execute(f"SELECT count(*) AS antall FROM transaksjoner t{self._hvor()}", tuple(self._verdier), fetchone=True)
+        return _formater_svar(SUKSESS, rad, "suksess")
@@ -0,0 +1,53 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# modulene ligger rett i rotmappen, ikke i en pakke
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from kategorier import Kategorier
+from personer import Personer
+from transaksjoner import Transaksjoner
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "økonomi.db"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def transaksjoner(database):
+    return Transaksjoner(database, Personer(database), Kategorier(database))
+
+
+@pytest.fixture
+def gammel_database(tmp_path):
+    """Filnavnet til en database slik de så ut før migreringene: uten fingeravtrykk, nøkler på tag-tabellene eller user_version"""
+    filnavn = str(tmp_path / "gammel.db")
+    conn = sqlite3.connect(filnavn)
+    conn.executescript("""
+        CREATE TABLE kategorier(id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL UNIQUE, navn TEXT NOT NULL UNIQUE);
+        CREATE TABLE personer(id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL UNIQUE, navn TEXT NOT NULL UNIQUE);
+        CREATE TABLE transaksjoner(id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL UNIQUE, pris NUMERIC NOT NULL,
+            type TEXT NOT NULL, dato TEXT NOT NULL, beskrivelse TEXT);
+        CREATE TABLE kategori_tag(transaksjon_id INTEGER, kategori_id INTEGER,
+            FOREIGN KEY(transaksjon_id) REFERENCES transaksjoner(id) FOREIGN KEY(kategori_id) REFERENCES kategorier(id));
+        CREATE TABLE person_tag(transaksjon_id INTEGER, person_id INTEGER,
+            FOREIGN KEY(transaksjon_id) REFERENCES transaksjoner(id) FOREIGN KEY(person_id) REFERENCES personer(id));
+
+        INSERT INTO kategorier (navn) VALUES ('mat'), ('reise');
+        INSERT INTO personer (navn) VALUES ('Ola');
+        INSERT INTO transaksjoner (pris, type, dato, beskrivelse) VALUES
+            (100, 'uttak', '2024-01-05', 'kaffe'), (250, 'uttak', '2024-02-01', 'tog'), (100, 'uttak', '2024-01-05', 'kaffe'),
+            (100, 'uttak', '2024-01-05', 'kaffe');
+        INSERT INTO kategori_tag VALUES (1, 1), (1, 1), (2, 2), (99, 1);
+        INSERT INTO person_tag VALUES (1, 1), (2, 1), (2, 7);
+    """)
+    conn.commit()
+    conn.close()
+    return filnavn
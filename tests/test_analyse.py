@@ -0,0 +1,67 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from analyse import Øyeblikksbilde
+from retur_meldinger import SUKSESS, UGYLDIG_INPUT
+
+
+@pytest.fixture
+def fylt(transaksjoner):
+    for pris, handling, dato, kategorier, personer in ((100, "innskudd", "2024-01-01", ["lønn"], ["Ola"]),
+                                                       (25, "uttak", "2024-01-01", ["mat"], ["Ola", "Kari"]),
+                                                       (40, "uttak", "2024-01-15", ["mat", "reise"], []),
+                                                       (10, "tilbakebetaling", "2024-02-03", [], ["Kari"])):
+        transaksjoner.skriv_transaksjon_med_alt(pris, handling, dato, "x", kategorier, personer)
+    return transaksjoner
+
+
+def test_summer_per(fylt):
+    bilde = fylt.øyeblikksbilde()["innhold"]
+
+    assert len(bilde) == 4
+    assert bilde.summer_per([]) == [{"antall": 4, "sum_øre": 17500}]
+    assert bilde.summer_per(["måned", "type"]) == [
+        {"måned": "2024-01", "type": "innskudd", "antall": 1, "sum_øre": 10000},
+        {"måned": "2024-01", "type": "uttak", "antall": 2, "sum_øre": 6500},
+        {"måned": "2024-02", "type": "tilbakebetaling", "antall": 1, "sum_øre": 1000}]
+    assert bilde.summer_per("kategori") == [{"kategori": "lønn", "antall": 1, "sum_øre": 10000},
+                                            {"kategori": "mat", "antall": 2, "sum_øre": 6500},
+                                            {"kategori": "reise", "antall": 1, "sum_øre": 4000}]
+    with pytest.raises(ValueError):
+        bilde.summer_per(["kategori", "person"])
+
+
+def test_filtrer_og_saldo(fylt):
+    bilde = fylt.øyeblikksbilde()["innhold"]
+
+    maske = bilde.filtrer(person="Kari")
+    assert bilde.summer_per("type", maske) == [{"type": "uttak", "antall": 1, "sum_øre": 2500},
+                                               {"type": "tilbakebetaling", "antall": 1, "sum_øre": 1000}]
+    assert bilde.filtrer(kategori="finnes ikke").sum() == 0
+    assert bilde.filtrer(start_dato="2024-01-02", maks_øre=5000).sum() == 2
+
+    datoer, saldo = bilde.saldo()
+    assert [str(dato) for dato in datoer] == ["2024-01-01", "2024-01-15", "2024-02-03"]
+    assert saldo.tolist() == [7500, 3500, 4500]
+
+
+def test_oppdater_henter_bare_nye_og_ser_slettede(fylt):
+    bilde = fylt.øyeblikksbilde(handling="uttak")["innhold"]
+    assert len(bilde) == 2
+
+    fylt.skriv_transaksjon_med_alt(5, "uttak", "2024-03-01", "y", ["mat"])
+    fylt.skriv_transaksjon_med_alt(7, "innskudd", "2024-03-01", "y")
+    assert bilde.oppdater() == 1
+    assert bilde.summer_per("kategori")[0] == {"kategori": "mat", "antall": 3, "sum_øre": 7000}
+
+    fylt.fjern_transaksjon(2)
+    assert bilde.oppdater() == 2    # bygget på nytt
+    assert len(bilde) == 2
+
+
+def test_ugyldig_filter(fylt):
+    assert fylt.øyeblikksbilde(start_dato="i går")["status"] == UGYLDIG_INPUT
+    assert fylt.øyeblikksbilde(handling="tull")["status"] == UGYLDIG_INPUT
+    assert fylt.øyeblikksbilde()["status"] == SUKSESS
+    assert isinstance(Øyeblikksbilde(fylt.database).id, np.ndarray)
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from asynk import AsyncDatabase, AsyncRader, AsyncTransaksjoner
+from retur_meldinger import OPPRETTET_NY, SUKSESS, UGYLDIG_INPUT
+
+
+def test_samtidige_kall_gir_vanlige_svar(tmp_path):
+    async def kjør():
+        database = AsyncDatabase(str(tmp_path / "økonomi.db"), lesere=3)
+        transaksjoner = AsyncTransaksjoner(database)
+        try:
+            skrevet = await asyncio.gather(*(transaksjoner.skriv_transaksjon_med_alt(nummer, "uttak", "2024-01-01", "x", ["mat"])
+                                             for nummer in range(20)))
+            lest = await asyncio.gather(*(transaksjoner.hent_transaksjon_med_alt(svar["innhold"]["id"]) for svar in skrevet))
+            person = await transaksjoner.personer.legg_til("Ola")
+
+            def to_personer():
+                database.database.execute("INSERT INTO personer (navn) VALUES ('Kari')", commit=True)
+                database.database.execute("INSERT INTO personer (navn) VALUES ('Ola')", commit=True)    # finnes, alt rulles tilbake
+
+            with pytest.raises(Exception):
+                await database.transaksjon(to_personer)
+            antall = await database.execute("SELECT count(*) AS n FROM personer", fetchone=True)
+            return skrevet, lest, person, antall["n"]
+        finally:
+            await database.close()
+
+    skrevet, lest, person, antall = asyncio.run(kjør())
+    assert {svar["status"] for svar in skrevet} == {OPPRETTET_NY}
+    assert sorted(svar["innhold"]["pris"] for svar in lest) == list(range(20))
+    assert all(svar["innhold"]["kategorier"][0]["navn"] == "mat" for svar in lest)
+    assert person["status"] == OPPRETTET_NY
+    assert antall == 1
+
+
+def test_tidsavbrudd_avbryter_spørringen(tmp_path):
+    async def kjør():
+        database = AsyncDatabase(str(tmp_path / "økonomi.db"), lesere=1)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await database.execute("""
+                    WITH RECURSIVE tall(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM tall) SELECT count(*) FROM tall""",
+                    fetchone=True, tidsavbrudd=0.2)
+            return await database.execute("SELECT 1 AS en", fetchone=True, tidsavbrudd=5)     # lesetråden er ledig igjen
+        finally:
+            await database.close()
+
+    assert asyncio.run(kjør()) == {"en": 1}
+
+
+def test_iterer_gir_async_rader(tmp_path):
+    async def kjør():
+        database = AsyncDatabase(str(tmp_path / "økonomi.db"), lesere=2)
+        transaksjoner = AsyncTransaksjoner(database)
+        try:
+            for nummer in range(25):
+                svar = await transaksjoner.skriv_transaksjon_med_alt(nummer, "uttak", "2024-01-01", f"nummer {nummer}")
+                assert svar["status"] == OPPRETTET_NY
+
+            svar = await transaksjoner.iterer_transaksjoner_på_type("uttak", størrelse=10)
+            assert svar["status"] == SUKSESS
+            assert isinstance(svar["innhold"], AsyncRader)
+            async with svar["innhold"] as rader:
+                priser = [rad["pris"] async for rad in rader]
+
+            # en som ikke leses ferdig gir tilkoblingen tilbake med aclose
+            for _ in range(5):
+                svar = await transaksjoner.iterer_transaksjoner_på_type("uttak", størrelse=3)
+                async with svar["innhold"] as rader:
+                    async for _ in rader:
+                        break
+
+            ugyldig = await transaksjoner.iterer_transaksjoner_på_type("tull")
+            hentet = await transaksjoner.hent_på_id(1, tidsavbrudd=5)
+            return priser, ugyldig["status"], hentet["status"]
+        finally:
+            await database.close()
+
+    priser, ugyldig, hentet = asyncio.run(kjør())
+    assert sorted(priser) == list(range(25))
+    assert ugyldig == UGYLDIG_INPUT
+    assert hentet == SUKSESS
@@ -0,0 +1,160 @@
+import csv
+
+import pytest
+
+from retur_meldinger import GENERELL_FEIL, OPPRETTET_NY, SUKSESS_INGEN_INNHOLD, UGYLDIG_INPUT
+
+HODE = "pris;type;dato;beskrivelse;kategorier;personer\n"
+
+
+@pytest.fixture
+def csv_fil(tmp_path):
+    def lag(*rader, navn="import.csv"):
+        filnavn = tmp_path / navn
+        filnavn.write_text(HODE + "".join(f"{rad}\n" for rad in rader), encoding="utf-8")
+        return str(filnavn)
+    return lag
+
+
+def _antall(database, tabell="transaksjoner"):
+    return database.execute(f"SELECT count(*) AS n FROM {tabell}", fetchone=True)["n"]
+
+
+def test_importer_csv_fil(transaksjoner, csv_fil):
+    filnavn = csv_fil("100;uttak;2024-01-01;mat;['mat'];['Ola']", "200;innskudd;2024-01-02;lønn;[];[]")
+
+    svar = transaksjoner.importer_csv_fil(filnavn)
+    assert svar["status"] == OPPRETTET_NY
+    assert svar["innhold"] == {"lest": 2, "lagt_til": 2, "duplikater": 0, "avvist": []}
+
+    svar = transaksjoner.importer_csv_fil(filnavn)
+    assert svar["status"] == SUKSESS_INGEN_INNHOLD
+    assert svar["innhold"]["duplikater"] == 2
+
+
+@pytest.mark.parametrize("ugyldig", [
+    "abc;uttak;2024-01-01;x;[];[]",     # pris er ikke et tall
+    ";uttak;2024-01-01;x;[];[]",        # ingen pris
+    "300;uttak",                        # for kort rad, uten dato
+    "300;tull;2024-01-01;x;[];[]",      # ukjent type
+    "300;uttak;ikke en dato;x;[];[]",
+])
+def test_ugyldig_rad_ruller_tilbake_hele_filen(transaksjoner, csv_fil, ugyldig):
+    svar = transaksjoner.importer_csv_fil(csv_fil("100;uttak;2024-01-01;mat;[];[]", ugyldig))
+
+    assert svar["status"] == UGYLDIG_INPUT
+    assert svar["melding"].startswith("Linje 3")
+    assert _antall(transaksjoner.database) == 0
+
+
+def test_rad_som_ikke_kan_skrives_avvises(transaksjoner, csv_fil, monkeypatch):
+    skriv = transaksjoner.skriv_transaksjon_med_alt
+
+    def feiler_på_200(beløp, *args):
+        if beløp == 200:
+            return {"status": GENERELL_FEIL, "innhold": [], "melding": "feiler med vilje"}
+        return skriv(beløp, *args)
+
+    monkeypatch.setattr(transaksjoner, "skriv_transaksjon_med_alt", feiler_på_200)
+    svar = transaksjoner.importer_csv_fil(csv_fil("100;uttak;2024-01-01;a;[];[]", "200;uttak;2024-01-01;b;[];[]"))
+
+    assert svar["status"] == OPPRETTET_NY
+    assert svar["innhold"]["lagt_til"] == 1
+    assert svar["innhold"]["avvist"] == [{"linje": 3, "melding": "feiler med vilje"}]
+
+
+def test_importer_csv_fil_bulk(transaksjoner, csv_fil):
+    filnavn = csv_fil("100;uttak;2024-01-01;a;['mat'];['Ola']",
+                      "abc;uttak;2024-01-01;b;[];[]",
+                      "200;uttak",
+                      "300;tull;2024-01-01;c;[];[]",
+                      "400;innskudd;2024-01-02;d;[];['Kari']",
+                      "100;uttak;2024-01-01;a;['mat'];['Ola']")
+
+    svar = transaksjoner.importer_csv_fil_bulk(filnavn)
+
+    assert svar["status"] == OPPRETTET_NY
+    innhold = svar["innhold"]
+    assert (innhold["lest"], innhold["lagt_til"], innhold["duplikater"]) == (6, 2, 1)
+    assert [avvist["linje"] for avvist in innhold["avvist"]] == [3, 4, 5]
+    assert _antall(transaksjoner.database) == 2
+
+
+@pytest.mark.parametrize("batch_størrelse", [1, 3, 10, 1000])
+def test_bulk_over_flere_batcher(transaksjoner, csv_fil, batch_størrelse):
+    rader = [f"{pris};uttak;2024-01-{pris % 28 + 1:02d};nummer {pris};['k{pris % 4}'];['Ola']" for pris in range(25)]
+    filnavn = csv_fil(*rader, rader[0], rader[10])
+
+    innhold = transaksjoner.importer_csv_fil_bulk(filnavn, batch_størrelse)["innhold"]
+
+    assert (innhold["lest"], innhold["lagt_til"], innhold["duplikater"], innhold["avvist"]) == (27, 25, 2, [])
+    assert _antall(transaksjoner.database, "kategori_tag") == 25
+    assert _antall(transaksjoner.database, "person_tag") == 25
+
+
+def test_bulk_gir_tagsene_til_riktig_transaksjon_med_hull_i_id_rekken(transaksjoner, csv_fil):
+    for pris in (1, 2, 3):
+        transaksjoner.skriv_transaksjon_med_alt(pris, "uttak", "2024-01-01", "x")
+    transaksjoner.fjern_transaksjon(3)     # neste id fra AUTOINCREMENT er 4, ikke max(id) + 1
+
+    transaksjoner.importer_csv_fil_bulk(csv_fil(*(f"{pris};uttak;2024-02-01;x;['k{pris}'];[]" for pris in range(10, 20))))
+
+    for rad in transaksjoner.database.execute("""
+            SELECT t.pris, k.navn FROM transaksjoner t JOIN kategori_tag kt ON kt.transaksjon_id = t.id
+            JOIN kategorier k ON k.id = kt.kategori_id""", fetchall=True):
+        assert rad["navn"] == f"k{rad['pris']}"
+
+
+def test_eksporter_og_importer_igjen(transaksjoner, csv_fil, tmp_path):
+    transaksjoner.importer_csv_fil(csv_fil("100;uttak;2024-01-01;mat;['mat', 'hverdag'];['Ola']",
+                                           "200;innskudd;2024-01-02;lønn;[];['Kari']"))
+    filnavn = str(tmp_path / "eksport.csv")
+
+    svar = transaksjoner.eksporter_csv_fil([{"id": 2}, {"id": 1}], filnavn)
+
+    assert svar["status"] == SUKSESS_INGEN_INNHOLD
+    with open(filnavn, newline="") as fil:
+        rader = list(csv.DictReader(fil, delimiter=";"))
+    assert [(rad["pris"], rad["beskrivelse"]) for rad in rader] == [("200", "lønn"), ("100", "mat")]
+
+    transaksjoner.fjern_transaksjon(1)
+    assert transaksjoner.importer_csv_fil(filnavn)["innhold"]["lagt_til"] == 1
+    assert transaksjoner.importer_csv_fil(filnavn)["innhold"]["duplikater"] == 2
+
+
+def test_eksport_over_flere_biter(transaksjoner, tmp_path):
+    transaksjoner._skriv_batch([{"pris": pris, "type": "uttak", "dato": "2024-01-01", "beskrivelse": str(pris),
+                                 "kategorier": [], "personer": []} for pris in range(2000)])
+    filnavn = str(tmp_path / "eksport.csv")
+
+    transaksjoner.eksporter_csv_fil([{"id": ide} for ide in range(1, 2001)], filnavn)
+
+    with open(filnavn, newline="") as fil:
+        assert [int(rad["pris"]) for rad in csv.DictReader(fil, delimiter=";")] == list(range(2000))
+
+
+def test_eksport_med_ukjent_id_skriver_ingenting(transaksjoner, tmp_path):
+    transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "mat")
+    filnavn = tmp_path / "eksport.csv"
+    filnavn.write_text("som før")
+
+    svar = transaksjoner.eksporter_csv_fil([{"id": 1}, {"id": 99}], str(filnavn))
+
+    assert svar["status"] == 404
+    assert filnavn.read_text() == "som før"
+    assert not (tmp_path / "eksport.csv.tmp").exists()
+    assert transaksjoner.eksporter_csv_fil([{"id": "1"}], str(filnavn))["status"] == UGYLDIG_INPUT
+    assert transaksjoner.eksporter_csv_fil([{"ide": 1}], str(filnavn))["status"] == 404
+
+
+def test_eksporter_csv_strøm(transaksjoner, csv_fil, tmp_path):
+    transaksjoner.importer_csv_fil(csv_fil("100;uttak;2024-01-01;mat;['mat'];['Ola']", "200;innskudd;2024-02-01;lønn;[];[]",
+                                           "300;uttak;2024-03-01;tog;['reise'];[]"))
+    filnavn = str(tmp_path / "strøm.csv")
+
+    svar = transaksjoner.eksporter_csv_strøm(filnavn, start_dato="2024-01-15", handling="uttak")
+
+    assert svar["innhold"] == {"antall": 1}
+    with open(filnavn, newline="") as fil:
+        assert [rad["beskrivelse"] for rad in csv.DictReader(fil, delimiter=";")] == ["tog"]
+    assert transaksjoner.eksporter_csv_strøm(filnavn, start_dato="ikke en dato")["status"] == UGYLDIG_INPUT
@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from database import Database
+
+
+def test_tilkoblingene_gjenbrukes(tmp_path):
+    database = Database(str(tmp_path / "økonomi.db"), størrelse=2)
+    try:
+        with database._tilkobling() as første:
+            pass
+        with database._tilkobling() as andre:
+            assert andre is første
+
+        def les():
+            for _ in range(20):
+                database.execute("SELECT 1")
+
+        tråder = [threading.Thread(target=les) for _ in range(6)]
+        for tråd in tråder:
+            tråd.start()
+        for tråd in tråder:
+            tråd.join()
+
+        assert database._antall_åpne <= 2
+    finally:
+        database.close()
+
+
+def test_full_pool_gir_feil_etter_ventetiden(tmp_path):
+    database = Database(str(tmp_path / "økonomi.db"), størrelse=1, vent_på_tilkobling=0.1)
+    lånt = database._lån_tilkobling()
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            database.execute("SELECT 1")
+
+        database._lever_tilkobling(lånt)
+        lånt = None
+        assert database.execute("SELECT 1 AS en", fetchone=True) == {"en": 1}
+    finally:
+        if lånt is not None:
+            database._lever_tilkobling(lånt)
+        database.close()
+
+
+def test_close_vekker_de_som_venter_på_en_tilkobling(tmp_path):
+    database = Database(str(tmp_path / "økonomi.db"), størrelse=1, vent_på_tilkobling=None)
+    lånt = database._lån_tilkobling()
+    feil = []
+
+    def vent():
+        try:
+            database.execute("SELECT 1")
+        except sqlite3.ProgrammingError as feilen:
+            feil.append(feilen)
+
+    tråder = [threading.Thread(target=vent) for _ in range(3)]
+    for tråd in tråder:
+        tråd.start()
+    time.sleep(0.1)
+
+    database.close()
+    for tråd in tråder:
+        tråd.join(timeout=5)
+
+    assert not any(tråd.is_alive() for tråd in tråder)
+    assert len(feil) == 3
+    database._lever_tilkobling(lånt)
+
+
+def test_lån_rett_før_close_gir_ikke_none(tmp_path):
+    database = Database(str(tmp_path / "økonomi.db"))
+    database.close()
+    database._lukket = False    # som en tråd som sjekket _lukket rett før close()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        database._lån_tilkobling()
+    with pytest.raises(sqlite3.ProgrammingError):   # og neste får den samme feilen
+        database._lån_tilkobling()
+
+
+def test_tilkobling_levert_etter_close_telles_ned(tmp_path):
+    database = Database(str(tmp_path / "økonomi.db"), størrelse=2)
+    lånt = database._lån_tilkobling()
+    database.close()
+    assert database._antall_åpne == 1
+
+    database._lever_tilkobling(lånt)
+    assert database._antall_åpne == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        lånt.execute("SELECT 1")
+
+
+def test_transaksjon_ruller_tilbake_ved_feil(database):
+    with pytest.raises(RuntimeError):
+        with database.transaksjon():
+            database.execute("INSERT INTO personer (navn) VALUES ('Ola')", commit=True)
+            raise RuntimeError()
+
+    assert database.execute("SELECT count(*) AS n FROM personer", fetchone=True)["n"] == 0
+
+
+def test_nøstet_transaksjon_er_savepoint(database):
+    with database.transaksjon():
+        database.execute("INSERT INTO personer (navn) VALUES ('Ola')", commit=True)
+        with pytest.raises(RuntimeError):
+            with database.transaksjon():
+                database.execute("INSERT INTO personer (navn) VALUES ('Kari')", commit=True)
+                raise RuntimeError()
+
+    assert [rad["navn"] for rad in database.execute("SELECT navn FROM personer", fetchall=True)] == ["Ola"]
+
+
+def test_rull_tilbake_uten_exception(database):
+    with database.transaksjon():
+        database.execute("INSERT INTO personer (navn) VALUES ('Ola')", commit=True)
+        database.rull_tilbake()
+
+    assert database.execute("SELECT count(*) AS n FROM personer", fetchone=True)["n"] == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        database.rull_tilbake()
+
+
+def test_fremmednøkler_slås_på_igjen_når_begin_feiler(tmp_path):
+    filnavn = str(tmp_path / "økonomi.db")
+    database = Database(filnavn, størrelse=1, pragmas={"busy_timeout": 0})
+    annen = sqlite3.connect(filnavn, isolation_level=None)
+    try:
+        annen.execute("BEGIN IMMEDIATE")    # holder skrivelåsen, så BEGIN IMMEDIATE under feiler med en gang
+        with pytest.raises(sqlite3.OperationalError):
+            with database.transaksjon(fremmednøkler=False):
+                pass
+        annen.execute("ROLLBACK")
+
+        assert database.execute("PRAGMA foreign_keys", fetchone=True)["foreign_keys"] == 1
+    finally:
+        annen.close()
+        database.close()
+
+
+def test_iterer_gir_alle_radene_i_biter(database):
+    database.executemany("INSERT INTO personer (navn) VALUES (?)", [(f"p{nummer}",) for nummer in range(25)], commit=True)
+    assert [rad["navn"] for rad in database.iterer("SELECT navn FROM personer ORDER BY id", størrelse=4)] == \
+           [f"p{nummer}" for nummer in range(25)]
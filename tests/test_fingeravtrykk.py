@@ -0,0 +1,47 @@
+from fingeravtrykk import lag_fingeravtrykk
+from retur_meldinger import KONFLIKT, OPPRETTET_NY, SUKSESS
+
+
+def _transaksjon(pris=100, beskrivelse="kaffe", kategorier=("mat",), personer=("Ola",)):
+    return {"pris": pris, "type": "uttak", "dato": "2024-01-01", "beskrivelse": beskrivelse,
+            "kategorier": list(kategorier), "personer": list(personer)}
+
+
+def test_fingeravtrykk_uavhengig_av_rekkefølge_og_doble_tags():
+    assert lag_fingeravtrykk(_transaksjon(kategorier=["mat", "kafé"])) == lag_fingeravtrykk(_transaksjon(kategorier=["kafé", "mat", "mat"]))
+    assert lag_fingeravtrykk(_transaksjon()) != lag_fingeravtrykk(_transaksjon(personer=["Kari"]))
+
+
+def test_lik_transaksjon_gir_konflikt(transaksjoner):
+    assert transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe", ["mat", "kafé"], ["Ola"])["status"] == OPPRETTET_NY
+
+    svar = transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe", ["kafé", "mat"], ["Ola"])
+    assert svar["status"] == KONFLIKT
+    assert transaksjoner.database.execute("SELECT count(*) AS n FROM transaksjoner", fetchone=True)["n"] == 1
+
+    # samme felt, men andre tags, er en annen transaksjon
+    assert transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe", ["mat"], ["Ola"])["status"] == OPPRETTET_NY
+
+
+def test_oppdatering_som_gir_lik_transaksjon_gir_konflikt(transaksjoner):
+    første = transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe")["innhold"]["id"]
+    andre = transaksjoner.skriv_transaksjon_med_alt(200, "uttak", "2024-01-01", "kaffe")["innhold"]["id"]
+
+    assert transaksjoner.oppdater_transaksjon(andre, 100, "uttak", "2024-01-01", "kaffe")["status"] == KONFLIKT
+    assert transaksjoner.hent_på_id(andre)["innhold"]["pris"] == 200
+    assert transaksjoner.hent_på_id(første)["status"] == SUKSESS
+
+
+def test_skriv_batch_hopper_over_duplikater(transaksjoner):
+    transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe", ["mat"], ["Ola"])
+    batch = [_transaksjon(), _transaksjon(pris=200), _transaksjon(pris=200), _transaksjon(pris=300, personer=[])]
+
+    ider = transaksjoner._skriv_batch(batch)
+
+    assert ider[0] is None and ider[2] is None    # finnes i databasen / tidligere i samme batch
+    assert ider[1] is not None and ider[3] is not None
+    for ide, transaksjon in ((ider[1], batch[1]), (ider[3], batch[3])):
+        lagret = transaksjoner.hent_transaksjon_med_alt(ide)["innhold"]
+        assert lagret["pris"] == transaksjon["pris"]
+        assert [person["navn"] for person in lagret["personer"]] == transaksjon["personer"]
+
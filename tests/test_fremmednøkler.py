@@ -0,0 +1,56 @@
+import sqlite3
+
+import pytest
+
+from retur_meldinger import SUKSESS, UGYLDIG_INPUT
+
+
+def test_fremmednøkler_er_på(database):
+    assert database.execute("PRAGMA foreign_keys", fetchone=True)["foreign_keys"] == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        database.execute("INSERT INTO person_tag (transaksjon_id, person_id) VALUES (1, 1)", commit=True)
+
+
+def test_fjern_kategori_fjerner_tags_med_cascade(transaksjoner):
+    ide = transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe", ["mat", "kafé"])["innhold"]["id"]
+
+    transaksjoner.kategorier.fjern_kategori(transaksjoner.kategorier.hent_på_navn("mat")["innhold"]["id"])
+
+    assert [kategori["navn"] for kategori in transaksjoner.hent_transaksjon_med_alt(ide)["innhold"]["kategorier"]] == ["kafé"]
+    assert transaksjoner.database.execute("SELECT count(*) AS n FROM kategori_tag", fetchone=True)["n"] == 1
+
+
+@pytest.fixture
+def fylt(transaksjoner):
+    for pris, handling, dato, kategorier, personer in ((100, "uttak", "2024-01-01", ["mat"], ["Ola"]),
+                                                       (200, "uttak", "2024-01-15", ["mat", "reise"], ["Ola", "Kari"]),
+                                                       (300, "innskudd", "2024-02-01", [], ["Kari"]),
+                                                       (400, "uttak", "2024-03-01", ["reise"], [])):
+        transaksjoner.skriv_transaksjon_med_alt(pris, handling, dato, "x", kategorier, personer)
+    return transaksjoner
+
+
+def _priser(transaksjoner):
+    return [rad["pris"] for rad in transaksjoner.database.execute("SELECT pris FROM transaksjoner ORDER BY pris", fetchall=True)]
+
+
+def test_fjern_transaksjoner_på_filter(fylt):
+    svar = fylt.fjern_transaksjoner(kategori="mat", slutt_dato="2024-01-31")
+
+    assert svar["status"] == SUKSESS
+    assert svar["innhold"] == {"kategori_tag": 3, "person_tag": 3, "transaksjoner": 2}
+    assert _priser(fylt) == [300, 400]
+    assert fylt.database.execute("SELECT count(*) AS n FROM kategori_tag", fetchone=True)["n"] == 1
+    assert fylt.database.execute("PRAGMA foreign_key_check", fetchall=True) == []
+
+
+def test_fjern_transaksjoner_på_id_person_og_type(fylt):
+    assert fylt.fjern_transaksjoner(transaksjon_ider=[1, 3, 99])["innhold"]["transaksjoner"] == 2
+    assert fylt.fjern_transaksjoner(person="Kari", handling="uttak")["innhold"]["transaksjoner"] == 1
+    assert _priser(fylt) == [400]
+
+
+def test_fjern_transaksjoner_uten_filter_gjør_ingenting(fylt):
+    assert fylt.fjern_transaksjoner()["status"] == UGYLDIG_INPUT
+    assert fylt.fjern_transaksjoner(start_dato="i går")["status"] == UGYLDIG_INPUT
+    assert len(_priser(fylt)) == 4
@@ -0,0 +1,64 @@
+import pytest
+
+from innlesing import les_csv_fil, les_filer
+from retur_meldinger import OPPRETTET_NY, SUKSESS_INGEN_INNHOLD, UGYLDIG_INPUT
+
+HODE = "pris;type;dato;beskrivelse;kategorier;personer\n"
+
+
+@pytest.fixture
+def mappe(tmp_path):
+    mappe = tmp_path / "utskrifter"
+    mappe.mkdir()
+    (mappe / "januar.csv").write_text(HODE + "100;uttak;2024-01-01;mat;['mat'];['Ola']\n"
+                                             "abc;uttak;2024-01-02;feil pris;[];[]\n"
+                                             "200;uttak\n"
+                                             "300;innskudd;2024-01-03;lønn;[];[]\n", encoding="utf-8")
+    (mappe / "februar.csv").write_text(HODE + "100;uttak;2024-01-01;mat;['mat'];['Ola']\n"     # samme som i januar
+                                              "400;uttak;2024-02-01;tog;['reise'];[]\n", encoding="utf-8")
+    (mappe / "ødelagt.csv").write_bytes(b"\xff\xfe\x00ikke utf-8")
+    return mappe
+
+
+def test_les_csv_fil_avviser_rad_for_rad(mappe):
+    lest = les_csv_fil(str(mappe / "januar.csv"))
+
+    assert lest["lest"] == 4
+    assert [transaksjon["pris"] for transaksjon in lest["transaksjoner"]] == [100, 300]
+    assert len(lest["fingeravtrykk"]) == 2
+    assert [avvist["linje"] for avvist in lest["avvist"]] == [3, 4]
+
+
+@pytest.mark.parametrize("prosesser", [0, 1, 2])
+def test_les_filer(mappe, prosesser):
+    filer = sorted(str(fil) for fil in mappe.iterdir())
+
+    lest = dict(les_filer(filer, prosesser))
+
+    assert set(lest) == set(filer)
+    assert isinstance(lest[str(mappe / "ødelagt.csv")], UnicodeError)
+    assert lest[str(mappe / "januar.csv")]["lest"] == 4
+
+
+@pytest.mark.parametrize("prosesser", [0, 2])
+def test_importer_mappe(transaksjoner, mappe, prosesser):
+    fremdrift = []
+
+    svar = transaksjoner.importer_mappe(str(mappe), prosesser=prosesser, batch_størrelse=1, fremdrift=fremdrift.append)
+
+    assert svar["status"] == OPPRETTET_NY
+    innhold = svar["innhold"]
+    assert (innhold["lest"], innhold["lagt_til"], innhold["duplikater"], innhold["avvist"]) == (6, 3, 1, 2)
+    assert [feil["fil"] for feil in innhold["feil"]] == [str(mappe / "ødelagt.csv")]
+    assert sorted(fil["fil"] for fil in fremdrift) == [str(mappe / "februar.csv"), str(mappe / "januar.csv")]
+    assert transaksjoner.database.execute("SELECT count(*) AS n FROM transaksjoner", fetchone=True)["n"] == 3
+
+    igjen = transaksjoner.importer_mappe(str(mappe), prosesser=prosesser)
+    assert igjen["status"] == SUKSESS_INGEN_INNHOLD
+    assert igjen["innhold"]["duplikater"] == 4
+
+
+def test_importer_mappe_ugyldig_input(transaksjoner, tmp_path):
+    assert transaksjoner.importer_mappe(str(tmp_path / "finnes ikke"))["status"] == UGYLDIG_INPUT
+    assert transaksjoner.importer_mappe(str(tmp_path), batch_størrelse=0)["status"] == UGYLDIG_INPUT
+    assert transaksjoner.importer_mappe(str(tmp_path))["status"] == SUKSESS_INGEN_INNHOLD
@@ -0,0 +1,54 @@
+import json
+import logging
+
+from database import Database
+from instrumentering import Instrumentering, normaliser_sql
+
+
+def test_normaliser_sql():
+    assert normaliser_sql("SELECT *  FROM t\n WHERE navn = 'O''Neil' AND pris > 10.5") == "SELECT * FROM t WHERE navn = ? AND pris > ?"
+    assert normaliser_sql("SELECT * FROM t WHERE id IN (?, ?,?)") == normaliser_sql("SELECT * FROM t WHERE id IN (?)") \
+        .replace("(?)", "(?, ...)")
+    assert normaliser_sql("SELECT * FROM t2 WHERE id IN (1, 2, 3)") == "SELECT * FROM t2 WHERE id IN (?, ...)"
+
+
+def test_statistikk_per_spørring(tmp_path):
+    instrumentering = Instrumentering(treg_grense=60)
+    database = Database(str(tmp_path / "økonomi.db"), instrumentering=instrumentering)
+    try:
+        instrumentering.nullstill()
+        for navn in ("Ola", "Kari", "Per"):
+            database.execute(f"INSERT INTO personer (navn) VALUES ('{navn}')", commit=True)
+        database.executemany("INSERT INTO kategorier (navn) VALUES (?)", [("mat",), ("reise",)], commit=True)
+        database.execute("SELECT * FROM personer", fetchall=True)
+
+        statistikk = {rad["sql"]: rad for rad in instrumentering.statistikk()}
+        assert statistikk["INSERT INTO personer (navn) VALUES (?)"]["antall"] == 3
+        assert statistikk["INSERT INTO personer (navn) VALUES (?)"]["rader"] == 3
+        assert statistikk["INSERT INTO kategorier (navn) VALUES (?)"]["rader"] == 2
+        assert statistikk["SELECT * FROM personer"]["rader"] == 3
+        assert instrumentering.trege() == []
+    finally:
+        database.close()
+
+
+def test_trege_spørringer_logges_med_plan(tmp_path, caplog):
+    instrumentering = Instrumentering(treg_grense=0, maks_trege=2)
+    database = Database(str(tmp_path / "økonomi.db"), instrumentering=instrumentering)
+    try:
+        with caplog.at_level(logging.WARNING, logger="database.treg"):
+            for dato in ("2024-01-01", "2024-01-02", "2024-01-03"):
+                database.execute("SELECT * FROM transaksjoner WHERE dato = ?", (dato,), fetchall=True)
+
+        trege = instrumentering.trege()
+        assert len(trege) == 2
+        assert trege[-1]["params"] == repr(("2024-01-03",))
+        assert any("dato" in linje for linje in trege[-1]["plan"])
+        assert "Treg spørring" in caplog.text
+
+        filnavn = tmp_path / "dump.json"
+        dump = instrumentering.dump(str(filnavn))
+        assert dump["tilkoblinger"] >= 1
+        assert json.loads(filnavn.read_text(encoding="utf-8"))["spørringer"] == json.loads(json.dumps(dump["spørringer"]))
+    finally:
+        database.close()
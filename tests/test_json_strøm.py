@@ -0,0 +1,78 @@
+import json
+
+from json_strøm import som_json, som_ndjson
+from retur_meldinger import IKKE_FUNNET, SUKSESS, SUKSESS_INGEN_INNHOLD
+from rader import lag_rader
+
+
+def _svar(innhold, status=SUKSESS):
+    return {"status": status, "innhold": innhold, "melding": "suksess"}
+
+
+def _rader(antall, lukket=None):
+    try:
+        for nummer in range(antall):
+            yield {"id": nummer, "beskrivelse": f"nummer {nummer} æøå"}
+    finally:
+        if lukket is not None:
+            lukket.append(True)
+
+
+def test_som_json_er_hele_svaret():
+    strøm = som_json(_svar(_rader(1000)), bit_størrelse=1024)
+
+    biter = list(strøm)
+    assert strøm.status == SUKSESS and strøm.innholdstype.startswith("application/json")
+    assert len(biter) > 10
+    assert json.loads(b"".join(biter)) == {"status": SUKSESS, "melding": "suksess", "innhold": list(_rader(1000))}
+
+
+def test_som_ndjson_er_én_rad_per_linje():
+    linjer = b"".join(som_ndjson(_svar(_rader(5)), bit_størrelse=1)).decode("utf-8").splitlines()
+
+    assert json.loads(linjer[0]) == {"status": SUKSESS, "melding": "suksess"}
+    assert [json.loads(linje) for linje in linjer[1:]] == list(_rader(5))
+
+
+def test_tomt_innhold_gir_ingen_innhold():
+    strøm = som_json(_svar(_rader(0)), tom_melding="tomt")
+
+    assert strøm.status == SUKSESS_INGEN_INNHOLD
+    assert json.loads(b"".join(strøm)) == {"status": SUKSESS_INGEN_INNHOLD, "melding": "tomt", "innhold": []}
+    assert b"".join(som_ndjson(_svar([]))).count(b"\n") == 1
+
+
+def test_svar_uten_rader_skrives_som_det_er():
+    feil = {"status": IKKE_FUNNET, "innhold": [], "melding": "fant ikke"}
+    assert som_json(_svar({"a": 1}, IKKE_FUNNET)).status == IKKE_FUNNET
+    assert json.loads(b"".join(som_json(_svar({"a": 1})))) == _svar({"a": 1})
+    assert json.loads(b"".join(som_json(feil))) == feil
+    assert b"".join(som_ndjson(_svar(7))).splitlines()[1] == b"7"
+
+
+def test_close_lukker_radene():
+    lukket = []
+    with som_json(_svar(_rader(1000, lukket)), bit_størrelse=16) as strøm:
+        next(iter(strøm))
+    assert lukket == [True]
+
+    lukket.clear()
+    som_ndjson(_svar(_rader(1000, lukket))).close()     # aldri lest
+    assert lukket == [True]
+
+
+def test_kompakte_rader():
+    for radformat in ("post", "visning"):
+        innhold = lag_rader(("id", "navn"), [(1, "Ola")], radformat)
+        assert json.loads(b"".join(som_json(_svar(iter(innhold)))))["innhold"] == [{"id": 1, "navn": "Ola"}]
+
+
+def test_iterer_transaksjoner(transaksjoner):
+    for pris in range(30):
+        transaksjoner.skriv_transaksjon_med_alt(pris, "uttak", "2024-01-01", "x", ["mat"])
+
+    svar = transaksjoner.iterer_transaksjoner_på_type("uttak", med_alt=True, størrelse=7)
+    rader = [json.loads(linje) for linje in b"".join(som_ndjson(svar)).splitlines()[1:]]
+
+    assert [rad["pris"] for rad in rader] == list(range(30))
+    assert all(rad["kategorier"][0]["navn"] == "mat" for rad in rader)
@@ -0,0 +1,49 @@
+from retur_meldinger import IKKE_FUNNET, SUKSESS, SUKSESS_INGEN_INNHOLD, UGYLDIG_INPUT
+
+
+def _navn(tags):
+    return sorted(tag["navn"] for tag in tags)
+
+
+def test_hent_mange_med_alt(transaksjoner):
+    første = transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "mat", ["mat", "hverdag"], ["Ola"])["innhold"]["id"]
+    andre = transaksjoner.skriv_transaksjon_med_alt(200, "innskudd", "2024-01-02", "lønn")["innhold"]["id"]
+    tredje = transaksjoner.skriv_transaksjon_med_alt(300, "uttak", "2024-01-03", "tog", ["reise"], ["Ola", "Kari"])["innhold"]["id"]
+
+    svar = transaksjoner.hent_mange_med_alt([tredje, 99, første, andre, første])
+
+    assert svar["status"] == SUKSESS
+    assert [transaksjon["id"] for transaksjon in svar["innhold"]] == [tredje, første, andre, første]
+    mat, lønn, tog = svar["innhold"][1], svar["innhold"][2], svar["innhold"][0]
+    assert (_navn(mat["kategorier"]), _navn(mat["personer"])) == (["hverdag", "mat"], ["Ola"])
+    assert (lønn["kategorier"], lønn["personer"]) == ([], [])
+    assert (_navn(tog["kategorier"]), _navn(tog["personer"])) == (["reise"], ["Kari", "Ola"])
+
+
+def test_hent_mange_med_alt_er_lik_hent_transaksjon_med_alt(transaksjoner):
+    ider = [transaksjoner.skriv_transaksjon_med_alt(pris, "uttak", "2024-01-01", "x", [f"k{pris % 3}"], [f"p{pris % 2}"])["innhold"]["id"]
+            for pris in range(1000)]
+
+    mange = transaksjoner.hent_mange_med_alt(ider)["innhold"]
+
+    for ide, transaksjon in zip(ider[::97], mange[::97]):
+        assert transaksjon == transaksjoner.hent_transaksjon_med_alt(ide)["innhold"]
+
+
+def test_hent_mange_med_alt_uten_treff_og_ugyldig_id(transaksjoner):
+    assert transaksjoner.hent_mange_med_alt([1, 2])["status"] == SUKSESS_INGEN_INNHOLD
+    assert transaksjoner.hent_mange_med_alt([])["status"] == SUKSESS_INGEN_INNHOLD
+    assert transaksjoner.hent_mange_med_alt([1, "2"])["status"] == UGYLDIG_INPUT
+    assert transaksjoner.hent_transaksjon_med_alt(1)["status"] == IKKE_FUNNET
+
+
+def test_med_alt_på_listene(transaksjoner):
+    transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "mat", ["mat"], ["Ola"])
+    transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-02", "mer mat")
+
+    uten = transaksjoner.hent_transaksjoner_på_pris(100)["innhold"]
+    med = transaksjoner.hent_transaksjoner_på_pris(100, med_alt=True)["innhold"]
+
+    assert all("kategorier" not in transaksjon for transaksjon in uten)
+    assert [(_navn(t["kategorier"]), _navn(t["personer"])) for t in med] == [(["mat"], ["Ola"]), ([], [])]
+    assert [{nøkkel: t[nøkkel] for nøkkel in uten[0]} for t in med] == uten
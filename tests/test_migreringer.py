@@ -0,0 +1,57 @@
+from database import Database
+from migreringer import MIGRERINGER, hent_versjon, migrer
+
+
+def test_gammel_database_migreres_til_nyeste_versjon(gammel_database):
+    database = Database(gammel_database)
+    try:
+        assert hent_versjon(database) == len(MIGRERINGER)
+        indekser = {rad["name"] for rad in database.execute("SELECT name FROM sqlite_master WHERE type = 'index'", fetchall=True)}
+        assert {"transaksjoner_fingeravtrykk", "transaksjoner_dato", "transaksjoner_pris", "transaksjoner_type_dato",
+                "kategori_tag_kategori_id", "person_tag_person_id"} <= indekser
+
+        # doble tags og tags til transaksjoner/personer som ikke finnes er ryddet bort
+        assert database.execute("SELECT transaksjon_id, kategori_id FROM kategori_tag ORDER BY 1", fetchall=True) == [
+            {"transaksjon_id": 1, "kategori_id": 1}, {"transaksjon_id": 2, "kategori_id": 2}]
+        assert database.execute("SELECT count(*) AS n FROM person_tag", fetchone=True)["n"] == 2
+
+        # 3 og 4 er like (1 har tags), så den første får fingeravtrykket og den andre NULL
+        fingeravtrykk = {rad["id"]: rad["fingeravtrykk"] for rad in database.execute("SELECT id, fingeravtrykk FROM transaksjoner", fetchall=True)}
+        assert None not in (fingeravtrykk[1], fingeravtrykk[2], fingeravtrykk[3])
+        assert len({fingeravtrykk[1], fingeravtrykk[2], fingeravtrykk[3]}) == 3
+        assert fingeravtrykk[4] is None
+    finally:
+        database.close()
+
+
+def test_migrering_kjøres_bare_én_gang(tmp_path):
+    filnavn = str(tmp_path / "ny.db")
+    Database(filnavn).close()
+
+    database = Database(filnavn, migrer=False)
+    try:
+        assert migrer(database) == []
+    finally:
+        database.close()
+
+
+def test_fjern_transaksjon_fjerner_tags(transaksjoner):
+    ide = transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe", ["mat"], ["Ola"])["innhold"]["id"]
+    transaksjoner.skriv_transaksjon_med_alt(200, "uttak", "2024-01-02", "mer kaffe", ["mat"], ["Ola"])
+
+    transaksjoner.fjern_transaksjon(ide)
+
+    database = transaksjoner.database
+    assert database.execute("SELECT count(*) AS n FROM kategori_tag WHERE transaksjon_id = ?", (ide,), fetchone=True)["n"] == 0
+    assert database.execute("SELECT count(*) AS n FROM person_tag WHERE transaksjon_id = ?", (ide,), fetchone=True)["n"] == 0
+    assert database.execute("SELECT count(*) AS n FROM person_tag", fetchone=True)["n"] == 1
+
+
+def test_fjern_person_fjerner_person_tags(transaksjoner):
+    ide = transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe", ["mat"], ["Ola", "Kari"])["innhold"]["id"]
+    ola = transaksjoner.personer.hent_på_navn("Ola")["innhold"]["id"]
+
+    transaksjoner.personer.fjern_person(ola)
+
+    assert [person["navn"] for person in transaksjoner.hent_transaksjon_med_alt(ide)["innhold"]["personer"]] == ["Kari"]
+    assert transaksjoner.database.execute("PRAGMA foreign_key_check", fetchall=True) == []
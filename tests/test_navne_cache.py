@@ -0,0 +1,83 @@
+import pytest
+
+from navne_cache import NavneCache
+from retur_meldinger import IKKE_FUNNET, SUKSESS
+
+
+def test_minst_brukte_kastes_ut():
+    cache = NavneCache(2)
+    cache.legg_til(1, "Ola")
+    cache.legg_til(2, "Kari")
+    assert cache.hent_id("Ola") == 1     # nå er Kari minst brukt
+
+    cache.legg_til(3, "Per")
+
+    assert (cache.hent_id("Ola"), cache.hent_id("Kari"), cache.hent_navn(3)) == (1, None, "Per")
+    assert cache.hent_navn(2) is None
+    assert cache.statistikk()["størrelse"] == 2
+
+
+def test_nytt_navn_på_samme_id_fjerner_det_gamle():
+    cache = NavneCache()
+    cache.legg_til(1, "Ola")
+    cache.legg_til(1, "Ola Nordmann")
+
+    assert (cache.hent_id("Ola"), cache.hent_id("Ola Nordmann"), cache.hent_navn(1)) == (None, 1, "Ola Nordmann")
+
+    cache.fjern(navn="Ola Nordmann")
+    assert cache.hent_navn(1) is None
+    assert cache.statistikk() == {"treff": 2, "bom": 2, "treffrate": 0.5, "størrelse": 0, "maks_størrelse": 1024}
+
+
+@pytest.fixture
+def personer(transaksjoner):
+    return transaksjoner.personer
+
+
+def test_oppslag_bruker_cachen(personer):
+    ide = personer.legg_til("Ola")["innhold"]["id"]
+    personer.database.execute("UPDATE personer SET navn = 'utenom cachen' WHERE id = ?", (ide,), commit=True)
+
+    assert personer.hent_på_id(ide)["innhold"] == {"id": ide, "navn": "Ola"}
+    assert personer.hent_på_navn("Ola")["innhold"] == {"id": ide, "navn": "Ola"}
+    assert personer.cache.statistikk()["treff"] == 2
+
+
+def test_nytt_navn_invaliderer_cachen(personer):
+    ide = personer.legg_til("Ola")["innhold"]["id"]
+
+    personer.oppdater_person(ide, "Ola Nordmann")
+
+    assert personer.hent_på_navn("Ola")["status"] == IKKE_FUNNET
+    assert personer.hent_på_id(ide)["innhold"]["navn"] == "Ola Nordmann"
+
+
+def test_fjernet_person_er_borte_fra_cachen(personer):
+    ide = personer.legg_til("Ola")["innhold"]["id"]
+    assert personer.hent_på_navn("Ola")["status"] == SUKSESS
+
+    personer.fjern_person(ide)
+
+    assert personer.hent_på_navn("Ola")["status"] == IKKE_FUNNET
+    assert personer.hent_på_id(ide)["status"] == IKKE_FUNNET
+
+
+def test_tilbakerullet_navn_havner_ikke_i_cachen(transaksjoner):
+    kategorier = transaksjoner.kategorier
+    with transaksjoner.database.transaksjon():
+        ide = kategorier.legg_til("mat")["innhold"]["id"]
+        transaksjoner.database.rull_tilbake()
+
+    assert kategorier.cache.hent_navn(ide) is None
+    assert kategorier.hent_på_navn("mat")["status"] == IKKE_FUNNET
+
+
+def test_varm_opp(database):
+    from kategorier import Kategorier
+
+    for navn in ("mat", "reise", "hverdag"):
+        database.execute("INSERT INTO kategorier (navn) VALUES (?)", (navn,), commit=True)
+
+    kategorier = Kategorier(database, cache_størrelse=2, varm_opp=True)
+
+    assert kategorier.cache.statistikk()["størrelse"] == 2
@@ -0,0 +1,66 @@
+import pytest
+
+from database import Database
+from rader import RADFORMATER, RadVisning, TuppelRader, lag_rader, postklasse
+from retur_meldinger import UGYLDIG_INPUT
+
+KOLONNER = ("id", "pris", "count(*)", "get")
+RADER = [(1, 100, 3, "a"), (2, 200, 5, "b")]
+
+
+@pytest.mark.parametrize("radformat", RADFORMATER)
+def test_alle_formatene_leses_som_en_dict(radformat):
+    rader = lag_rader(KOLONNER, RADER, radformat)
+
+    if radformat == "tuppel":
+        rader = rader.som_dicts()
+    assert [rad["pris"] for rad in rader] == [100, 200]
+    assert [rad.get("count(*)") for rad in rader] == [3, 5]
+    assert [rad.get("get") for rad in rader] == ["a", "b"]
+    assert rader[0].get("finnes ikke", "standard") == "standard"
+    assert list(rader[0].keys()) == list(KOLONNER)
+
+
+def test_tuppel_har_kolonnene_én_gang():
+    rader = lag_rader(KOLONNER, RADER, "tuppel")
+
+    assert isinstance(rader, TuppelRader)
+    assert (rader.kolonner, rader[1]) == (KOLONNER, (2, 200, 5, "b"))
+
+
+def test_post_og_visning():
+    post = lag_rader(KOLONNER, RADER, "post")[0]
+    assert (post.id, post.kolonne_2, post.kolonne_3) == (1, 3, "a")
+    assert post.som_dict() == dict(zip(KOLONNER, RADER[0]))
+    assert not hasattr(post, "__dict__")
+    assert postklasse(KOLONNER) is type(post)
+    with pytest.raises(KeyError):
+        post["finnes ikke"]
+
+    visning = lag_rader(KOLONNER, RADER, "visning")[1]
+    assert isinstance(visning, RadVisning)
+    assert dict(visning) == dict(zip(KOLONNER, RADER[1]))
+
+
+def test_ukjent_radformat():
+    with pytest.raises(ValueError):
+        lag_rader(KOLONNER, RADER, "tull")
+    with pytest.raises(ValueError):
+        Database(":memory:", radformat="tull")
+
+
+def test_execute_og_listene_med_radformat(transaksjoner):
+    transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "mat")
+    database = transaksjoner.database
+
+    rader = database.execute("SELECT id, pris FROM transaksjoner", fetchall=True, radformat="tuppel")
+    assert (rader.kolonner, list(rader)) == (("id", "pris"), [(1, 100)])
+    assert database.execute("SELECT id, pris FROM transaksjoner", fetchall=True, radformat="post")[0].pris == 100
+    assert database.execute("SELECT id, pris FROM transaksjoner", fetchone=True, radformat="post") == {"id": 1, "pris": 100}
+
+    som_dict = transaksjoner.hent_transaksjoner_på_type("uttak")["innhold"]
+    for radformat in RADFORMATER:
+        rader = transaksjoner.hent_transaksjoner_på_type("uttak", radformat=radformat)["innhold"]
+        assert (rader.som_dicts() if radformat == "tuppel" else [{kolonne: rad[kolonne] for kolonne in rad.keys()} for rad in rader]) == som_dict
+
+    assert transaksjoner.hent_transaksjoner_på_type("uttak", radformat="tull")["status"] == UGYLDIG_INPUT
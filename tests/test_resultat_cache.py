@@ -0,0 +1,110 @@
+import pytest
+
+from database import Database
+from kategorier import Kategorier
+from personer import Personer
+from resultat_cache import ResultatCache
+from transaksjoner import Transaksjoner
+
+
+def test_treff_til_tabellen_er_skrevet():
+    cache = ResultatCache()
+    kall = []
+
+    def les():
+        kall.append(1)
+        return {"innhold": [len(kall)]}
+
+    assert cache.hent_eller_kjør("m", (1,), ("a",), les) == {"innhold": [1]}
+    assert cache.hent_eller_kjør("m", (1,), ("a",), les) == {"innhold": [1]}
+    assert len(kall) == 1
+
+    cache.skrevet(["b"])    # en annen tabell
+    assert cache.hent_eller_kjør("m", (1,), ("a",), les) == {"innhold": [1]}
+
+    cache.skrevet(["a"])
+    assert cache.hent_eller_kjør("m", (1,), ("a",), les) == {"innhold": [2]}
+    assert cache.statistikk()["utdaterte"] == 1
+
+
+def test_treff_er_en_kopi():
+    cache = ResultatCache()
+    cache.hent_eller_kjør("m", (), ("a",), lambda: {"innhold": [1]})
+
+    svar = cache.hent_eller_kjør("m", (), ("a",), lambda: None)
+    svar["innhold"].append(2)
+
+    assert cache.hent_eller_kjør("m", (), ("a",), lambda: None) == {"innhold": [1]}
+
+
+def test_skriving_under_lesing_lagres_ikke():
+    cache = ResultatCache()
+
+    def les_mens_noen_skriver():
+        cache.skrevet(["a"])
+        return "gammelt"
+
+    cache.hent_eller_kjør("m", (), ("a",), les_mens_noen_skriver)
+    assert cache.hent_eller_kjør("m", (), ("a",), lambda: "nytt") == "nytt"
+    assert cache.statistikk()["ikke_lagret"] == 1
+
+
+def test_begrenset_størrelse():
+    cache = ResultatCache(maks_antall=2)
+    for nøkkel in range(3):
+        cache.hent_eller_kjør("m", (nøkkel,), ("a",), lambda: nøkkel)
+
+    assert cache.statistikk()["størrelse"] == 2
+    assert cache.hent_eller_kjør("m", (0,), ("a",), lambda: "ny") == "ny"   # den eldste er kastet ut
+
+
+@pytest.fixture
+def mellomlagret(tmp_path):
+    database = Database(str(tmp_path / "økonomi.db"), resultat_cache=ResultatCache())
+    yield Transaksjoner(database, Personer(database), Kategorier(database))
+    database.close()
+
+
+def test_oppdatering_gir_nytt_svar(mellomlagret):
+    ide = mellomlagret.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe")["innhold"]["id"]
+    assert mellomlagret.hent_på_id(ide)["innhold"]["pris"] == 100
+    assert mellomlagret.hent_på_id(ide)["innhold"]["pris"] == 100
+    assert mellomlagret.database.resultat_cache.treff == 1
+
+    mellomlagret.oppdater_transaksjon(ide, 200, "uttak", "2024-01-01", "kaffe")
+    assert mellomlagret.hent_på_id(ide)["innhold"]["pris"] == 200
+
+    mellomlagret.fjern_transaksjon(ide)
+    assert mellomlagret.hent_på_id(ide)["innhold"] is None
+
+
+def test_tags_invaliderer_bare_svar_med_tags(mellomlagret):
+    ide = mellomlagret.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe", [], ["Ola"])["innhold"]["id"]
+    mellomlagret.hent_på_id(ide)
+    mellomlagret.hent_transaksjoner_på_type("uttak", med_alt=True)
+    cache = mellomlagret.database.resultat_cache
+
+    kari = mellomlagret.personer.legg_til("Kari")["innhold"]["id"]
+    mellomlagret.skriv_person(ide, kari)
+
+    treff = cache.treff
+    mellomlagret.hent_på_id(ide)
+    assert cache.treff == treff + 1
+
+    personer = mellomlagret.hent_transaksjoner_på_type("uttak", med_alt=True)["innhold"][0]["personer"]
+    assert sorted(person["navn"] for person in personer) == ["Kari", "Ola"]
+
+
+def test_skriving_som_rulles_tilbake_beholder_cachen(mellomlagret):
+    mellomlagret.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe")
+    mellomlagret.hent_transaksjoner_på_type("uttak")
+    cache = mellomlagret.database.resultat_cache
+
+    with pytest.raises(RuntimeError):
+        with mellomlagret.database.transaksjon():
+            mellomlagret.skriv_transaksjon_med_alt(200, "uttak", "2024-01-02", "te")
+            raise RuntimeError("rull tilbake")
+
+    treff = cache.treff
+    assert len(mellomlagret.hent_transaksjoner_på_type("uttak")["innhold"]) == 1
+    assert cache.treff == treff + 1
@@ -0,0 +1,100 @@
+import pytest
+
+from database import Database
+from migreringer import bygg_sammendrag_på_nytt
+from rapporter import Rapporter
+from retur_meldinger import KONFLIKT, SUKSESS, SUKSESS_INGEN_INNHOLD
+
+SAMMENDRAG = ("sammendrag_måned", "sammendrag_kategori", "sammendrag_person")
+
+
+def _les(database) -> dict:
+    return {tabell: database.execute(f"SELECT * FROM {tabell} ORDER BY 1, 2, 3", fetchall=True) for tabell in SAMMENDRAG}
+
+
+def _stemmer(database) -> None:
+    """Sammendragene triggerne har holdt oppdatert skal være de samme som når de regnes ut på nytt fra transaksjonene"""
+    fra_triggere = _les(database)
+    bygg_sammendrag_på_nytt(database)
+    assert fra_triggere == _les(database)
+
+
+@pytest.fixture
+def fylt(transaksjoner):
+    for nummer in range(12):
+        transaksjoner.skriv_transaksjon_med_alt(100 + nummer, "uttak" if nummer % 2 else "innskudd", f"2024-{nummer % 3 + 1:02d}-10",
+                                                f"nummer {nummer}", ["mat", "hverdag"][:nummer % 3], ["Ola", "Kari"][:nummer % 2 + 1])
+    _stemmer(transaksjoner.database)
+    return transaksjoner
+
+
+def test_oppdater_pris_type_og_måned(fylt):
+    assert fylt.oppdater_transaksjon(1, 999, "uttak", "2024-07-01", "flyttet")["status"] == SUKSESS
+    _stemmer(fylt.database)
+
+
+def test_oppdatering_som_rulles_tilbake(fylt):
+    fylt.skriv_transaksjon_med_alt(5, "uttak", "2024-01-01", "lik", [], ["Ola"])
+    ide = fylt.skriv_transaksjon_med_alt(6, "uttak", "2024-01-01", "lik", [], ["Ola"])["innhold"]["id"]
+    før = _les(fylt.database)
+
+    assert fylt.oppdater_transaksjon(ide, 5, "uttak", "2024-01-01", "lik")["status"] == KONFLIKT
+    assert _les(fylt.database) == før
+
+
+def test_fjern_transaksjon(fylt):
+    for ide in (1, 5, 6):
+        fylt.fjern_transaksjon(ide)
+    _stemmer(fylt.database)
+
+
+def test_fjern_transaksjoner_på_dato(fylt):
+    assert fylt.fjern_transaksjoner(start_dato="2024-02-01", slutt_dato="2024-02-28")["status"] == SUKSESS
+    _stemmer(fylt.database)
+
+
+def test_endre_og_fjerne_tags(fylt):
+    mat = fylt.kategorier.hent_på_navn("mat")["innhold"]["id"]
+    reise = fylt.kategorier.legg_til("reise")["innhold"]["id"]
+    kari = fylt.personer.hent_på_navn("Kari")["innhold"]["id"]
+
+    assert fylt.oppdater_kategori_tag(2, mat, reise)["status"] == SUKSESS_INGEN_INNHOLD
+    assert fylt.fjern_transaksjons_kategori(3, mat)["status"] == SUKSESS_INGEN_INNHOLD
+    assert fylt.fjern_transaksjons_person(2, kari)["status"] == SUKSESS_INGEN_INNHOLD
+    _stemmer(fylt.database)
+
+
+def test_fjern_person_og_kategori(fylt):
+    fylt.personer.fjern_person(fylt.personer.hent_på_navn("Ola")["innhold"]["id"])
+    fylt.kategorier.fjern_kategori(fylt.kategorier.hent_på_navn("hverdag")["innhold"]["id"])
+    _stemmer(fylt.database)
+
+
+def test_batch_og_fjern_alt(fylt):
+    fylt._skriv_batch([{"pris": pris, "type": "utlegg", "dato": "2024-03-15", "beskrivelse": "batch", "kategorier": ["mat"],
+                        "personer": ["Per"]} for pris in range(50)])
+    _stemmer(fylt.database)
+
+    fylt.fjern_transaksjoner(start_dato="2000-01-01")
+    assert all(rader == [] for rader in _les(fylt.database).values())
+
+
+def test_rapport_fra_sammendrag(fylt):
+    rapport = Rapporter(fylt.database).per_måned()["innhold"]
+    direkte = fylt.database.execute("""
+        SELECT substr(dato, 1, 7) AS måned, type, count(*) AS antall, sum(pris) AS sum FROM transaksjoner GROUP BY 1, 2 ORDER BY 1, 2""",
+                                    fetchall=True)
+
+    assert [(rad["måned"], rad["type"], rad["antall"], rad["sum"]) for rad in rapport] == \
+           [(rad["måned"], rad["type"], rad["antall"], rad["sum"]) for rad in direkte]
+
+
+def test_sammendrag_bygges_fra_gamle_data(gammel_database):
+    database = Database(gammel_database)
+    try:
+        måneder = database.execute("SELECT måned, type, antall, sum FROM sammendrag_måned ORDER BY måned", fetchall=True)
+        assert måneder == [{"måned": "2024-01", "type": "uttak", "antall": 3, "sum": 300},
+                           {"måned": "2024-02", "type": "uttak", "antall": 1, "sum": 250}]
+        _stemmer(database)
+    finally:
+        database.close()
@@ -0,0 +1,149 @@
+import http.client
+import json
+import socket
+import threading
+from urllib.parse import quote
+
+import pytest
+
+from server import MAKS_KROPP, _tolk_verdi, lag_server
+
+
+@pytest.fixture
+def server(database):
+    server = lag_server(database, port=0)
+    tråd = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    tråd.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _send(server, http_metode, sti, kropp=None, hoder=None):
+    klient = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+    try:
+        data = kropp if isinstance(kropp, (bytes, type(None))) else json.dumps(kropp).encode("utf-8")
+        klient.request(http_metode, quote(sti, safe="/?=&"), data, {"Content-Type": "application/json", **(hoder or {})})
+        svar = klient.getresponse()
+        return svar.status, json.loads(svar.read())
+    finally:
+        klient.close()
+
+
+def _send_rått(server, forespørsel: bytes) -> int:
+    """For hoder http.client ikke vil sende. Gir HTTP-statusen"""
+    with socket.create_connection(server.server_address[:2], timeout=10) as tilkobling:
+        tilkobling.sendall(forespørsel)
+        return int(tilkobling.makefile("rb").readline().split()[1])
+
+
+NY = {"beløp": 100, "handling": "uttak", "dato": "2024-01-01", "beskrivelse": "kaffe", "kategorier": ["mat"], "personer": ["Ola"]}
+
+
+def test_skriv_og_hent(server):
+    status, svar = _send(server, "POST", "/transaksjoner/skriv_transaksjon_med_alt", NY)
+    assert status == 201
+
+    status, hentet = _send(server, "GET", f"/transaksjoner/hent_på_id?iden={svar['innhold']['id']}")
+    assert status == 200
+    assert hentet["innhold"]["pris"] == 100
+
+
+def test_duplikat_gir_409(server):
+    assert _send(server, "POST", "/transaksjoner/skriv_transaksjon_med_alt", NY)[0] == 201
+    status, svar = _send(server, "POST", "/transaksjoner/skriv_transaksjon_med_alt", NY)
+    assert status == 409
+    assert svar["innhold"] == []
+
+
+@pytest.mark.parametrize("http_metode, sti, kropp", [
+    ("POST", "/transaksjoner/skriv_transaksjon_med_alt", b"{ikke json"),
+    ("POST", "/transaksjoner/skriv_transaksjon_med_alt", [1, 2]),
+    ("POST", "/transaksjoner/skriv_transaksjon_med_alt", {"beløp": 100}),
+    ("POST", "/transaksjoner/skriv_transaksjon_med_alt", {**NY, "ukjent": 1}),
+    ("POST", "/transaksjoner/skriv_transaksjon_med_alt", {**NY, "handling": "tull"}),
+    ("POST", "/transaksjoner/skriv_transaksjon_med_alt", {**NY, "dato": 20240101}),
+    ("POST", "/transaksjoner/skriv_transaksjon_med_alt", {**NY, "dato": None}),
+    ("GET", "/transaksjoner/fjern_transaksjon?transaksjon_id=1", None),
+    ("GET", "/transaksjoner/hent_på_id?iden=abc", None),
+    ("GET", "/transaksjoner/hent_på_id?iden=1&iden=2", None),
+    ("GET", "/transaksjoner/hent_transaksjoner_på_type?handling=uttak&med_alt=kanskje", None),
+    ("GET", "/transaksjoner/hent_transaksjoner_på_type?handling=uttak&grense=0", None),
+    ("GET", "/transaksjoner/spørring?grense=mange", None),
+    ("POST", "/transaksjoner/spørring", {"ukjent_filter": 1}),
+    ("GET", "/rapporter/oppsummer?grupper=måned", None),
+])
+def test_ugyldig_forespørsel_gir_400(server, http_metode, sti, kropp):
+    status, svar = _send(server, http_metode, sti, kropp)
+    assert status == 400
+    assert svar["melding"]
+
+
+def test_ugyldig_dato_i_skriv_mange_gir_400_for_raden(server):
+    god = {"pris": 100, "type": "uttak", "dato": "2024-01-01"}
+    status, svar = _send(server, "POST", "/transaksjoner/skriv_mange", {"transaksjoner": [god, {**god, "dato": None}]})
+
+    assert status == 201
+    assert [resultat["status"] for resultat in svar["innhold"]["resultater"]] == [201, 400]
+
+
+@pytest.mark.parametrize("sti", ["/transaksjoner/finnes_ikke", "/ukjent/hent_på_id", "/for/mange/deler"])
+def test_ukjent_endepunkt_gir_404(server, sti):
+    assert _send(server, "GET", sti)[0] == 404
+
+
+def test_query_tolkes_etter_typen_i_metoden(server):
+    _send(server, "POST", "/transaksjoner/skriv_transaksjon_med_alt", NY)
+
+    status, svar = _send(server, "GET", "/transaksjoner/hent_transaksjoner_på_type?handling=uttak&med_alt=true&grense=1")
+    assert status == 200
+    assert svar["innhold"][0]["personer"] == [{"id": 1, "navn": "Ola"}]
+
+    status, svar = _send(server, "GET", '/transaksjoner/spørring?typer=[["uttak"]]&grense=5')
+    assert status == 200
+    assert len(svar["innhold"]) == 1
+
+
+def test_feil_i_metoden_gir_500(server, monkeypatch):
+    def feiler(iden: int):
+        raise RuntimeError("noe gikk galt")
+
+    monkeypatch.setattr(server.backend.transaksjoner, "hent_på_id", feiler)
+    status, svar = _send(server, "GET", "/transaksjoner/hent_på_id?iden=1")
+    assert status == 500
+    assert svar["melding"] == "Intern feil: RuntimeError"
+
+
+@pytest.mark.parametrize("lengde", ["abc", "-5", "1.5"])
+def test_ugyldig_content_length_gir_400(server, lengde):
+    assert _send_rått(server, f"POST /transaksjoner/skriv HTTP/1.1\r\nHost: x\r\nContent-Length: {lengde}\r\n\r\n".encode()) == 400
+
+
+def test_for_stor_kropp_gir_413(server):
+    assert _send_rått(server, f"POST /transaksjoner/skriv HTTP/1.1\r\nHost: x\r\nContent-Length: {MAKS_KROPP + 1}\r\n\r\n".encode()) == 413
+
+
+def test_chunked_kropp_gir_400(server):
+    assert _send_rått(server, b"POST /transaksjoner/skriv HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n0\r\n\r\n") == 400
+
+
+def test_strøm_gir_alle_radene(server):
+    for nummer in range(30):
+        _send(server, "POST", "/transaksjoner/skriv_transaksjon_med_alt", {**NY, "beløp": nummer})
+
+    status, svar = _send(server, "GET", "/transaksjoner/iterer_transaksjoner_på_type?handling=uttak&størrelse=7")
+    assert status == 200
+    assert sorted(rad["pris"] for rad in svar["innhold"]) == list(range(30))
+
+
+@pytest.mark.parametrize("tekst, forventet, verdi", [
+    ("5", int, 5), ("true", bool, True), ("0", bool, False), ("1.5", float, 1.5), ("[1, 2]", list, [1, 2]), ("tekst", str, "tekst"),
+])
+def test_tolk_verdi(tekst, forventet, verdi):
+    assert _tolk_verdi(tekst, forventet) == verdi
+
+
+@pytest.mark.parametrize("tekst, forventet", [("abc", int), ("kanskje", bool), ("{", list), ("1,5", float)])
+def test_tolk_verdi_feil_type(tekst, forventet):
+    with pytest.raises(ValueError):
+        _tolk_verdi(tekst, forventet)
@@ -0,0 +1,55 @@
+import pytest
+
+from retur_meldinger import SUKSESS, SUKSESS_INGEN_INNHOLD, UGYLDIG_INPUT
+
+
+@pytest.fixture
+def fylt(transaksjoner):
+    """20 transaksjoner over 4 datoer, så mange har samme dato og sidene må skille dem på id"""
+    for nummer in range(20):
+        transaksjoner.skriv_transaksjon_med_alt(100, "uttak" if nummer % 2 else "innskudd", f"2024-01-{4 - nummer % 4:02d}",
+                                                f"nummer {nummer}")
+    return transaksjoner
+
+
+def _alle_sider(hent, grense):
+    rader = []
+    peker = None
+    while True:
+        svar = hent(grense=grense, peker=peker)
+        assert svar["status"] == SUKSESS
+        assert len(svar["innhold"]) <= grense
+        rader.extend(svar["innhold"])
+        peker = svar.get("neste_peker")
+        if peker is None:
+            return rader
+
+
+@pytest.mark.parametrize("grense", [1, 3, 20, 50])
+def test_sidene_er_sortert_på_dato_og_id(fylt, grense):
+    rader = _alle_sider(lambda **side: fylt.hent_transaksjoner_på_pris(100, **side), grense)
+
+    assert [(rad["dato"], rad["id"]) for rad in rader] == sorted((rad["dato"], rad["id"]) for rad in rader)
+    assert len({rad["id"] for rad in rader}) == 20
+
+
+def test_sider_for_hver_liste(fylt):
+    assert len(_alle_sider(lambda **side: fylt.hent_transaksjoner_på_type("uttak", **side), 3)) == 10
+    assert len(_alle_sider(lambda **side: fylt.hent_transaksjoner_mellom_datoer("2024-01-02", "2024-01-03", **side), 3)) == 10
+    assert len(_alle_sider(lambda **side: fylt.hent_transaksjoner_på_dato("2024-01-01", **side), 2)) == 5
+    assert len(_alle_sider(lambda **side: fylt.hent_transaksjoner_på_beskrivelse("nummer 1", **side), 4)) == 11
+
+
+def test_uten_grense_som_før(fylt):
+    svar = fylt.hent_transaksjoner_på_pris(100)
+    assert len(svar["innhold"]) == 20
+    assert "neste_peker" not in svar
+
+
+@pytest.mark.parametrize("side", [{"grense": 0}, {"grense": "10"}, {"grense": 5, "peker": "ikke en peker"}])
+def test_ugyldig_side(fylt, side):
+    assert fylt.hent_transaksjoner_på_type("uttak", **side)["status"] == UGYLDIG_INPUT
+
+
+def test_tom_side(fylt):
+    assert fylt.hent_transaksjoner_på_pris(5, grense=5)["status"] == SUKSESS_INGEN_INNHOLD
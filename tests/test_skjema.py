@@ -0,0 +1,56 @@
+import sqlite3
+
+import pytest
+
+from database import Database
+from skjema import FORVENTEDE_TABELLER, Skjema
+from validering import hent_tables
+
+
+def test_ny_database_har_forventet_skjema(database):
+    skjema = database.skjema
+
+    assert skjema.mangler() == []
+    assert set(FORVENTEDE_TABELLER) <= set(hent_tables(database))
+    assert skjema.kolonner("transaksjoner") == FORVENTEDE_TABELLER["transaksjoner"]
+    assert set(skjema.indekser_på("transaksjoner")) >= {"transaksjoner_dato", "transaksjoner_fingeravtrykk"}
+    assert skjema.har_kolonne("personer", "navn") and not skjema.har_kolonne("personer", "alder")
+    with pytest.raises(KeyError):
+        skjema.kolonner("finnes_ikke")
+
+
+def test_skjemaet_leses_bare_én_gang(database):
+    skjema = database.skjema
+    database.execute("CREATE TABLE ekstra (id INTEGER)", commit=True)
+
+    assert database.skjema is skjema and not skjema.har_tabell("ekstra")
+    assert database.les_skjema().har_tabell("ekstra")
+
+
+def test_mangler_og_valider(database):
+    database.execute("DROP INDEX transaksjoner_pris", commit=True)
+    skjema = Skjema.les(database)
+
+    assert skjema.mangler() == ["indeksen transaksjoner_pris på transaksjoner(pris)"]
+    assert skjema.mangler(tabeller={"personer": ("id", "alder")}, indekser={}) == ["kolonnen personer.alder"]
+    with pytest.raises(sqlite3.DatabaseError, match="transaksjoner_pris"):
+        skjema.valider()
+
+
+def test_database_uten_migrering(tmp_path):
+    filnavn = str(tmp_path / "tom.db")
+
+    database = Database(filnavn, migrer=False)
+    try:
+        assert "tabellen transaksjoner" in database.skjema.mangler()
+        with pytest.raises(sqlite3.DatabaseError):
+            database.skjema.valider()
+    finally:
+        database.close()
+
+    Database(filnavn).close()   # migrerer, og validerer etterpå
+    database = Database(filnavn, migrer=False)
+    try:
+        database.skjema.valider()
+    finally:
+        database.close()
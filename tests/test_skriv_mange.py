@@ -0,0 +1,47 @@
+from retur_meldinger import KONFLIKT, OPPRETTET_NY, SUKSESS_INGEN_INNHOLD, UGYLDIG_INPUT
+
+
+def _ny(pris=100, dato="2024-01-01", **felt):
+    return {"pris": pris, "type": "uttak", "dato": dato, "beskrivelse": "mat", **felt}
+
+
+def test_en_god_og_en_dårlig_rad(transaksjoner):
+    svar = transaksjoner.skriv_mange([_ny(kategorier=["mat"], personer=["Ola"]), _ny(pris=200, dato=None)])
+
+    assert svar["status"] == OPPRETTET_NY
+    innhold = svar["innhold"]
+    assert (innhold["lagt_til"], innhold["duplikater"], innhold["avvist"]) == (1, 0, 1)
+    god, dårlig = innhold["resultater"]
+    assert god["status"] == OPPRETTET_NY and god["melding"] == "suksess"
+    assert dårlig["status"] == UGYLDIG_INPUT and dårlig["id"] is None and "dato" in dårlig["melding"]
+
+    lagret = transaksjoner.hent_transaksjon_med_alt(god["id"])["innhold"]
+    assert (lagret["pris"], lagret["kategorier"][0]["navn"], lagret["personer"][0]["navn"]) == (100, "mat", "Ola")
+
+
+def test_resultat_per_rad_i_samme_rekkefølge(transaksjoner):
+    transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "mat")
+    rader = [
+        _ny(),                                  # finnes fra før
+        _ny(pris=200, kategorier=["a", "a"]),   # doble tags telles én gang
+        _ny(pris="200"),
+        _ny(pris=200, kategorier=["a"]),        # lik rad 1
+        "ikke en dict",
+        _ny(pris=300, dato=20240101),
+        _ny(pris=400, type="tull"),
+        _ny(pris=500, personer=["Ola", ""]),
+        {"pris": 600, "type": "innskudd", "dato": "2024-01-02"},    # uten beskrivelse og tags
+    ]
+
+    innhold = transaksjoner.skriv_mange(rader)["innhold"]
+
+    assert [resultat["status"] for resultat in innhold["resultater"]] == [
+        KONFLIKT, OPPRETTET_NY, UGYLDIG_INPUT, KONFLIKT, UGYLDIG_INPUT, UGYLDIG_INPUT, UGYLDIG_INPUT, UGYLDIG_INPUT, OPPRETTET_NY]
+    assert (innhold["lagt_til"], innhold["duplikater"], innhold["avvist"]) == (2, 2, 5)
+    assert transaksjoner.database.execute("SELECT count(*) AS n FROM kategori_tag", fetchone=True)["n"] == 1
+
+
+def test_ingenting_nytt(transaksjoner):
+    assert transaksjoner.skriv_mange([])["status"] == SUKSESS_INGEN_INNHOLD
+    assert transaksjoner.skriv_mange([_ny(dato="ikke en dato")])["status"] == SUKSESS_INGEN_INNHOLD
+    assert transaksjoner.skriv_mange({"pris": 100})["status"] == UGYLDIG_INPUT
@@ -0,0 +1,90 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from database import Database
+from kategorier import Kategorier
+from personer import Personer
+from retur_meldinger import KONFLIKT, OPPRETTET_NY
+from transaksjoner import Transaksjoner
+
+
+@pytest.fixture
+def med_skrivekø(tmp_path):
+    database = Database(str(tmp_path / "økonomi.db"), størrelse=8, skrivekø=True, maks_batch=20)
+    yield Transaksjoner(database, Personer(database), Kategorier(database))
+    database.close()
+
+
+def test_samtidige_skrivinger(med_skrivekø):
+    def skriv(nummer):
+        return med_skrivekø.skriv_transaksjon_med_alt(nummer, "uttak", "2024-01-01", f"nummer {nummer}", [f"k{nummer % 5}"], ["Ola"])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        svar = list(pool.map(skriv, range(200)))
+
+    assert all(enkelt["status"] == OPPRETTET_NY for enkelt in svar)
+    ider = [enkelt["innhold"]["id"] for enkelt in svar]
+    assert len(set(ider)) == 200
+
+    database = med_skrivekø.database
+    assert database.execute("SELECT count(*) AS n FROM transaksjoner", fetchone=True)["n"] == 200
+    assert database.execute("SELECT count(*) AS n FROM person_tag", fetchone=True)["n"] == 200
+    assert database.execute("SELECT count(*) AS n FROM personer", fetchone=True)["n"] == 1
+    assert database.execute("SELECT sum(antall) AS n FROM sammendrag_måned", fetchone=True)["n"] == 200
+
+
+def test_duplikater_fra_flere_tråder(med_skrivekø):
+    start = threading.Barrier(8)
+
+    def skriv(_):
+        start.wait()
+        return med_skrivekø.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "samme", ["mat"], ["Ola"])["status"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuser = list(pool.map(skriv, range(8)))
+
+    assert statuser.count(OPPRETTET_NY) == 1
+    assert statuser.count(KONFLIKT) == 7
+
+
+def test_feil_ruller_bare_tilbake_sin_egen_skriving(med_skrivekø):
+    database = med_skrivekø.database
+
+    def feiler():
+        database.execute("INSERT INTO personer (navn) VALUES ('Feil')", commit=True)
+        raise ValueError("feiler med vilje")
+
+    def lykkes(navn):
+        database.execute("INSERT INTO personer (navn) VALUES (?)", (navn,), commit=True)
+        return navn
+
+    fremtider = [database.send_skriving(lykkes, "Før"), database.send_skriving(feiler), database.send_skriving(lykkes, "Etter")]
+
+    assert fremtider[0].result() == "Før"
+    with pytest.raises(ValueError):
+        fremtider[1].result()
+    assert fremtider[2].result() == "Etter"
+    assert [rad["navn"] for rad in database.execute("SELECT navn FROM personer ORDER BY id", fetchall=True)] == ["Før", "Etter"]
+
+
+def test_uten_skrivekø(database):
+    with pytest.raises(sqlite3.ProgrammingError):
+        database.send_skriving(lambda: None)
+    assert database.kjør_skriving(lambda: 5) == 5
+
+
+def test_close_gjør_køen_ferdig(tmp_path):
+    database = Database(str(tmp_path / "økonomi.db"), skrivekø=True)
+    fremtider = [database.send_skriving(database.execute, "INSERT INTO personer (navn) VALUES (?)", (f"p{nummer}",), commit=True)
+                 for nummer in range(50)]
+    database.close()
+
+    assert all(fremtid.done() for fremtid in fremtider)
+    database = Database(str(tmp_path / "økonomi.db"))
+    try:
+        assert database.execute("SELECT count(*) AS n FROM personer", fetchone=True)["n"] == 50
+    finally:
+        database.close()
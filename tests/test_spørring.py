@@ -0,0 +1,80 @@
+import pytest
+
+from retur_meldinger import SUKSESS, SUKSESS_INGEN_INNHOLD, UGYLDIG_INPUT
+
+
+@pytest.fixture
+def fylt(transaksjoner):
+    """25 transaksjoner over 5 datoer, så mange har samme dato og sorteringen må skille dem på id"""
+    batch = [{"pris": (nummer * 37) % 11 * 10, "type": "uttak" if nummer % 3 else "innskudd", "dato": f"2024-01-{nummer % 5 + 1:02d}",
+              "beskrivelse": f"transaksjon {nummer}", "kategorier": ["mat"] if nummer % 2 else [], "personer": ["Ola"]}
+             for nummer in range(25)]
+    transaksjoner._skriv_batch(batch)
+    return transaksjoner
+
+
+def _alle_sider(hent, grense):
+    rader = []
+    peker = None
+    while True:
+        svar = hent(grense=grense, peker=peker)
+        assert svar["status"] == SUKSESS
+        assert len(svar["innhold"]) <= grense
+        rader.extend(svar["innhold"])
+        peker = svar.get("neste_peker")
+        if peker is None:
+            return rader
+
+
+@pytest.mark.parametrize("grense", [1, 4, 7, 25, 100])
+def test_sidene_dekker_alt_én_gang_i_rekkefølge(fylt, grense):
+    rader = _alle_sider(fylt.spørring().hent, grense)
+
+    assert [rad["id"] for rad in rader] == [rad["id"] for rad in sorted(rader, key=lambda rad: (rad["dato"], rad["id"]))]
+    assert sorted(rad["id"] for rad in rader) == list(range(1, 26))
+
+
+def test_synkende_på_pris(fylt):
+    rader = _alle_sider(lambda **side: fylt.spørring().sorter("pris", synkende=True).hent(**side), 3)
+
+    assert [(rad["pris"], rad["id"]) for rad in rader] == sorted(((rad["pris"], rad["id"]) for rad in rader), reverse=True)
+    assert len(rader) == 25
+
+
+def test_sider_med_filter(fylt):
+    uttak = fylt.hent_transaksjoner_på_type("uttak")["innhold"]
+    rader = _alle_sider(lambda **side: fylt.hent_transaksjoner_på_type("uttak", **side), 4)
+
+    assert sorted(rad["id"] for rad in rader) == sorted(rad["id"] for rad in uttak)
+
+
+def test_ny_rad_før_pekeren_flytter_ikke_sidene(fylt):
+    første = fylt.spørring().hent(grense=10)
+    fylt.skriv_transaksjon_med_alt(1, "uttak", "2023-12-31", "tidligere enn alt")
+
+    resten = _alle_sider(lambda grense, peker: fylt.spørring().hent(grense=grense, peker=peker or første["neste_peker"]), 10)
+
+    assert len(første["innhold"]) + len(resten) == 25
+    assert not {rad["id"] for rad in første["innhold"]} & {rad["id"] for rad in resten}
+
+
+def test_siste_side_har_ingen_peker(fylt):
+    svar = fylt.spørring().hent(grense=25)
+    assert len(svar["innhold"]) == 25
+    assert svar.get("neste_peker") is None
+
+
+@pytest.mark.parametrize("side", [{"grense": 0}, {"grense": -1}, {"grense": "10"}, {"peker": "ikke en peker"}])
+def test_ugyldig_side(fylt, side):
+    assert fylt.spørring().hent(**side)["status"] == UGYLDIG_INPUT
+
+
+def test_ingen_treff(fylt):
+    svar = fylt.spørring().datoer("2030-01-01", "2030-12-31").hent(grense=10)
+    assert svar["status"] == SUKSESS_INGEN_INNHOLD
+    assert svar["innhold"] == []
+
+
+def test_med_alt_på_hver_side(fylt):
+    rader = _alle_sider(lambda **side: fylt.spørring().hent(med_alt=True, **side), 6)
+    assert all([person["navn"] for person in rad["personer"]] == ["Ola"] for rad in rader)
@@ -0,0 +1,55 @@
+import pytest
+
+from retur_meldinger import SUKSESS, SUKSESS_INGEN_INNHOLD, UGYLDIG_INPUT
+
+
+@pytest.fixture(params=["fts5", "like"])
+def fylt(request, transaksjoner):
+    for pris, dato, beskrivelse in ((100, "2024-01-01", "REMA 1000 Grünerløkka"), (200, "2024-02-01", "Kiwi, middag"),
+                                    (300, "2024-03-01", "rema 1000 lørdag"), (400, "2024-03-02", "Tog til Bergen")):
+        transaksjoner.skriv_transaksjon_med_alt(pris, "uttak", dato, beskrivelse, ["mat"])
+    if request.param == "like":
+        transaksjoner._fulltekst_tilgjengelig = lambda: False
+    elif not transaksjoner._fulltekst_tilgjengelig():
+        pytest.skip("sqlite er bygget uten FTS5")
+    return transaksjoner
+
+
+def _priser(svar):
+    assert svar["status"] == SUKSESS
+    return sorted(transaksjon["pris"] for transaksjon in svar["innhold"])
+
+
+def test_prefiks_og_store_bokstaver(fylt):
+    assert _priser(fylt.søk_på_beskrivelse("rem")) == [100, 300]
+    assert _priser(fylt.søk_på_beskrivelse("REMA lør")) == [300]
+    assert _priser(fylt.søk_på_beskrivelse("grünerløkka")) == [100]
+
+
+def test_tegn_i_søket_er_ikke_syntaks(fylt):
+    assert _priser(fylt.søk_på_beskrivelse('kiwi, "middag"')) == [200]
+    assert fylt.søk_på_beskrivelse("rema OR")["status"] == SUKSESS_INGEN_INNHOLD
+    assert fylt.søk_på_beskrivelse(" * ")["status"] == SUKSESS_INGEN_INNHOLD
+
+
+def test_filtere_og_grense(fylt):
+    assert _priser(fylt.søk_på_beskrivelse("rema", start_dato="2024-02-01")) == [300]
+    assert _priser(fylt.søk_på_beskrivelse("rema", slutt_dato="2024-02-01", handling="uttak")) == [100]
+    assert fylt.søk_på_beskrivelse("rema", handling="innskudd")["status"] == SUKSESS_INGEN_INNHOLD
+    assert len(fylt.søk_på_beskrivelse("rema", grense=1)["innhold"]) == 1
+    assert fylt.søk_på_beskrivelse("rema", grense=0)["status"] == UGYLDIG_INPUT
+    assert fylt.søk_på_beskrivelse("rema", start_dato="i går")["status"] == UGYLDIG_INPUT
+
+
+def test_med_alt(fylt):
+    assert [kategori["navn"] for kategori in fylt.søk_på_beskrivelse("tog", med_alt=True)["innhold"][0]["kategorier"]] == ["mat"]
+
+
+def test_indeksen_følger_endringer(transaksjoner):
+    ide = transaksjoner.skriv_transaksjon_med_alt(100, "uttak", "2024-01-01", "kaffe")["innhold"]["id"]
+    transaksjoner.oppdater_transaksjon(ide, 100, "uttak", "2024-01-01", "te")
+    assert transaksjoner.søk_på_beskrivelse("kaffe")["status"] == SUKSESS_INGEN_INNHOLD
+    assert _priser(transaksjoner.søk_på_beskrivelse("te")) == [100]
+
+    transaksjoner.fjern_transaksjon(ide)
+    assert transaksjoner.søk_på_beskrivelse("te")["status"] == SUKSESS_INGEN_INNHOLD
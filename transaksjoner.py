@@ -1,12 +1,29 @@
-import typing
-from sqlite3 import OperationalError
+from sqlite3 import OperationalError, IntegrityError
 from personer import Personer
 from kategorier import Kategorier
-from privat import _hent_rad_fra_tabel, _formater_svar, _str_til_str_list_parser, _filtrer_ut_tag_navn_fra_transaksjon
+from privat import _formater_svar, _skriveoperasjon, _tolk_csv_rad, _i_biter, _TRANSAKSJON_KOLONNER, _søke_ord, \
+    _lag_fts_spørring, _mellomlagret, _TAG_TABELLER
+from fingeravtrykk import lag_fingeravtrykk, oppdater_fingeravtrykk, finnes_fingeravtrykk
+from analyse import Øyeblikksbilde
+from spørring import Spørring
+from innlesing import les_filer
 from retur_meldinger import *
 from validering import *
 import datetime
 import csv
+import glob
+import itertools
+import os
+import time
+
+MENGDER = {
+    "større enn": ">",
+    "mindre enn": "<",
+    "lik": "=",
+    "større eller lik": ">=",
+    "mindre eller lik": "<=",
+    "ikke lik": "!="
+}
 
 class Transaksjoner:
     def __init__(self, databse : Database, personer : Personer, kategorier : Kategorier):
@@ -15,25 +32,35 @@ class Transaksjoner:
         self.kategorier = kategorier
 
 
+
+    @_skriveoperasjon("transaksjoner")
     def skriv(self, beløp: int, handling: str, dato: datetime, beskrivelse: str = ""):
 
         validert = er_gyldig_transaksjon_input(beløp, handling, dato, beskrivelse)
         if validert.get("status") != SUKSESS_INGEN_INNHOLD:
             return _formater_svar(validert.get("status"), [], validert.get('melding'))
 
-        if self._finnes_transaksjon_i_db({"pris": beløp, "type": handling, "dato": dato, "beskrivelse": beskrivelse}):
-            return _formater_svar(KONFLIKT, [], "Transaksjonen finnes allerede i databasen")
+        return self._sett_inn(beløp, handling, dato, beskrivelse)
+
 
+    def _sett_inn(self, beløp: int, handling: str, dato: datetime, beskrivelse: str, kategorier: list[str] = None,
+                  personer: list[str] = None) -> dict:
+        """Setter inn én validert transaksjon. Den unike indeksen på fingeravtrykket er selve duplikat-sjekken"""
+        fingeravtrykk = lag_fingeravtrykk({"pris": beløp, "type": handling, "dato": dato, "beskrivelse": beskrivelse,
+                                           "kategorier": kategorier, "personer": personer})
         try:
             transaksjon = self.database.execute(
-                "INSERT INTO transaksjoner (pris, type, dato, beskrivelse) VALUES (?, ?, ?, ?) RETURNING *",
-                (beløp, handling, dato, beskrivelse), fetchone=True, commit=True)
+                f"INSERT INTO transaksjoner (pris, type, dato, beskrivelse, fingeravtrykk) VALUES (?, ?, ?, ?, ?) RETURNING {_TRANSAKSJON_KOLONNER}",
+                (beløp, handling, dato, beskrivelse, fingeravtrykk), fetchone=True, commit=True)
 
             return _formater_svar(OPPRETTET_NY, transaksjon, "suksess")
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], "Transaksjonen finnes allerede i databasen")
         except OperationalError as e:
             return _formater_svar(TABEL_FINNES_IKKE, [], f"Kunne ikke legge til transaksjon: {e}")
 
 
+    @_skriveoperasjon("kategori_tag")
     def skriv_kategori(self, transaksjon_id, kategori_id):
         """Lage en refferanse mellom transaksjonen og kategorien"""
         if not er_helltall(transaksjon_id):
@@ -43,25 +70,30 @@ class Transaksjoner:
             return _formater_svar(UGYLDIG_INPUT, [], f"forventet type int, fikk {kategori_id} av typen {type(kategori_id).__name__}")
 
         try:
-            transaksjon = self.database.execute("SELECT * FROM transaksjoner WHERE id = ?", (transaksjon_id,), fetchone=True)
-            kategori = self.database.execute("SELECT * FROM kategorier WHERE id = ?", (kategori_id,), fetchone=True)
+            with self.database.transaksjon():
+                transaksjon = self.database.execute("SELECT * FROM transaksjoner WHERE id = ?", (transaksjon_id,), fetchone=True)
+                kategori = self.database.execute("SELECT * FROM kategorier WHERE id = ?", (kategori_id,), fetchone=True)
 
-            if not transaksjon:
-               return _formater_svar(UGYLDIG_INPUT, [], f"{transaksjon_id} er ikke en gyldig transaksjon")
+                if not transaksjon:
+                   return _formater_svar(UGYLDIG_INPUT, [], f"{transaksjon_id} er ikke en gyldig transaksjon")
 
-            if not kategori:
-                return _formater_svar(UGYLDIG_INPUT, [], f"{kategori_id} er ikke en gyldig kategori")
+                if not kategori:
+                    return _formater_svar(UGYLDIG_INPUT, [], f"{kategori_id} er ikke en gyldig kategori")
 
-            self.database.execute("INSERT INTO kategori_tag (transaksjon_id, kategori_id) VALUES (?, ?)",
-                                  (transaksjon_id, kategori_id),
-                                  commit=True)
+                self.database.execute("INSERT INTO kategori_tag (transaksjon_id, kategori_id) VALUES (?, ?)",
+                                      (transaksjon_id, kategori_id),
+                                      commit=True)
+                oppdater_fingeravtrykk(self.database, [transaksjon_id])
 
             return _formater_svar(OPPRETTET_NY, [], "suksess")
 
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], f"Transaksjon {transaksjon_id} ville blitt lik en transaksjon som finnes fra før")
         except OperationalError as e:
             return _formater_svar(TABEL_FINNES_IKKE, [], f"Kunne ikke legge til kategori: {kategori_id}, feilmelding: {e}")
 
 
+    @_skriveoperasjon("person_tag")
     def skriv_person(self, transaksjon_id, person_id) -> dict:
         """Lage en refferanse mellom transaksjonen og personen"""
 
@@ -70,25 +102,29 @@ class Transaksjoner:
                 return _formater_svar(UGYLDIG_INPUT, [],
                                           f"forventet type int, fikk {ide} av typen {type(ide).__name__}")
         try:
+            with self.database.transaksjon():
+                transaksjon = self.database.execute("SELECT * FROM transaksjoner WHERE id = ?", (transaksjon_id,), fetchone=True)
+                person = self.database.execute("SELECT * FROM personer WHERE id = ?", (person_id,), fetchone=True)
 
-            transaksjon = self.database.execute("SELECT * FROM transaksjoner WHERE id = ?", (transaksjon_id,), fetchone=True)
-            person = self.database.execute("SELECT * FROM personer WHERE id = ?", (person_id,), fetchone=True)
-
-            if not transaksjon:
-                return _formater_svar(UGYLDIG_INPUT, [], f"{transaksjon_id} er ikke en gyldig transaksjon")
+                if not transaksjon:
+                    return _formater_svar(UGYLDIG_INPUT, [], f"{transaksjon_id} er ikke en gyldig transaksjon")
 
-            if not person:
-                return _formater_svar(UGYLDIG_INPUT, [], f"{person_id} er ikke en gyldig person")
+                if not person:
+                    return _formater_svar(UGYLDIG_INPUT, [], f"{person_id} er ikke en gyldig person")
 
-            self.database.execute("INSERT INTO person_tag (transaksjon_id, person_id) VALUES (?, ?)", (transaksjon_id, person_id),
-                       commit=True)
+                self.database.execute("INSERT INTO person_tag (transaksjon_id, person_id) VALUES (?, ?)", (transaksjon_id, person_id),
+                           commit=True)
+                oppdater_fingeravtrykk(self.database, [transaksjon_id])
 
             return _formater_svar(OPPRETTET_NY, [], "suksess")
 
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], f"Transaksjon {transaksjon_id} ville blitt lik en transaksjon som finnes fra før")
         except OperationalError as e:
             return _formater_svar(TABEL_FINNES_IKKE, [], f"Kunne ikke legge til person: {person_id}, feilmelding: {e}")
 
 
+    @_skriveoperasjon("transaksjoner", "kategori_tag", "person_tag")
     def skriv_transaksjon_med_alt(self, beløp: int, handling: str, dato: datetime, beskrivelse: str, kategorier: list[str] = None,
                         personer: list[str] = None) -> dict:
 
@@ -102,42 +138,57 @@ class Transaksjoner:
         if not personer:
             personer = []
 
-        person_ider = []
-        for person in personer:
-            denne_person = self.personer.hent_på_navn(person)
-            if denne_person.get("status") == IKKE_FUNNET:
-                denne_person = self.personer.legg_til(person)
+        kategorier = list(dict.fromkeys(kategorier))    # samme tag to ganger bryter primærnøkkelen i tag-tabellene
+        personer = list(dict.fromkeys(personer))
 
-            person_ider.append(denne_person.get("innhold").get("id"))
+        with self.database.transaksjon():   # alt eller ingenting, og bare én commit
+            person_ider = []
+            for person in personer:
+                denne_person = self.personer.hent_på_navn(person)
+                if denne_person.get("status") == IKKE_FUNNET:
+                    denne_person = self.personer.legg_til(person)
 
-        kategori_ider = []
-        for kategori in kategorier:
-            denne_kategorien = self.kategorier.hent_på_navn(kategori)
-            if denne_kategorien.get("status") == IKKE_FUNNET:
-                denne_kategorien = self.kategorier.legg_til(kategori)
+                person_ider.append(denne_person.get("innhold").get("id"))
 
-            kategori_ider.append(denne_kategorien.get("innhold").get("id"))
+            kategori_ider = []
+            for kategori in kategorier:
+                denne_kategorien = self.kategorier.hent_på_navn(kategori)
+                if denne_kategorien.get("status") == IKKE_FUNNET:
+                    denne_kategorien = self.kategorier.legg_til(kategori)
 
-        transaksjon = self.skriv(beløp, handling, dato, beskrivelse)
-        if transaksjon.get("status") != OPPRETTET_NY:
-            return _formater_svar(transaksjon.get("status"), [], transaksjon.get("melding"))
+                kategori_ider.append(denne_kategorien.get("innhold").get("id"))
 
-        for person_id in person_ider:
-            self.skriv_person(transaksjon.get("innhold").get("id"), person_id)
+            # Fingeravtrykket lages med tags med en gang, så det ikke kolliderer med en lik transaksjon uten tags underveis
+            transaksjon = self._sett_inn(beløp, handling, dato, beskrivelse, kategorier, personer)
+            if transaksjon.get("status") != OPPRETTET_NY:
+                self.database.rull_tilbake()    # ikke la nye personer/kategorier bli liggende igjen
+                return _formater_svar(transaksjon.get("status"), [], transaksjon.get("melding"))
 
-        for kategori_id in kategori_ider:
-            self.skriv_kategori(transaksjon.get("innhold").get("id"), kategori_id)
+            transaksjon_id = transaksjon.get("innhold").get("id")
+            self.database.executemany("INSERT INTO person_tag (transaksjon_id, person_id) VALUES (?, ?)",
+                                      [(transaksjon_id, person_id) for person_id in person_ider], commit=True)
+            self.database.executemany("INSERT INTO kategori_tag (transaksjon_id, kategori_id) VALUES (?, ?)",
+                                      [(transaksjon_id, kategori_id) for kategori_id in kategori_ider], commit=True)
 
         return _formater_svar(OPPRETTET_NY, transaksjon.get("innhold"), "suksess")
 
 
+    def spørring(self) -> Spørring:
+        """
+        Ny spørring der filtrene kan kombineres, se spørring.py. List-metodene under er snarveier til den
+            transaksjoner.spørring().datoer("2024-01-01", "2024-01-31").har_personer(["Ola"]).hent(grense=50)
+        """
+        return Spørring(self)
+
+
+    @_mellomlagret("transaksjoner")
     def hent_på_id(self, iden: int) -> dict:
         """status: int, innhold: {id, beløp, type, dato, beskrivelse}, message: str"""
 
         if not er_helltall(iden):
             return _formater_svar(UGYLDIG_INPUT, [], f"forventet type int, fikk {iden} av typen {type(iden).__name__}")
 
-        transaksjon = self.database.execute("SELECT * FROM transaksjoner WHERE id = ?", (iden,), fetchone=True)
+        transaksjon = self.database.execute(f"SELECT {_TRANSAKSJON_KOLONNER} FROM transaksjoner WHERE id = ?", (iden,), fetchone=True)
 
         if not transaksjon:
             return _formater_svar(IKKE_FUNNET, transaksjon, "Fant ingen transaksjoner")
@@ -145,13 +196,19 @@ class Transaksjoner:
         return _formater_svar(SUKSESS, transaksjon, "suksess")
 
 
-    def hent_transaksjoner_på_pris(self, beløp, mengde="=") -> dict:
+    @_mellomlagret("transaksjoner")
+    def hent_transaksjoner_på_pris(self, beløp, mengde="=", med_alt: bool = False, grense: int = None, peker: str = None,
+                                   radformat: str = None) -> dict:
         """
         Henter alle transaksjoner i et beløps-segment
         :param beløp: int, prisen
         :param mengde: str, hvilket segment,
             større enn, lik, mindre enn
-        :return: _formater_svar[innhold] -> [{id, beløp, type, dato, beskrivelse}].
+        :param med_alt: ta med personer og kategorier på hver transaksjon, som i hent_transaksjon_med_alt
+        :param grense: hent maks så mange, sortert på dato og id. Se Spørring._hent_rader
+        :param peker: neste_peker fra forrige side
+        :param radformat: se rader.py. Standard er Database.radformat
+        :return: _formater_svar[innhold] -> [{id, beløp, type, dato, beskrivelse}], og neste_peker hvis det finnes flere.
             Feilmelding hvis ikke gyldig handling.
             SUKSESS hvis transaksjon funnet.
             SUKSESS_INGEN_INNHOLD hvis transaksjon ikke funnet.
@@ -160,37 +217,38 @@ class Transaksjoner:
         if not er_helltall(beløp):
             return _formater_svar(UGYLDIG_INPUT, [], f"Forventet typen int, fikk verdien {beløp} av typen {type(beløp).__name__}")
 
-        mengder = {
-            "større enn": ">",
-            "mindre enn": "<",
-            "lik": "=",
-            "større eller lik": ">=",
-            "mindre eller lik": "<=",
-            "ikke lik": "!="
-        }
+        side = er_gyldig_side(grense, peker, radformat)
+        if side.get("status") != SUKSESS_INGEN_INNHOLD:
+            return side
 
-        if mengde in mengder.keys():
-            tegn = mengder[mengde]
+        if mengde in MENGDER.keys():
+            tegn = MENGDER[mengde]
 
-        elif mengde in list(mengder.values()):
+        elif mengde in list(MENGDER.values()):
             tegn = mengde
 
         else:
             return _formater_svar(UGYLDIG_INPUT, [], f"Fant ikke tegn {mengde}")
 
-        transaksjoner = self.database.execute(f"SELECT * FROM transaksjoner WHERE pris {tegn} ?", (beløp,), fetchall=True)
+        transaksjoner, neste_peker = self.spørring().pris(tegn, beløp)._hent_rader(grense, peker, radformat, med_alt)
 
         if not transaksjoner:
             return _formater_svar(SUKSESS_INGEN_INNHOLD, transaksjoner, "Fant ingen transaksjoner")
 
-        return _formater_svar(SUKSESS, transaksjoner, "suksess")
+        return _formater_svar(SUKSESS, transaksjoner, "suksess", neste_peker)
 
 
-    def hent_transaksjoner_på_type(self, handling) -> dict:
+    @_mellomlagret("transaksjoner")
+    def hent_transaksjoner_på_type(self, handling, med_alt: bool = False, grense: int = None, peker: str = None,
+                                   radformat: str = None) -> dict:
         """
         Henter alle transaksjoner på handlings-type
         :param handling: str, "innskudd", "uttak", "utlegg" eller "tilbakebetaling"
-        :return: _formater_svar[innhold] -> [{id, beløp, type, dato, beskrivelse}].
+        :param med_alt: ta med personer og kategorier på hver transaksjon, som i hent_transaksjon_med_alt
+        :param grense: hent maks så mange, sortert på dato og id. Se Spørring._hent_rader
+        :param peker: neste_peker fra forrige side
+        :param radformat: se rader.py. Standard er Database.radformat
+        :return: _formater_svar[innhold] -> [{id, beløp, type, dato, beskrivelse}], og neste_peker hvis det finnes flere.
             Feilmelding hvis ikke gyldig handling.
             SUKSESS hvis transaksjon funnet.
             SUKSESS_INGEN_INNHOLD hvis transaksjon ikke funnet.
@@ -198,45 +256,172 @@ class Transaksjoner:
         if not er_gyldig_handling(handling):
             return _formater_svar(UGYLDIG_INPUT, [], f'Feil type handling. forventet "innskudd", "uttak", "utlegg" eller "tilbakebetaling" fikk "{handling}", av typen {type(handling).__name__}')
 
-        transaksjoner = self.database.execute("SELECT * FROM transaksjoner WHERE type = ?", (handling,), fetchall=True)
+        side = er_gyldig_side(grense, peker, radformat)
+        if side.get("status") != SUKSESS_INGEN_INNHOLD:
+            return side
+
+        transaksjoner, neste_peker = self.spørring().typer([handling])._hent_rader(grense, peker, radformat, med_alt)
 
         if not transaksjoner:
             return _formater_svar(SUKSESS_INGEN_INNHOLD, [], f"fant ingen transaksjon av typen {handling}")
         
-        return _formater_svar(SUKSESS, transaksjoner, "suksess")
+        return _formater_svar(SUKSESS, transaksjoner, "suksess", neste_peker)
 
 
-    def hent_transaksjoner_mellom_datoer(self, start_dato: str, slutt_dato: str) -> dict:
-        """status: int, innhold: [{id, beløp, type, dato, beskrivelse}], message: str"""
+    @_mellomlagret("transaksjoner")
+    def hent_transaksjoner_mellom_datoer(self, start_dato: str, slutt_dato: str, med_alt: bool = False, grense: int = None,
+                                         peker: str = None, radformat: str = None) -> dict:
+        """status: int, innhold: [{id, beløp, type, dato, beskrivelse}], message: str, neste_peker: str hvis grense er nådd"""
         if not er_gyldig_dato(start_dato):
             return _formater_svar(UGYLDIG_INPUT, [], f"forventet dato med iso-format. fikk {start_dato} av typen {type(start_dato).__name__}")
 
         if not er_gyldig_dato(slutt_dato):
             return _formater_svar(UGYLDIG_INPUT, [], f"forventet dato med iso-format. fikk {slutt_dato} av typen {type(slutt_dato).__name__}")
 
-        transaksjon = self.database.execute("SELECT * FROM transaksjoner WHERE dato BETWEEN ? AND ?", (start_dato, slutt_dato),
-                                            fetchall=True)
+        side = er_gyldig_side(grense, peker, radformat)
+        if side.get("status") != SUKSESS_INGEN_INNHOLD:
+            return side
+
+        transaksjon, neste_peker = self.spørring().datoer(start_dato, slutt_dato)._hent_rader(grense, peker, radformat, med_alt)
 
         if not transaksjon:
             return _formater_svar(SUKSESS_INGEN_INNHOLD, transaksjon, "Fant ingen transaksjoner")
 
-        return _formater_svar(SUKSESS, transaksjon, "suksess")
+        return _formater_svar(SUKSESS, transaksjon, "suksess", neste_peker)
 
 
-    def hent_transaksjoner_på_dato(self, dato) -> dict:
-        """status: int, innhold: [{id, beløp, type, dato, beskrivelse}], message: str"""
-        return self.hent_transaksjoner_mellom_datoer(dato, dato)  # Finne på en dato, er det samme som mellom på samme dato
+    def hent_transaksjoner_på_dato(self, dato, med_alt: bool = False, grense: int = None, peker: str = None,
+                                   radformat: str = None) -> dict:
+        """status: int, innhold: [{id, beløp, type, dato, beskrivelse}], message: str, neste_peker: str hvis grense er nådd"""
+        return self.hent_transaksjoner_mellom_datoer(dato, dato, med_alt, grense, peker, radformat)  # Finne på en dato, er det samme som mellom på samme dato
 
 
-    def hent_transaksjoner_på_beskrivelse(self, beskrivelse: str) -> dict:
+    @_mellomlagret("transaksjoner")
+    def hent_transaksjoner_på_beskrivelse(self, beskrivelse: str, med_alt: bool = False, grense: int = None, peker: str = None,
+                                          radformat: str = None) -> dict:
         if not er_gyldig_tekst(beskrivelse):
             return _formater_svar(UGYLDIG_INPUT, [], f"Forventet beskrivelse som tekst, ikke {beskrivelse}")
 
-        transaksjoner = self.database.execute("SELECT * FROM transaksjoner WHERE beskrivelse Like ?", (f"%{beskrivelse}%",), fetchall=True)
+        side = er_gyldig_side(grense, peker, radformat)
+        if side.get("status") != SUKSESS_INGEN_INNHOLD:
+            return side
+
+        transaksjoner, neste_peker = self.spørring().beskrivelse_inneholder(beskrivelse)._hent_rader(grense, peker, radformat, med_alt)
+
+        return _formater_svar(SUKSESS, transaksjoner, "suksess", neste_peker)
+
+
+    def iterer_transaksjoner_på_pris(self, beløp, mengde="=", med_alt: bool = False, størrelse: int = 1000) -> dict:
+        """
+        Som hent_transaksjoner_på_pris uten grense, men innholdet er en generator. Se Spørring.strøm
+        :param størrelse: antall rader som hentes fra databasen om gangen
+        :return: _formater_svar[innhold] -> generator med {id, pris, type, dato, beskrivelse}, sortert på dato og id
+        """
+        tegn = MENGDER.get(mengde, mengde) if isinstance(mengde, str) else mengde   # Spørring.pris sjekker tegnet
+        return self.spørring().pris(tegn, beløp).strøm(størrelse, med_alt)
+
+
+    def iterer_transaksjoner_på_type(self, handling, med_alt: bool = False, størrelse: int = 1000) -> dict:
+        """Som hent_transaksjoner_på_type uten grense, men innholdet er en generator. Se Spørring.strøm"""
+        if not er_gyldig_handling(handling):
+            return _formater_svar(UGYLDIG_INPUT, [], f'Feil type handling. forventet "innskudd", "uttak", "utlegg" eller "tilbakebetaling" fikk "{handling}", av typen {type(handling).__name__}')
+
+        return self.spørring().typer([handling]).strøm(størrelse, med_alt)
+
+
+    def iterer_transaksjoner_mellom_datoer(self, start_dato: str, slutt_dato: str, med_alt: bool = False, størrelse: int = 1000) -> dict:
+        """
+        Som hent_transaksjoner_mellom_datoer uten grense, men innholdet er en generator, for flere år med transaksjoner.
+        Se Spørring.strøm
+        """
+        for dato in (start_dato, slutt_dato):
+            if not er_gyldig_dato(dato):
+                return _formater_svar(UGYLDIG_INPUT, [], f"forventet dato med iso-format. fikk {dato} av typen {type(dato).__name__}")
+
+        return self.spørring().datoer(start_dato, slutt_dato).strøm(størrelse, med_alt)
+
+
+    def iterer_transaksjoner_på_dato(self, dato, med_alt: bool = False, størrelse: int = 1000) -> dict:
+        """Som hent_transaksjoner_på_dato uten grense, men innholdet er en generator. Se Spørring.strøm"""
+        return self.iterer_transaksjoner_mellom_datoer(dato, dato, med_alt, størrelse)
+
+
+    def iterer_transaksjoner_på_beskrivelse(self, beskrivelse: str, med_alt: bool = False, størrelse: int = 1000) -> dict:
+        """Som hent_transaksjoner_på_beskrivelse uten grense, men innholdet er en generator. Se Spørring.strøm"""
+        return self.spørring().beskrivelse_inneholder(beskrivelse).strøm(størrelse, med_alt)
+
+
+    @_mellomlagret("transaksjoner")
+    def søk_på_beskrivelse(self, tekst: str, grense: int = 50, start_dato: str = None, slutt_dato: str = None,
+                           handling: str = None, med_alt: bool = False) -> dict:
+        """
+        Søk i beskrivelsene med fulltekst-indeksen. Hvert ord i teksten må finnes som starten på et ord i beskrivelsen,
+        så "rem" finner "REMA 1000". De beste treffene kommer først.
+        Uten FTS5 brukes LIKE på hvert ord, sortert på nyeste dato i stedet for relevans.
+        :param tekst: str, det brukeren har skrevet i søkefeltet
+        :param grense: int, maks antall transaksjoner
+        :param start_dato: ta bare med transaksjoner fra og med denne datoen
+        :param slutt_dato: ta bare med transaksjoner til og med denne datoen
+        :param handling: ta bare med transaksjoner av denne typen
+        :param med_alt: ta med personer og kategorier på hver transaksjon, som i hent_transaksjon_med_alt
+        :return: _formater_svar[innhold] -> [{id, beløp, type, dato, beskrivelse}].
+            SUKSESS_INGEN_INNHOLD hvis ingenting ble funnet eller teksten ikke har noen ord
+        """
+        if not er_gyldig_tekst(tekst):
+            return _formater_svar(UGYLDIG_INPUT, [], f"Forventet søketekst som tekst, ikke {tekst}")
+
+        if not er_helltall(grense) or grense < 1:
+            return _formater_svar(UGYLDIG_INPUT, [], f"forventet grense som et positivt heltall, fikk {grense}")
+
+        filtere = []
+        filter_verdier = []
+
+        for dato, tegn in ((start_dato, ">="), (slutt_dato, "<=")):
+            if dato is not None:
+                if not er_gyldig_dato(dato):
+                    return _formater_svar(UGYLDIG_INPUT, [], f"forventet dato med iso-format. fikk {dato} av typen {type(dato).__name__}")
+                filtere.append(f"t.dato {tegn} ?")
+                filter_verdier.append(dato)
+
+        if handling is not None:
+            if not er_gyldig_handling(handling):
+                return _formater_svar(UGYLDIG_INPUT, [], f'Feil type handling. forventet "innskudd", "uttak", "utlegg" eller "tilbakebetaling" fikk "{handling}"')
+            filtere.append("t.type = ?")
+            filter_verdier.append(handling)
+
+        ord = _søke_ord(tekst)
+        if not ord:
+            return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "Ingen ord å søke etter")
+
+        kolonner = ", ".join(f"t.{kolonne}" for kolonne in _TRANSAKSJON_KOLONNER.split(", "))
+
+        if self._fulltekst_tilgjengelig():
+            filter_tekst = "".join(f" AND {filter}" for filter in filtere)
+            transaksjoner = self.database.execute(f"""
+                SELECT {kolonner} FROM transaksjoner_fts f JOIN transaksjoner t ON t.id = f.rowid
+                WHERE transaksjoner_fts MATCH ?{filter_tekst}
+                ORDER BY f.rank LIMIT ?""", (_lag_fts_spørring(ord), *filter_verdier, grense), fetchall=True)
+        else:
+            filter_tekst = " AND ".join(["t.beskrivelse LIKE ?"] * len(ord) + filtere)
+            transaksjoner = self.database.execute(f"""
+                SELECT {kolonner} FROM transaksjoner t WHERE {filter_tekst}
+                ORDER BY t.dato DESC, t.id DESC LIMIT ?""", (*[f"%{o}%" for o in ord], *filter_verdier, grense), fetchall=True)
+
+        if med_alt:
+            self._hydrer(transaksjoner)
+
+        if not transaksjoner:
+            return _formater_svar(SUKSESS_INGEN_INNHOLD, [], f"Fant ingen transaksjoner som passer med {tekst}")
 
         return _formater_svar(SUKSESS, transaksjoner, "suksess")
 
 
+    def _fulltekst_tilgjengelig(self) -> bool:
+        """Om databasen har transaksjoner_fts. Den lages av migrering 3, men bare hvis sqlite har FTS5"""
+        return self.database.skjema.har_tabell("transaksjoner_fts")
+
+
+    @_mellomlagret("person_tag", "personer")
     def hent_personer(self, transaksjon_id) -> dict:
         """
         Henter alle personer knyttet til en gitt transaksjon.
@@ -246,36 +431,29 @@ class Transaksjoner:
             - Hvis ingen personer funnet: {status: SUKSESS_INGEN_INNHOLD, innhold: [], melding: "..."}
             - Hvis personer funnet: {status: SUKSESS, innhold: [{id, navn, ...}, ...], melding: "suksess"}
         """
-        person_ider = self.database.execute("SELECT person_id FROM person_tag WHERE transaksjon_id = ?", (transaksjon_id,),
-                                 fetchall=True)
+        personer = self.database.execute(
+            "SELECT p.* FROM person_tag pt JOIN personer p ON p.id = pt.person_id WHERE pt.transaksjon_id = ?", (transaksjon_id,),
+            fetchall=True)
 
-        if not person_ider:
+        if not personer:
             return _formater_svar(SUKSESS_INGEN_INNHOLD, [], f"Fant ingen personer på transaksjon: {transaksjon_id}")
 
-        ider = []
-        for person_id in person_ider:
-            person = self.database.execute("SELECT * FROM personer WHERE id = ?", (person_id.get("person_id"),), fetchone=True)
-            ider.append(person)
-
-        return _formater_svar(SUKSESS, ider, "suksess")
+        return _formater_svar(SUKSESS, personer, "suksess")
 
+    @_mellomlagret("kategori_tag", "kategorier")
     def hent_kategorier(self, transaksjon_id) -> dict:
         """status: int, innhold: [{id, beløp, type, dato, beskrivelse}], message: str"""
-        kategori_ider = self.database.execute("SELECT kategori_id FROM kategori_tag WHERE transaksjon_id = ?", (transaksjon_id,),
-                                   fetchall=True)
+        kategorier = self.database.execute(
+            "SELECT k.* FROM kategori_tag kt JOIN kategorier k ON k.id = kt.kategori_id WHERE kt.transaksjon_id = ?", (transaksjon_id,),
+            fetchall=True)
 
-        if not kategori_ider:
+        if not kategorier:
             return _formater_svar(SUKSESS_INGEN_INNHOLD, [], f"Fant ingen personer på transaksjon: {transaksjon_id}")
 
-        ider = []
-        for kategori_id in kategori_ider:
-            kategori = self.database.execute("SELECT * FROM kategorier WHERE id = ?", (kategori_id.get("kategori_id"),),
-                                  fetchone=True)
-            ider.append(kategori)
-
-        return _formater_svar(SUKSESS, ider, "suksess")
+        return _formater_svar(SUKSESS, kategorier, "suksess")
 
 
+    @_mellomlagret("transaksjoner", *_TAG_TABELLER)
     def hent_transaksjon_med_alt(self, transaksjon_id) -> dict:
         """
         Henter en transaksjon med tilhørende personer og kategorier basert på ID.
@@ -295,51 +473,107 @@ class Transaksjoner:
         elif transaksjon.get("status") == UGYLDIG_INPUT:
             return _formater_svar(UGYLDIG_INPUT, [], transaksjon.get("melding"))
 
-        personer: list = self.hent_personer(transaksjon.get("innhold").get("id")).get("innhold")
-        kategorier: list = self.hent_kategorier(transaksjon.get("innhold").get("id")).get("innhold")
+        self._hydrer([transaksjon.get("innhold")])
 
-        alle_navn = []
-        for person in personer:
-            alle_navn.append(person.get("navn"))
+        return _formater_svar(SUKSESS, transaksjon.get("innhold"), "suksess")
 
-        alle_kategorier = []
-        for kategori in kategorier:
-            alle_kategorier.append(kategori.get("navn"))
 
-        transaksjon.get("innhold")["personer"] = personer
-        transaksjon.get("innhold")["kategorier"] = kategorier
+    @_mellomlagret("transaksjoner", *_TAG_TABELLER)
+    def hent_mange_med_alt(self, transaksjon_ider: list[int]) -> dict:
+        """
+        Som hent_transaksjon_med_alt, men for mange transaksjoner på en gang.
+        Bruker tre spørringer per 900 id-er, uansett hvor mange personer og kategorier det er.
 
-        return _formater_svar(SUKSESS, transaksjon.get("innhold"), "suksess")
+        :param transaksjon_ider: [int]
+        :return: dict
+            - Hvis en id ikke er et heltall: {status: UGYLDIG_INPUT, innhold: [], melding: "..."}
+            - Hvis ingen ble funnet: {status: SUKSESS_INGEN_INNHOLD, innhold: [], melding: "..."}
+            - Ellers: {status: SUKSESS, innhold: [{id, beløp, type, dato, beskrivelse,
+              personer: [{id, navn}], kategorier: [{id, navn}]}], melding: "suksess"}
+              i samme rekkefølge som transaksjon_ider. Id-er som ikke finnes blir hoppet over
+        """
+        for ide in transaksjon_ider:
+            if not er_helltall(ide):
+                return _formater_svar(UGYLDIG_INPUT, [], f"forventet type int, fikk {ide} av typen {type(ide).__name__}")
+
+        funnet = {}
+        for bit in _i_biter(list(dict.fromkeys(transaksjon_ider))):
+            spørsmålstegn_tekst = ",".join(["?"] * len(bit))
+            for transaksjon in self.database.execute(
+                    f"SELECT {_TRANSAKSJON_KOLONNER} FROM transaksjoner WHERE id IN ({spørsmålstegn_tekst})", bit, fetchall=True):
+                funnet[transaksjon.get("id")] = transaksjon
 
+        transaksjoner = [funnet[ide] for ide in transaksjon_ider if ide in funnet]
+        if not transaksjoner:
+            return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "Fant ingen transaksjoner")
 
-    def finn_transaksjoner_med_info(self, transaksjon_innhold) -> dict:
+        self._hydrer(list(funnet.values()))
 
-        filtere = []
-        filter_verdier = []
+        return _formater_svar(SUKSESS, transaksjoner, "suksess")
+
+
+    def _hydrer(self, transaksjoner: list[dict]) -> list[dict]:
+        """Legger til personer: [{id, navn}] og kategorier: [{id, navn}] på transaksjonene, med to spørringer per 900 transaksjoner"""
+        per_id = {}
+        for transaksjon in transaksjoner:
+            transaksjon["personer"] = []
+            transaksjon["kategorier"] = []
+            per_id[transaksjon.get("id")] = transaksjon
+
+        for bit in _i_biter(list(per_id)):
+            spørsmålstegn_tekst = ",".join(["?"] * len(bit))
 
-        if transaksjon_innhold.get("pris"):
-            filtere.append("pris = ?")
-            filter_verdier.append(transaksjon_innhold.get("pris"))
-        if transaksjon_innhold.get("type"):
-            filtere.append("type = ?")
-            filter_verdier.append(transaksjon_innhold.get("type"))
-        if transaksjon_innhold.get("dato"):
-            filtere.append("dato = ?")
-            filter_verdier.append(transaksjon_innhold.get("dato"))
-        if transaksjon_innhold.get("beskrivelse"):
-            filtere.append("beskrivelse = ?")
-            filter_verdier.append(transaksjon_innhold.get("beskrivelse"))
+            for person in self.database.execute(f"""
+                    SELECT pt.transaksjon_id, p.id, p.navn FROM person_tag pt JOIN personer p ON p.id = pt.person_id
+                    WHERE pt.transaksjon_id IN ({spørsmålstegn_tekst})""", bit, fetchall=True):
+                per_id[person.pop("transaksjon_id")]["personer"].append(person)
 
-        filter_teskt = " AND ".join(filtere)
+            for kategori in self.database.execute(f"""
+                    SELECT kt.transaksjon_id, k.id, k.navn FROM kategori_tag kt JOIN kategorier k ON k.id = kt.kategori_id
+                    WHERE kt.transaksjon_id IN ({spørsmålstegn_tekst})""", bit, fetchall=True):
+                per_id[kategori.pop("transaksjon_id")]["kategorier"].append(kategori)
 
-        funnet_transaksjon = self.database.execute(f"SELECT * FROM transaksjoner WHERE {filter_teskt}", tuple(filter_verdier), fetchall=True)
+        return transaksjoner
+
+
+    @_mellomlagret("transaksjoner")
+    def finn_transaksjoner_med_info(self, transaksjon_innhold, med_alt: bool = False, grense: int = None, peker: str = None,
+                                    radformat: str = None) -> dict:
+        """
+        Finner transaksjonene som er lik transaksjon_innhold på alle feltene som er med (pris, type, dato og beskrivelse).
+        Uten noen av feltene finnes alle transaksjonene. Bruk spørring() for andre filtre enn likhet
+        :return: _formater_svar[innhold] -> [{id, pris, type, dato, beskrivelse}], og neste_peker hvis det finnes flere.
+            IKKE_FUNNET hvis ingen passer
+        """
+        if not isinstance(transaksjon_innhold, dict):
+            return _formater_svar(UGYLDIG_INPUT, [], f"forventet type dict, fikk {transaksjon_innhold} av typen {type(transaksjon_innhold).__name__}")
+
+        side = er_gyldig_side(grense, peker, radformat)
+        if side.get("status") != SUKSESS_INGEN_INNHOLD:
+            return side
+
+        spørring = self.spørring()
+        if transaksjon_innhold.get("pris") is not None:
+            spørring.pris("=", transaksjon_innhold.get("pris"))
+        if transaksjon_innhold.get("type") is not None:
+            spørring.typer([transaksjon_innhold.get("type")])
+        if transaksjon_innhold.get("dato") is not None:
+            spørring.dato(transaksjon_innhold.get("dato"))
+        if transaksjon_innhold.get("beskrivelse") is not None:
+            spørring.beskrivelse_lik(transaksjon_innhold.get("beskrivelse"))
+
+        if spørring._feil is not None:
+            return _formater_svar(UGYLDIG_INPUT, [], spørring._feil)
+
+        funnet_transaksjon, neste_peker = spørring._hent_rader(grense, peker, radformat, med_alt)
 
         if not funnet_transaksjon:
             return _formater_svar(IKKE_FUNNET, [], f"Fant ingen transaksjoner med innholdet {transaksjon_innhold}")
 
-        return _formater_svar(SUKSESS, funnet_transaksjon, "suksess")
+        return _formater_svar(SUKSESS, funnet_transaksjon, "suksess", neste_peker)
 
 
+    @_skriveoperasjon("transaksjoner")
     def oppdater_transaksjon(self, transaksjon_id, beløp, handling, dato, beskrivelse) -> dict:
 
         if not er_helltall(transaksjon_id):
@@ -350,18 +584,24 @@ class Transaksjoner:
             return _formater_svar(validering.get("status"), [], validering.get("melding"))
 
 
-        transaksjon = self.database.execute(
-            "UPDATE transaksjoner SET pris = ?, type = ?, dato = ?, beskrivelse = ? WHERE id = ? RETURNING *",
-            (beløp, handling, dato, beskrivelse, transaksjon_id,), fetchone=True, commit=True)
+        try:
+            with self.database.transaksjon():
+                transaksjon = self.database.execute(
+                    f"UPDATE transaksjoner SET pris = ?, type = ?, dato = ?, beskrivelse = ? WHERE id = ? RETURNING {_TRANSAKSJON_KOLONNER}",
+                    (beløp, handling, dato, beskrivelse, transaksjon_id,), fetchone=True, commit=True)
+                oppdater_fingeravtrykk(self.database, [transaksjon_id])
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], f"Transaksjon {transaksjon_id} ville blitt lik en transaksjon som finnes fra før")
 
         if not transaksjon:
             return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "Tomme celler. Kan være feil transaksjon_id")
 
         return _formater_svar(SUKSESS, transaksjon, "suksess")
     
+    @_skriveoperasjon("kategori_tag", "person_tag")
     def _oppdater_tag(self, table, transaksjon_id, gammel_tag_id, ny_tag_id):
 
-        if f"{table}_tag" not in hent_tables(self.database):
+        if not self.database.skjema.har_kolonne(f"{table}_tag", f"{table}_id"):    # navnene settes rett inn i UPDATE under
             return _formater_svar(IKKE_FUNNET, [], f"{table}_tag finnes ikke i databasen")
 
         if not er_helltall(transaksjon_id):
@@ -376,8 +616,13 @@ class Transaksjoner:
             return _formater_svar(UGYLDIG_INPUT, [],
                                   f'Forventet ny_{table}_id av type int, fikk {ny_tag_id} av typen {type(ny_tag_id).__name__}')
 
-        self.database.execute(f"UPDATE {table}_tag SET {table}_id = ? WHERE transaksjon_id = ? AND {table}_id = ? ",
-                   (ny_tag_id, transaksjon_id, gammel_tag_id,), commit=True)
+        try:
+            with self.database.transaksjon():
+                self.database.execute(f"UPDATE {table}_tag SET {table}_id = ? WHERE transaksjon_id = ? AND {table}_id = ? ",
+                           (ny_tag_id, transaksjon_id, gammel_tag_id,), commit=True)
+                oppdater_fingeravtrykk(self.database, [transaksjon_id])
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], f"Transaksjon {transaksjon_id} ville blitt lik en transaksjon som finnes fra før")
 
         return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
 
@@ -390,23 +635,84 @@ class Transaksjoner:
         return self._oppdater_tag("person", transaksjon_id, gammel_person_id, ny_person_id)
 
 
+    @_skriveoperasjon("transaksjoner", "kategori_tag", "person_tag")
     def fjern_transaksjon(self, transaksjon_id) -> dict:
         """status: int, innhold: [], message: str"""
+        # tag-radene fjernes av ON DELETE CASCADE
         self.database.execute("DELETE FROM transaksjoner WHERE id = ?", (transaksjon_id,), commit=True)
-        self.database.execute("DELETE FROM kategori_tag WHERE transaksjon_id = ?", (transaksjon_id,), commit=True)
-        self.database.execute("DELETE FROM person_tag WHERE transaksjon_id = ?", (transaksjon_id,), commit=True)
         return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
 
 
+    @_skriveoperasjon("transaksjoner", "kategori_tag", "person_tag")
+    def fjern_transaksjoner(self, transaksjon_ider: list[int] = None, start_dato: str = None, slutt_dato: str = None,
+                            handling: str = None, kategori: str = None, person: str = None) -> dict:
+        """
+        Fjerner alle transaksjonene som passer med alle filtrene, med tags, i én transaksjon.
+        Det er én DELETE på transaksjoner, tag-radene fjernes av ON DELETE CASCADE (foreign_keys må være på, som er standard).
+        Minst ett filter må være med, så hele tabellen ikke tømmes ved en feil
+        :param transaksjon_ider: ta bare med transaksjoner med disse id-ene. Sendes som én json-liste, så lengden er ubegrenset
+        :param start_dato: ta bare med transaksjoner fra og med denne datoen
+        :param slutt_dato: ta bare med transaksjoner til og med denne datoen
+        :param handling: ta bare med transaksjoner av denne typen
+        :param kategori: ta bare med transaksjoner med en kategori med dette navnet
+        :param person: ta bare med transaksjoner med en person med dette navnet
+        :return: _formater_svar[innhold] -> {transaksjoner, kategori_tag, person_tag}, antall rader fjernet fra hver tabell
+        """
+        spørring = self.spørring().datoer(start_dato, slutt_dato)
+        if transaksjon_ider is not None:
+            spørring.id_er(transaksjon_ider)
+        if handling is not None:
+            spørring.typer([handling])
+        if kategori is not None:
+            spørring.har_kategorier([kategori])
+        if person is not None:
+            spørring.har_personer([person])
+
+        if spørring._feil is not None:
+            return _formater_svar(UGYLDIG_INPUT, [], spørring._feil)
+
+        if not spørring._filtere:
+            return _formater_svar(UGYLDIG_INPUT, [], "fjern_transaksjoner trenger minst ett filter")
+
+        utvalg = f"SELECT t.id FROM transaksjoner t{spørring._hvor()}"
+        filter_verdier = spørring._verdier
+
+        try:
+            with self.database.transaksjon():
+                # sqlite teller ikke rader fjernet av ON DELETE CASCADE, så tag-radene telles før de forsvinner
+                antall = {}
+                for tag_tabel in ("kategori_tag", "person_tag"):
+                    antall[tag_tabel] = self.database.execute(
+                        f"SELECT count(*) AS antall FROM {tag_tabel} WHERE transaksjon_id IN ({utvalg})", filter_verdier, fetchone=True).get("antall")
+
+                antall["transaksjoner"] = self.database.execute(f"DELETE FROM transaksjoner WHERE id IN ({utvalg})", filter_verdier).rowcount
+        except OperationalError as e:
+            return _formater_svar(TABEL_FINNES_IKKE, [], f"Kunne ikke fjerne transaksjoner: {e}")
+
+        return _formater_svar(SUKSESS, antall, "suksess")
+
+
+    @_skriveoperasjon("kategori_tag")
     def fjern_transaksjons_kategori(self, transaksjon_id, kategori_id) -> dict:
-        self.database.execute("DELETE FROM kategori_tag WHERE transaksjon_id = ? AND kategori_id = ?",
-                   (transaksjon_id, kategori_id,), commit=True)
+        try:
+            with self.database.transaksjon():
+                self.database.execute("DELETE FROM kategori_tag WHERE transaksjon_id = ? AND kategori_id = ?",
+                           (transaksjon_id, kategori_id,), commit=True)
+                oppdater_fingeravtrykk(self.database, [transaksjon_id])
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], f"Transaksjon {transaksjon_id} ville blitt lik en transaksjon som finnes fra før")
         return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
 
 
+    @_skriveoperasjon("person_tag")
     def fjern_transaksjons_person(self, transaksjon_id, person_id) -> dict:
-        self.database.execute("DELETE FROM person_tag WHERE transaksjon_id = ? AND person_id = ?", (transaksjon_id, person_id,),
-                   commit=True)
+        try:
+            with self.database.transaksjon():
+                self.database.execute("DELETE FROM person_tag WHERE transaksjon_id = ? AND person_id = ?", (transaksjon_id, person_id,),
+                           commit=True)
+                oppdater_fingeravtrykk(self.database, [transaksjon_id])
+        except IntegrityError:
+            return _formater_svar(KONFLIKT, [], f"Transaksjon {transaksjon_id} ville blitt lik en transaksjon som finnes fra før")
         return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
 
 
@@ -414,8 +720,10 @@ class Transaksjoner:
         """
         [{"id": id, "type": type, "dato": dato, "beskrivelse": beskrivelse}, {"id": id, "type": type, "dato": dato, "beskrivelse": beskrivelse}, {"id": id, "type": type, "dato": dato, "beskrivelse": beskrivelse}]
         [{"id": id}, {"id": id}, {"id": id}, {"id": id}]
+        Henter transaksjonene med hent_mange_med_alt, 900 om gangen, og skriver hver bit før neste hentes.
+        Filen skrives til filnavn.tmp og flyttes på plass til slutt, så den ikke blir halvferdig hvis en id ikke finnes.
         """
-        funnnet_transaksjoner = []
+        ider = []
         for transaksjon in transaksjoner:
             ide = transaksjon.get("id")
             if ide is None:
@@ -423,35 +731,105 @@ class Transaksjoner:
 
             if not er_helltall(ide):
                 return _formater_svar(UGYLDIG_INPUT, [], f"ID-en er ikke et heltall. fikk ID-en {ide}")
+            ider.append(ide)
 
-            transaksjon_info = self.hent_transaksjon_med_alt(ide)
-            if transaksjon_info.get("status") == IKKE_FUNNET:
-                return _formater_svar(IKKE_FUNNET, [], f"Fant ingen transaksjon med id: {ide} i databasen")
-
-            innhold = transaksjon_info.get("innhold")
-            personer = []
-            for person in innhold.get("personer"):
-                personer.append(person.get("navn"))
-
-            kategorier = []
-            for kategori in innhold.get("kategorier"):
-                kategorier.append(kategori.get("navn"))
-
-            innhold["kategorier"] = kategorier
-            innhold["personer"] = personer
-            innhold.pop("id")
+        midlertidig = f"{filnavn}.tmp"
+        try:
+            with open(midlertidig, "w", newline="") as csvfil:
+                felt = ["pris", "type", "dato", "beskrivelse", "kategorier", "personer"]
+                skriver = csv.DictWriter(csvfil, fieldnames=felt, delimiter=";")
+                skriver.writeheader()
+
+                for bit in _i_biter(ider):
+                    funnet = self.hent_mange_med_alt(bit).get("innhold")
+                    if len(funnet) < len(bit):
+                        funnet_ider = {transaksjon.get("id") for transaksjon in funnet}
+                        mangler = next(ide for ide in bit if ide not in funnet_ider)
+                        os.remove(midlertidig)
+                        return _formater_svar(IKKE_FUNNET, [], f"Fant ingen transaksjon med id: {mangler} i databasen")
+
+                    skriver.writerows({
+                        "pris": transaksjon.get("pris"),
+                        "type": transaksjon.get("type"),
+                        "dato": transaksjon.get("dato"),
+                        "beskrivelse": transaksjon.get("beskrivelse"),
+                        "kategorier": [kategori.get("navn") for kategori in transaksjon.get("kategorier")],
+                        "personer": [person.get("navn") for person in transaksjon.get("personer")],
+                    } for transaksjon in funnet)
+        except BaseException:
+            if os.path.exists(midlertidig):
+                os.remove(midlertidig)
+            raise
+
+        os.replace(midlertidig, filnavn)
+        return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
 
-            funnnet_transaksjoner.append(innhold)
 
+    def eksporter_csv_strøm(self, filnavn: str, start_dato: str = None, slutt_dato: str = None, handling: str = None,
+                            kategori: str = None, batch_størrelse: int = 1000) -> dict:
+        """
+        Eksporterer transaksjoner til csv uten å holde dem i minnet. Radene leses fra en cursor i biter og skrives med en gang,
+        med kategori- og personnavn samlet av sqlite. Uten filtere eksporteres hele tabellen.
+        :param start_dato: ta bare med transaksjoner fra og med denne datoen
+        :param slutt_dato: ta bare med transaksjoner til og med denne datoen
+        :param handling: ta bare med transaksjoner av denne typen
+        :param kategori: ta bare med transaksjoner med en kategori med dette navnet
+        :param batch_størrelse: antall rader som hentes fra databasen om gangen
+        :return: _formater_svar[innhold] -> {antall}
+        """
+        spørring = self.spørring().datoer(start_dato, slutt_dato)
+        if handling is not None:
+            spørring.typer([handling])
+        if kategori is not None:
+            spørring.har_kategorier([kategori])
+
+        if spørring._feil is not None:
+            return _formater_svar(UGYLDIG_INPUT, [], spørring._feil)
+
+        rader = self.database.iterer(f"""
+            SELECT t.pris, t.type, t.dato, t.beskrivelse,
+                (SELECT json_group_array(k.navn) FROM kategori_tag kt JOIN kategorier k ON k.id = kt.kategori_id
+                    WHERE kt.transaksjon_id = t.id) AS kategorier,
+                (SELECT json_group_array(p.navn) FROM person_tag pt JOIN personer p ON p.id = pt.person_id
+                    WHERE pt.transaksjon_id = t.id) AS personer
+            FROM transaksjoner t{spørring._hvor()}
+            ORDER BY t.dato, t.id""", spørring._verdier, batch_størrelse)
+
+        antall = 0
         with open(filnavn, "w", newline="") as csvfil:
             felt = ["pris", "type", "dato", "beskrivelse", "kategorier", "personer"]
             skriver = csv.DictWriter(csvfil, fieldnames=felt, delimiter=";")
 
             skriver.writeheader()
-            skriver.writerows(funnnet_transaksjoner)
+            for rad in rader:   # kategorier og personer er allerede json-lister, som importer_csv_fil kan lese
+                skriver.writerow(rad)
+                antall += 1
 
+        return _formater_svar(SUKSESS, {"antall": antall}, "suksess")
 
-        return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
+
+    def øyeblikksbilde(self, start_dato: str = None, slutt_dato: str = None, handling: str = None) -> dict:
+        """
+        Leser transaksjonene inn i et analyse.Øyeblikksbilde, med numpy-arrayer for filtrering, summer per gruppe og saldo.
+        Krever numpy. Oppdater bildet med oppdater(), som bare henter transaksjoner som er nyere enn bildet
+        :param start_dato: ta bare med transaksjoner fra og med denne datoen
+        :param slutt_dato: ta bare med transaksjoner til og med denne datoen
+        :param handling: ta bare med transaksjoner av denne typen
+        :return: _formater_svar[innhold] -> Øyeblikksbilde
+        """
+        for dato in (start_dato, slutt_dato):
+            if dato is not None and not er_gyldig_dato(dato):
+                return _formater_svar(UGYLDIG_INPUT, [], f"forventet dato med iso-format. fikk {dato} av typen {type(dato).__name__}")
+
+        if handling is not None and not er_gyldig_handling(handling):
+            return _formater_svar(UGYLDIG_INPUT, [], f'Feil type handling. forventet "innskudd", "uttak", "utlegg" eller "tilbakebetaling" fikk "{handling}"')
+
+        try:
+            bilde = Øyeblikksbilde(self.database, start_dato, slutt_dato, handling)
+        except ImportError as feil:
+            return _formater_svar(GENERELL_FEIL, [], str(feil))
+
+        return _formater_svar(SUKSESS, bilde, "suksess")
 
 
     def _finnes_transaksjon_i_db(self, input_transaksjon: dict) -> bool:
@@ -459,60 +837,324 @@ class Transaksjoner:
         input_transaksjon["kategorier"] = sorted(input_transaksjon.get("kategorier", []))
         input_transaksjon["personer"] = sorted(input_transaksjon.get("personer", []))
 
-        like_transaksjoner = self.finn_transaksjoner_med_info(input_transaksjon)
-        if like_transaksjoner.get("status") == IKKE_FUNNET:
-            return False
-
-        transaksjoner_med_like_kategorier = []
-        for lik_transaksjon in like_transaksjoner.get("innhold"):
-            kategorier_i_transaksjon = sorted(_filtrer_ut_tag_navn_fra_transaksjon(self.hent_kategorier(lik_transaksjon.get("id"))))
-            if input_transaksjon.get("kategorier") == kategorier_i_transaksjon:
-                transaksjoner_med_like_kategorier.append(lik_transaksjon)
-
-        for lik_transaksjon in transaksjoner_med_like_kategorier:
-            personer_i_transaksjon = sorted(_filtrer_ut_tag_navn_fra_transaksjon(self.hent_kategorier(lik_transaksjon.get("id"))))
-            if input_transaksjon.get("kategorier") == personer_i_transaksjon:
-                return True
-
-        return False
+        return finnes_fingeravtrykk(self.database, lag_fingeravtrykk(input_transaksjon))
 
 
+    @_skriveoperasjon("transaksjoner", "kategori_tag", "person_tag")
     def importer_csv_fil(self, filnavn: str) -> dict:
-        retur_melding = ""
-        with (open(filnavn, "r", newline="") as csvfil):
+        """
+        Importerer hele filen i én transaksjon, eller ingenting hvis en rad er ugyldig. Se importer_csv_fil_bulk for store filer.
+        Transaksjoner som finnes fra før hoppes over
+        :param filnavn: samme format som eksporter_csv_fil skriver
+        :return: _formater_svar[innhold] -> {lest, lagt_til, duplikater, avvist: [{linje, melding}]}
+            OPPRETTET_NY hvis minst én transaksjon ble lagt til, ellers SUKSESS_INGEN_INNHOLD.
+            avvist er rader som var gyldige, men ikke kunne skrives.
+            UGYLDIG_INPUT med linjenummeret hvis en rad ikke kan leses eller ikke er gyldig
+        """
+        oppsummering = {"lest": 0, "lagt_til": 0, "duplikater": 0, "avvist": []}
+        with self.database.transaksjon(), open(filnavn, "r", newline="") as csvfil:    # én commit for hele filen
             leser = csv.DictReader(csvfil, delimiter=";")
-            i = 0
-            for transaksjon in leser:
-                i += 1
-                transaksjon["pris"] = int(transaksjon.get("pris"))  # Konvertere fra Str til Int
-                csv_kategorier = sorted(_str_til_str_list_parser(transaksjon.get("kategorier")))
-                csv_personer = sorted( _str_til_str_list_parser(transaksjon.get("personer")))
-
-                transaksjon["kategorier"] = csv_kategorier
-                transaksjon["personer"] = csv_personer
+            for rad in leser:
+                oppsummering["lest"] += 1
+                try:
+                    transaksjon = _tolk_csv_rad(rad)
+                except (TypeError, ValueError):
+                    self.database.rull_tilbake()    # hele filen eller ingenting
+                    return _formater_svar(UGYLDIG_INPUT, [], f"Linje {leser.line_num}: ugyldig pris {rad.get('pris')}, "
+                                                            f"eller kategorier/personer som ikke er en liste")
 
                 validert = er_hentet_transaksjon_innhold_gyldig(transaksjon)
-                if validert.get("status") == UGYLDIG_INPUT:
-                    return _formater_svar(validert.get("status"), [], validert.get("melding"))
-
+                if validert.get("status") != SUKSESS_INGEN_INNHOLD:
+                    self.database.rull_tilbake()
+                    return _formater_svar(UGYLDIG_INPUT, [], f"Linje {leser.line_num}: {validert.get('melding')}")
 
                 if self._finnes_transaksjon_i_db(transaksjon):
+                    oppsummering["duplikater"] += 1
                     continue
 
-                self.skriv_transaksjon_med_alt(
+                svar = self.skriv_transaksjon_med_alt(
                     transaksjon.get("pris"),
                     transaksjon.get("type"),
                     transaksjon.get("dato"),
                     transaksjon.get("beskrivelse"),
-                    csv_kategorier,
-                    csv_personer
+                    transaksjon.get("kategorier"),
+                    transaksjon.get("personer")
                 )
+                if svar.get("status") == OPPRETTET_NY:
+                    oppsummering["lagt_til"] += 1
+                elif svar.get("status") == KONFLIKT:
+                    oppsummering["duplikater"] += 1
+                else:   # raden er allerede rullet tilbake av skriv_transaksjon_med_alt, resten av filen skrives
+                    oppsummering["avvist"].append({"linje": leser.line_num, "melding": svar.get("melding")})
+
+        if oppsummering["lagt_til"] == 0:
+            return _formater_svar(SUKSESS_INGEN_INNHOLD, oppsummering, "Ingen nye transaksjoner")
 
-                retur_melding += f"La til transaksjonen {transaksjon}\n"
+        return _formater_svar(OPPRETTET_NY, oppsummering, "suksess")
 
-        status = OPPRETTET_NY
-        if retur_melding == "":
-            retur_melding = "suksess"
-            status = SUKSESS_INGEN_INNHOLD
 
-        return _formater_svar(status, [], retur_melding)
+    def importer_csv_fil_bulk(self, filnavn: str, batch_størrelse: int = 5000) -> dict:
+        """
+        Importerer store csv-filer. Leser filen i biter på batch_størrelse rader, og skriver hver bit i én transaksjon.
+        Ugyldige rader hoppes over og rapporteres, i stedet for å stoppe hele importen.
+        :param filnavn: samme format som eksporter_csv_fil skriver
+        :param batch_størrelse: antall rader per transaksjon
+        :return: _formater_svar[innhold] -> {lest, lagt_til, duplikater, avvist: [{linje, melding}]}
+            OPPRETTET_NY hvis minst én transaksjon ble lagt til, ellers SUKSESS_INGEN_INNHOLD
+        """
+        oppsummering = {"lest": 0, "lagt_til": 0, "duplikater": 0, "avvist": []}
+
+        with open(filnavn, "r", newline="") as csvfil:
+            leser = csv.DictReader(csvfil, delimiter=";")
+
+            while True:
+                rader = [(leser.line_num, rad) for rad in itertools.islice(leser, batch_størrelse)]
+                if not rader:
+                    break
+
+                batch = []
+                for linje, rad in rader:
+                    try:
+                        transaksjon = _tolk_csv_rad(rad)
+                    except (TypeError, ValueError):
+                        oppsummering["avvist"].append({"linje": linje, "melding": f"Ugyldig pris {rad.get('pris')}"})
+                        continue
+
+                    validert = er_hentet_transaksjon_innhold_gyldig(transaksjon)
+                    if validert.get("status") != SUKSESS_INGEN_INNHOLD:
+                        oppsummering["avvist"].append({"linje": linje, "melding": validert.get("melding")})
+                        continue
+
+                    batch.append(transaksjon)
+
+                oppsummering["lest"] += len(rader)
+                if not batch:
+                    continue
+
+                ider = self._skriv_batch(batch)
+                lagt_til = sum(1 for ide in ider if ide is not None)
+                oppsummering["lagt_til"] += lagt_til
+                oppsummering["duplikater"] += len(ider) - lagt_til
+
+        if oppsummering["lagt_til"] == 0:
+            return _formater_svar(SUKSESS_INGEN_INNHOLD, oppsummering, "Ingen nye transaksjoner")
+
+        return _formater_svar(OPPRETTET_NY, oppsummering, "suksess")
+
+
+    def importer_mappe(self, mappe: str, mønster: str = "*.csv", prosesser: int = None, batch_størrelse: int = 5000,
+                       fremdrift=None) -> dict:
+        """
+        Importerer alle csv-filene i en mappe. Filene tolkes, valideres og får fingeravtrykk i en prosesspool (se innlesing.py),
+        mens denne prosessen skriver hver fil så snart den er lest, i batcher med _skriv_batch. All skriving går dermed gjennom én skriver.
+        En transaksjon som finnes i databasen, eller i en fil som allerede er skrevet, telles som duplikat.
+        Hver batch er én transaksjon i databasen, som i importer_csv_fil_bulk, så en fil som stopper halvveis er delvis skrevet.
+        :param mønster: glob for filene i mappen
+        :param prosesser: antall prosesser som leser filer. Standard er antall kjerner, 0 leser i denne prosessen
+        :param batch_størrelse: antall transaksjoner per transaksjon i databasen
+        :param fremdrift: kalles med resultatet for hver fil når den er skrevet:
+            {fil, lest, lagt_til, duplikater, avvist: [{linje, melding}], sekunder_lesing, sekunder_skriving, rader_per_sekund}
+        :return: _formater_svar[innhold] -> {filer: [som til fremdrift], feil: [{fil, melding}], lest, lagt_til, duplikater, avvist,
+            sekunder, rader_per_sekund}. OPPRETTET_NY hvis minst én ble lagt til, ellers SUKSESS_INGEN_INNHOLD
+        """
+        if not er_gyldig_tekst(mappe) or not os.path.isdir(mappe):
+            return _formater_svar(UGYLDIG_INPUT, [], f"Fant ikke mappen {mappe}")
+        if not er_helltall(batch_størrelse) or batch_størrelse < 1:
+            return _formater_svar(UGYLDIG_INPUT, [], f"forventet batch_størrelse som et positivt heltall, fikk {batch_størrelse}")
+
+        start = time.perf_counter()
+        sett = set()    # fingeravtrykkene fra filene som er skrevet, så like transaksjoner i flere filer ikke sendes til skriveren
+        filer = []
+        feil = []
+
+        for fil, lest_fil in les_filer(sorted(glob.glob(os.path.join(mappe, mønster))), prosesser):
+            if isinstance(lest_fil, Exception):
+                feil.append({"fil": fil, "melding": f"{type(lest_fil).__name__}: {lest_fil}"})
+                continue
+
+            start_skriving = time.perf_counter()
+            nye = []
+            nye_fingeravtrykk = []
+            duplikater = 0
+            for transaksjon, fingeravtrykk in zip(lest_fil.get("transaksjoner"), lest_fil.get("fingeravtrykk")):
+                if fingeravtrykk in sett:
+                    duplikater += 1
+                    continue
+                sett.add(fingeravtrykk)
+                nye.append(transaksjon)
+                nye_fingeravtrykk.append(fingeravtrykk)
+
+            lagt_til = 0
+            for første in range(0, len(nye), batch_størrelse):
+                ider = self._skriv_batch(nye[første:første + batch_størrelse], nye_fingeravtrykk[første:første + batch_størrelse])
+                lagt_til += sum(1 for ide in ider if ide is not None)
+            duplikater += len(nye) - lagt_til
+
+            sekunder_skriving = time.perf_counter() - start_skriving
+            sekunder = lest_fil.get("sekunder") + sekunder_skriving
+            resultat = {"fil": fil, "lest": lest_fil.get("lest"), "lagt_til": lagt_til, "duplikater": duplikater,
+                        "avvist": lest_fil.get("avvist"), "sekunder_lesing": lest_fil.get("sekunder"),
+                        "sekunder_skriving": sekunder_skriving, "rader_per_sekund": lest_fil.get("lest") / sekunder if sekunder else 0.0}
+            filer.append(resultat)
+            if fremdrift is not None:
+                fremdrift(resultat)
+
+        sekunder = time.perf_counter() - start
+        lest = sum(fil.get("lest") for fil in filer)
+        oppsummering = {
+            "filer": filer,
+            "feil": feil,
+            "lest": lest,
+            "lagt_til": sum(fil.get("lagt_til") for fil in filer),
+            "duplikater": sum(fil.get("duplikater") for fil in filer),
+            "avvist": sum(len(fil.get("avvist")) for fil in filer),
+            "sekunder": sekunder,
+            "rader_per_sekund": lest / sekunder if sekunder else 0.0,
+        }
+
+        if oppsummering["lagt_til"] == 0:
+            return _formater_svar(SUKSESS_INGEN_INNHOLD, oppsummering, "Ingen nye transaksjoner")
+
+        return _formater_svar(OPPRETTET_NY, oppsummering, "suksess")
+
+
+    def skriv_mange(self, transaksjoner: list[dict]) -> dict:
+        """
+        Skriver mange transaksjoner med tags på en gang. Alle valideres først, så skrives de gyldige i én transaksjon med executemany,
+        med alle kategori- og personnavn slått opp (eller lagt til) samlet. Ugyldige rader og duplikater stopper ikke resten.
+        :param transaksjoner: [{pris, type, dato, beskrivelse, kategorier: [str], personer: [str]}], beskrivelse og tags kan mangle
+        :return: _formater_svar[innhold] -> {lagt_til, duplikater, avvist, resultater: [{status, id, melding}]}
+            med ett resultat per transaksjon i samme rekkefølge. OPPRETTET_NY hvis minst én ble lagt til, ellers SUKSESS_INGEN_INNHOLD
+        """
+        if not isinstance(transaksjoner, (list, tuple)):
+            return _formater_svar(UGYLDIG_INPUT, [], f"forventet type list, fikk {transaksjoner} av typen {type(transaksjoner).__name__}")
+
+        resultater = [None] * len(transaksjoner)
+        gyldige = []
+        plasser = []
+        for plass, transaksjon in enumerate(transaksjoner):
+            validert = er_gyldig_ny_transaksjon(transaksjon)
+            if validert.get("status") != SUKSESS_INGEN_INNHOLD:
+                resultater[plass] = {"status": validert.get("status"), "id": None, "melding": validert.get("melding")}
+                continue
+
+            gyldige.append({
+                "pris": transaksjon.get("pris"),
+                "type": transaksjon.get("type"),
+                "dato": transaksjon.get("dato"),
+                "beskrivelse": transaksjon.get("beskrivelse") or "",
+                "kategorier": list(dict.fromkeys(transaksjon.get("kategorier") or [])),
+                "personer": list(dict.fromkeys(transaksjon.get("personer") or [])),
+            })
+            plasser.append(plass)
+
+        # valideringen over kjører hos den som kaller, bare selve skrivingen går gjennom skrivekøen
+        ider = self._skriv_batch(gyldige) if gyldige else []
+
+        for plass, ide in zip(plasser, ider):
+            if ide is None:
+                resultater[plass] = {"status": KONFLIKT, "id": None, "melding": "Transaksjonen finnes allerede i databasen"}
+            else:
+                resultater[plass] = {"status": OPPRETTET_NY, "id": ide, "melding": "suksess"}
+
+        lagt_til = sum(1 for ide in ider if ide is not None)
+        oppsummering = {"lagt_til": lagt_til, "duplikater": len(ider) - lagt_til, "avvist": len(transaksjoner) - len(ider),
+                        "resultater": resultater}
+
+        if lagt_til == 0:
+            return _formater_svar(SUKSESS_INGEN_INNHOLD, oppsummering, "Ingen nye transaksjoner")
+
+        return _formater_svar(OPPRETTET_NY, oppsummering, "suksess")
+
+
+    @_skriveoperasjon("transaksjoner", "kategori_tag", "person_tag", "kategorier", "personer")
+    def _skriv_batch(self, transaksjoner: list[dict], fingeravtrykkene: list[str] = None) -> list:
+        """
+        Skriver en batch med validerte transaksjoner og tags i én transaksjon, med executemany
+        :param transaksjoner: [{pris, type, dato, beskrivelse, kategorier: [str], personer: [str]}]
+        :param fingeravtrykkene: lag_fingeravtrykk for hver transaksjon, hvis de allerede er laget (som av innlesing.les_csv_fil)
+        :return: ny id for hver transaksjon i samme rekkefølge, eller None hvis den var et duplikat
+        """
+        if fingeravtrykkene is None:
+            fingeravtrykkene = [lag_fingeravtrykk(transaksjon) for transaksjon in transaksjoner]
+
+        with self.database.transaksjon():
+            sett = set()    # fingeravtrykk som finnes fra før, eller som kom tidligere i samme batch
+            for bit in _i_biter(list(set(fingeravtrykkene))):
+                spørsmålstegn_tekst = ",".join(["?"] * len(bit))
+                sett.update(rad.get("fingeravtrykk") for rad in self.database.execute(
+                    f"SELECT fingeravtrykk FROM transaksjoner WHERE fingeravtrykk IN ({spørsmålstegn_tekst})", bit, fetchall=True))
+
+            ider = [None] * len(transaksjoner)
+            nye = []
+            nye_plasser = []
+            for plass, (transaksjon, fingeravtrykk) in enumerate(zip(transaksjoner, fingeravtrykkene)):
+                if fingeravtrykk in sett:
+                    continue
+
+                sett.add(fingeravtrykk)
+                nye.append(transaksjon)
+                nye_plasser.append(plass)
+
+            if not nye:
+                return ider
+
+            person_ider = self._hent_eller_lag_navn("personer", {navn for t in nye for navn in t.get("personer")})
+            kategori_ider = self._hent_eller_lag_navn("kategorier", {navn for t in nye for navn in t.get("kategorier")})
+
+            self.database.executemany(
+                "INSERT INTO transaksjoner (pris, type, dato, beskrivelse, fingeravtrykk) VALUES (?, ?, ?, ?, ?)",
+                [(t.get("pris"), t.get("type"), t.get("dato"), t.get("beskrivelse"), fingeravtrykkene[plass])
+                 for t, plass in zip(nye, nye_plasser)], commit=True)
+
+            # fingeravtrykket er unikt, så id-ene leses tilbake med det i stedet for å regne dem ut fra last_insert_rowid()
+            nye_fingeravtrykk = [fingeravtrykkene[plass] for plass in nye_plasser]
+            id_for = {}
+            for bit in _i_biter(nye_fingeravtrykk):
+                spørsmålstegn_tekst = ",".join(["?"] * len(bit))
+                for rad in self.database.execute(
+                        f"SELECT id, fingeravtrykk FROM transaksjoner WHERE fingeravtrykk IN ({spørsmålstegn_tekst})", bit, fetchall=True):
+                    id_for[rad.get("fingeravtrykk")] = rad.get("id")
+            nye_ider = [id_for[fingeravtrykk] for fingeravtrykk in nye_fingeravtrykk]
+
+            self.database.executemany(
+                "INSERT INTO person_tag (transaksjon_id, person_id) VALUES (?, ?)",
+                [(ide, person_ider[navn]) for ide, t in zip(nye_ider, nye) for navn in set(t.get("personer"))], commit=True)
+
+            self.database.executemany(
+                "INSERT INTO kategori_tag (transaksjon_id, kategori_id) VALUES (?, ?)",
+                [(ide, kategori_ider[navn]) for ide, t in zip(nye_ider, nye) for navn in set(t.get("kategorier"))], commit=True)
+
+        for plass, ide in zip(nye_plasser, nye_ider):
+            ider[plass] = ide
+
+        return ider
+
+
+    def _hent_eller_lag_navn(self, tabelnavn: str, navn: set) -> dict:
+        """
+        Slår opp alle navnene i personer/kategorier på en gang, og legger til de som mangler. Returnerer {navn: id}
+        Navn som ligger i NavneCache-en til Personer/Kategorier slås ikke opp i databasen i det hele tatt.
+        """
+        eier = self.personer if tabelnavn == "personer" else self.kategorier
+
+        navn_ider = {}
+        for et_navn in navn:
+            ide = eier.cache.hent_id(et_navn)
+            if ide is not None:
+                navn_ider[et_navn] = ide
+
+        def slå_opp(mangler):
+            for bit in _i_biter(list(mangler)):
+                spørsmålstegn_tekst = ",".join(["?"] * len(bit))
+                for rad in self.database.execute(f"SELECT id, navn FROM {tabelnavn} WHERE navn IN ({spørsmålstegn_tekst})", bit, fetchall=True):
+                    navn_ider[rad.get("navn")] = rad.get("id")
+                    eier._husk(rad)
+
+        slå_opp(navn - navn_ider.keys())
+        mangler = navn - navn_ider.keys()
+        if mangler:
+            self.database.executemany(f"INSERT INTO {tabelnavn} (navn) VALUES (?)", [(n,) for n in mangler], commit=True)
+            slå_opp(mangler)
+
+        return navn_ider
@@ -1,22 +1,35 @@
 import datetime
 from database import Database
-from privat import _formater_svar
+from privat import _formater_svar, _les_peker
+from rader import RADFORMATER
 from retur_meldinger import UGYLDIG_INPUT, SUKSESS_INGEN_INNHOLD
 
 
 def er_gyldig_dato(dato: str) -> bool:
+    if not isinstance(dato, str):
+        return False
     try:
         datetime.datetime.fromisoformat(dato)
         return True
     except ValueError:
         return False
 
+def er_gyldig_måned(måned: str) -> bool:
+    """ÅÅÅÅ-MM, som måned-kolonnen i sammendrag-tabellene"""
+    try:
+        datetime.datetime.strptime(måned, "%Y-%m")
+        return len(måned) == 7
+    except (TypeError, ValueError):
+        return False
+
 def er_helltall(tall: int) -> bool:
     if not isinstance(tall, int):
         return False
     return True
 
 def er_gyldig_handling(handling: str) -> bool:
+    if not isinstance(handling, str):
+        return False
     if handling.lower() not in ("innskudd", "uttak", "utlegg", "tilbakebetaling"):
         return False
     return True
@@ -46,6 +59,23 @@ def er_gyldig_transaksjon_input(beløp: int, handling: str, dato: datetime, besk
     return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
 
 
+def er_gyldig_side(grense: int, peker: str, radformat: str = None) -> dict:
+    """Sjekker grense, peker og radformat til list-metodene i Transaksjoner. Alle kan være None"""
+    if radformat is not None and radformat not in RADFORMATER:
+        return _formater_svar(UGYLDIG_INPUT, [], f"Ukjent radformat {radformat}, forventet en av {RADFORMATER}")
+
+    if grense is not None and (not er_helltall(grense) or grense < 1):
+        return _formater_svar(UGYLDIG_INPUT, [], f"forventet grense som et positivt heltall, fikk {grense} av typen {type(grense).__name__}")
+
+    if peker is not None:
+        try:
+            _les_peker(peker)
+        except ValueError as feil:
+            return _formater_svar(UGYLDIG_INPUT, [], str(feil))
+
+    return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
+
+
 def er_hentet_transaksjon_innhold_gyldig(transaksjon_innhold: dict) -> dict:
     pris = transaksjon_innhold.get("pris")
     handling = transaksjon_innhold.get("type")
@@ -54,5 +84,25 @@ def er_hentet_transaksjon_innhold_gyldig(transaksjon_innhold: dict) -> dict:
     return er_gyldig_transaksjon_input(pris, handling, dato, beskrivelse)
 
 
+def er_gyldig_ny_transaksjon(transaksjon: dict) -> dict:
+    """Sjekker en transaksjon til Transaksjoner.skriv_mange: {pris, type, dato, beskrivelse, kategorier: [str], personer: [str]}"""
+    if not isinstance(transaksjon, dict):
+        return _formater_svar(UGYLDIG_INPUT, [], f"forventet type dict, fikk {transaksjon} av typen {type(transaksjon).__name__}")
+
+    validert = er_hentet_transaksjon_innhold_gyldig(transaksjon)
+    if validert.get("status") != SUKSESS_INGEN_INNHOLD:
+        return validert
+
+    for felt in ("kategorier", "personer"):
+        navn = transaksjon.get(felt)
+        if navn is None:
+            continue
+        if not isinstance(navn, (list, tuple)) or not all(er_gyldig_tekst(et_navn) and et_navn for et_navn in navn):
+            return _formater_svar(UGYLDIG_INPUT, [], f'Feil type {felt}. forventet en liste med navn fikk "{navn}", av typen {type(navn).__name__}')
+
+    return _formater_svar(SUKSESS_INGEN_INNHOLD, [], "suksess")
+
+
 def hent_tables(database: Database) -> list:
-    return database.execute(".tables", fetchall=True)
+    """Navnene på tabellene i databasen, fra Database.skjema, så det ikke blir en spørring hver gang"""
+    return list(database.skjema.tabeller)